@@ -0,0 +1,102 @@
+"""
+Raven Assistant - Intent Router Benchmark
+Times routing one message with the compiled IntentRouter against the old
+any(keyword in text) chain, for intent tables of growing size. The router is timed
+in both modes: whole words (word_boundary=True, what RavenCore ships) and plain
+substrings (what the old chain did).
+
+Usage: python bench_intent_router.py [--repeat N]
+"""
+
+import re
+import sys
+import time
+import random
+import string
+import argparse
+
+from raven_nlp import IntentRouter, INTENT_SLOTS, INTENT_TABLE, WORD_CHARS
+
+MESSAGES = [
+    "hey raven how are you doing",
+    "what time is it right now",
+    "open chrome and play some music please",
+    "ami aj ektu tired, kichu bolo",
+    "can you explain how a binary search tree works in simple words",
+    "send a message to mom that I will be late tonight",
+]
+
+
+def synthetic_table(intents: int, seed: int = 7):
+    """The real table plus random extra intents (3 keywords each, some two-slot)"""
+    rng = random.Random(seed)
+    slots = dict(INTENT_SLOTS)
+    table = list(INTENT_TABLE)
+    for i in range(intents - len(INTENT_TABLE)):
+        words = tuple("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9)))
+                      for _ in range(3))
+        slots[f"extra_{i}"] = words
+        required = (f"extra_{i}",) if i % 3 else (f"extra_{i}", "open")
+        table.append((f"extra_{i}", required))
+    return table, slots
+
+
+def naive_route(text: str, table, slots):
+    """The old if-chain, generalised: re-lowercase and scan every slot of every intent"""
+    for intent, required in table:
+        if all(any(keyword in text.lower() for keyword in slots[slot]) for slot in required):
+            return intent
+    return None
+
+
+def whole_word_route(text: str, table, slots):
+    """Reference answer for word_boundary=True: one regex search per keyword"""
+    def found(keyword):
+        end = f"(?![{WORD_CHARS}])" if re.match(f"[{WORD_CHARS}]", keyword[-1]) else ""
+        return re.search(f"(?<![{WORD_CHARS}]){re.escape(keyword)}{end}", text.lower()) is not None
+
+    for intent, required in table:
+        if all(any(found(keyword) for keyword in slots[slot]) for slot in required):
+            return intent
+    return None
+
+
+def time_per_message(route, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            route(message)
+    return (time.perf_counter() - started) / (repeat * len(MESSAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the intent router")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the sample messages")
+    args = parser.parse_args()
+
+    print(f"{'intents':>8} {'keywords':>9} {'compile ms':>11} {'words us':>9} {'substring us':>13} "
+          f"{'if-chain us':>12}")
+    for intents in (10, 100, 1000, 5000):
+        table, slots = synthetic_table(intents)
+        started = time.perf_counter()
+        router = IntentRouter(table, slots)  # Whole words, as in RavenCore
+        compile_ms = (time.perf_counter() - started) * 1000
+        # Substring mode must agree exactly with the old chain
+        substring_router = IntentRouter(table, slots, word_boundary=False)
+
+        # Every router must agree with its reference on every sample before timing means anything
+        for message in MESSAGES:
+            assert router.route(message).intent == whole_word_route(message, table, slots), message
+            assert substring_router.route(message).intent == naive_route(message, table, slots), message
+
+        router_us = time_per_message(router.route, args.repeat) * 1e6
+        substring_us = time_per_message(substring_router.route, args.repeat) * 1e6
+        naive_us = time_per_message(lambda text: naive_route(text, table, slots), max(1, args.repeat // 10)) * 1e6
+        keywords = sum(len(words) for words in slots.values())
+        print(f"{intents:>8} {keywords:>9} {compile_ms:>11.1f} {router_us:>9.1f} {substring_us:>13.1f} "
+              f"{naive_us:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
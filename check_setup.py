@@ -28,7 +28,8 @@ def check_dependencies():
         'pyautogui': 'PyAutoGUI',
         'speech_recognition': 'SpeechRecognition',
         'pyttsx3': 'pyttsx3',
-        'duckduckgo_search': 'duckduckgo-search'
+        'duckduckgo_search': 'duckduckgo-search',
+        'numpy': 'NumPy'
     }
     
     all_installed = True
@@ -74,6 +75,12 @@ def check_ollama():
             else:
                 print("⚠ No vision model found (recommended: llama3.2-vision, llava)")
             
+            has_embedding_model = any('embed' in m for m in models)
+            if has_embedding_model:
+                print("✓ Embedding model available")
+            else:
+                print("⚠ No embedding model found (recommended: nomic-embed-text) - related-message recall is off")
+            
             return True
         else:
             print("✗ Ollama server - Not responding properly")
@@ -0,0 +1,216 @@
+"""Raven Assistant - Batch Runner
+
+This module pushes many messages through RavenCore.process_message without the GUI,
+for evaluation and prompt tuning. Input and output are JSONL files.
+Cores run headless: no microphone, no speech, no screenshots, system commands are dry runs.
+
+Input lines:  {"id": "q1", "input": "hello", "session": "s1", "language_mode": "english"}
+  Only "input" is required. Lines with the same "session" run in order as one conversation;
+  lines without one are independent turns.
+Output lines: id, session, input, response, state, intent, model, cached, ok, error,
+  first_token_seconds and seconds for every input line.
+
+Usage:
+    python raven_batch.py prompts.jsonl -o results.jsonl --workers 4
+    python raven_batch.py prompts.jsonl --fast-model llama3.2:1b   # route chit-chat to a small model
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Iterable, Iterator, TextIO
+
+from raven_core import RavenCore
+from raven_ollama import OllamaClient
+
+
+class BatchRunner:
+    """Run JSONL-style items through headless RavenCore instances with bounded parallelism"""
+
+    def __init__(self, workers: int = 4,
+                 ollama_hosts: Optional[List[str]] = None,
+                 ollama_client: Optional[OllamaClient] = None,
+                 memory_root: Optional[str] = None,
+                 use_cache: bool = False,
+                 fast_text_model: Optional[str] = None):
+        self.workers = max(1, workers)  # Conversations in flight at once
+        self.ollama_hosts = ollama_hosts or ["http://localhost:11434"]
+        # One client for every core, so the per-host concurrency cap, the circuit breaker
+        # and the health monitor cover the whole batch; one made here is closed by close()
+        self._owns_client = ollama_client is None
+        self.ollama_client = ollama_client or RavenCore.create_ollama_client(self.ollama_hosts)
+        # Every core gets its own memory folder so histories, logs and caches never mix
+        self.memory_root = memory_root or tempfile.mkdtemp(prefix="raven_batch_")
+        # Off by default so every turn really hits the model; on = allowlisted repeatable questions only
+        self.use_cache = use_cache
+        self.fast_text_model = fast_text_model  # Chit-chat model; None = route everything to the text model
+
+        self._cores: "queue.Queue[RavenCore]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_core(self) -> RavenCore:
+        """Create a headless core on the shared Ollama client"""
+        with self._lock:
+            index = self._created
+            self._created += 1
+        memory_path = os.path.join(self.memory_root, f"worker_{index}")
+        return RavenCore(
+            ollama_client=self.ollama_client,
+            ollama_hosts=self.ollama_hosts,
+            memory_path=memory_path,
+            headless=True,
+            fast_text_model=self.fast_text_model
+        )
+
+    def _checkout(self) -> RavenCore:
+        try:
+            return self._cores.get_nowait()
+        except queue.Empty:
+            return self._new_core()
+
+    @staticmethod
+    def group_sessions(items: Iterable[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group items by "session" (first-seen order); items without a session stand alone"""
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for index, item in enumerate(items):
+            item = dict(item, index=index)
+            key = ("session", item["session"]) if item.get("session") is not None else ("item", index)
+            groups.setdefault(key, []).append(item)
+        return list(groups.values())
+
+    def run_item(self, core: RavenCore, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one turn on a core and describe the result"""
+        user_input = str(item.get("input", item.get("message", "")))
+        result: Dict[str, Any] = {
+            "index": item.get("index"),
+            "id": item.get("id", item.get("index")),
+            "session": item.get("session"),
+            "input": user_input,
+        }
+        first_token: List[float] = []
+        started = time.perf_counter()
+
+        def on_token(token: str) -> None:
+            if not first_token:
+                first_token.append(time.perf_counter() - started)
+
+        try:
+            if item.get("language_mode") in ("english", "banglish"):
+                core.language_mode = item["language_mode"]
+            core.log_chat("You", user_input)
+            response, state = core.process_message(user_input, on_token=on_token,
+                                                   use_cache=None if self.use_cache else False)
+            core.log_chat("Raven", response)
+            llm_turn = core.last_model is not None
+            result.update({
+                "response": response,
+                "state": state,
+                "intent": core.last_intent,
+                "model": core.last_model,
+                "cached": core.last_response_cached,
+                "ok": (core.last_request_ok or core.last_response_cached) if llm_turn else True,
+                "error": None,
+            })
+        except Exception as e:
+            result.update({"response": None, "state": "idle", "intent": core.last_intent,
+                           "model": core.last_model, "cached": False, "ok": False, "error": str(e)})
+
+        result["language_mode"] = core.language_mode
+        result["first_token_seconds"] = round(first_token[0], 4) if first_token else None
+        result["seconds"] = round(time.perf_counter() - started, 4)
+        return result
+
+    def _run_session(self, group: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run one conversation on a pooled core, starting from a clean history"""
+        core = self._checkout()
+        try:
+            core.reset_conversation(group[0].get("language_mode") or "banglish")
+            return [self.run_item(core, item) for item in group]
+        finally:
+            self._cores.put(core)
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield one result per item as conversations finish (each result carries its input index)"""
+        groups = self.group_sessions(items)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="raven-batch") as executor:
+            futures = [executor.submit(self._run_session, group) for group in groups]
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def close(self) -> None:
+        """Shut down the cores (drains their log writers) and release the shared Ollama client"""
+        while not self._cores.empty():
+            self._cores.get_nowait().shutdown()
+        if self._owns_client:
+            self.ollama_client.close()
+
+
+def read_jsonl(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Yield items from JSONL; a bare string line becomes {"input": line}"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"[Terminal] Skipping bad JSONL line {line_number}: {e}", file=sys.stderr)
+            continue
+        yield item if isinstance(item, dict) else {"input": item}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Run many messages through Raven without the GUI")
+    parser.add_argument("input", help="JSONL file with one message per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="conversations run in parallel")
+    parser.add_argument("--host", action="append", dest="hosts",
+                        help="Ollama base URL; repeat to spread the load over several hosts")
+    parser.add_argument("--cache", action="store_true", help="allow response cache hits for repeatable questions")
+    parser.add_argument("--fast-model", help="small model for short chit-chat turns (turns on model routing)")
+    parser.add_argument("--memory-root", help="folder for per-worker memory (default: a temp folder)")
+    parser.add_argument("--quiet", action="store_true", help="hide [Terminal] logs")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        source = sys.stdin if args.input == "-" else stack.enter_context(open(args.input, "r", encoding="utf-8"))
+        items = list(read_jsonl(source))
+        target = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8"))
+
+        # Core logs go to stderr (or nowhere) so stdout stays valid JSONL
+        log_stream = stack.enter_context(open(os.devnull, "w")) if args.quiet else sys.stderr
+        stack.enter_context(contextlib.redirect_stdout(log_stream))
+
+        runner = BatchRunner(workers=args.workers, ollama_hosts=args.hosts,
+                             memory_root=args.memory_root, use_cache=args.cache,
+                             fast_text_model=args.fast_model)
+        started = time.perf_counter()
+        count = 0
+        failed = 0
+        try:
+            for result in runner.run(items):
+                target.write(json.dumps(result, ensure_ascii=False) + "\n")
+                target.flush()
+                count += 1
+                failed += 0 if result["ok"] else 1
+        finally:
+            runner.close()
+
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0.0
+        print(f"[Terminal] Batch done: {count} results, {failed} failed, {elapsed:.1f}s ({rate:.1f}/s)",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
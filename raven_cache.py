@@ -0,0 +1,151 @@
+"""Raven Assistant - Response Cache
+
+This module caches LLM replies for repeatable questions (greetings, "who are you", ...).
+A small in-memory LRU sits in front of a SQLite file under the memory folder.
+"""
+
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Iterable
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + disk) cache for history-independent LLM replies"""
+
+    # The only inputs whose reply does not depend on the conversation (normalized form).
+    # Short follow-ups like "yes", "why?" or "tell me more" do, so they are never cached.
+    REPEATABLE_QUERIES = {
+        "hi", "hello", "hey", "hi raven", "hello raven", "hey raven",
+        "good morning", "good afternoon", "good evening", "good night",
+        "who are you", "what are you", "what is your name", "what s your name",
+        "what can you do", "what can you help me with", "how can you help me", "introduce yourself",
+        "tumi ke", "tomar nam ki", "tumi ki korte paro", "ki ki korte paro",
+    }
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 256,
+                 ttl_seconds: float = 7 * 24 * 3600, queries: Optional[Iterable[str]] = None):
+        # Inputs that may be cached (REPEATABLE_QUERIES unless given)
+        self.queries = {self.normalize(query) for query in (queries if queries is not None else self.REPEATABLE_QUERIES)}
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str) -> None:
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"[Terminal] Response cache disk tier disabled: {e}")
+            self._db = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        text = re.sub(r"[^\w\s]", " ", text.lower())
+        return " ".join(text.split())
+
+    def is_cacheable(self, user_input: str) -> bool:
+        """Whether user_input is one of the allowlisted repeatable queries"""
+        return self.normalize(user_input) in self.queries
+
+    def make_key(self, user_input: str, language_mode: str, mood: str, model: str) -> str:
+        return "\x1f".join((self.normalize(user_input), language_mode, mood, model))
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply or None; counts hits and misses"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._memory[key]
+
+            response = self._disk_get(key, now)
+            if response is not None:
+                self._remember(key, response, now)
+                self.hits += 1
+                self.disk_hits += 1
+                return response
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            if self._db:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                        (key, response, now)
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    print(f"[Terminal] Response cache write error: {e}")
+
+    def _remember(self, key: str, response: str, created: float) -> None:
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if not self._db:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            return row[0]
+        except Exception as e:
+            print(f"[Terminal] Response cache read error: {e}")
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._memory),
+        }
+
+    def close(self) -> None:
+        if self._db:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,539 @@
+"""Raven Assistant - Chat Log
+
+This module moves chat logging off the GUI and turn threads and keeps the logs tidy.
+Lines are queued, written in batches by one background thread and fsynced by policy;
+other disk work (history store inserts, journal snapshots) can be queued behind them
+so it runs in order on the same thread.
+The text logs are split into segments (new one per day or past a size limit); closed
+segments are gzipped and merged per day, and an index of their time ranges lets a day
+be read or searched without scanning the whole folder.
+"""
+
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import queue
+import threading
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Callable, TextIO, Iterator, Union
+
+
+class ChatLogWriter:
+    """Background writer: buffered, batched appends with a configurable fsync policy
+
+    fsync policies:
+      "always"   - fsync after every batch (slowest, nothing lost on power failure)
+      "interval" - fsync at most every fsync_interval seconds
+      "never"    - leave it to the OS
+    """
+
+    FSYNC_POLICIES = ("always", "interval", "never")
+
+    def __init__(self, flush_interval: float = 0.5, batch_size: int = 100,
+                 fsync: str = "interval", fsync_interval: float = 5.0):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_POLICIES}, got {fsync!r}")
+        self.flush_interval = flush_interval  # Max seconds a line waits in memory
+        self.batch_size = batch_size          # Write out early once this many lines are waiting
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._files: Dict[str, TextIO] = {}
+        self._unsynced: set = set()
+        self._last_fsync = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Metrics
+        self.lines_written = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch_seconds = 0.0
+
+        self.start()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="raven-chatlog", daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, text: str) -> None:
+        """Queue text to be appended to path; never blocks on disk"""
+        if self._closed:
+            print(f"[Terminal] Chat log writer closed, dropped write to {os.path.basename(path)}")
+            return
+        self._queue.put(("line", path, text))
+
+    def call(self, function: Callable, *args, after_write: bool = True) -> None:
+        """Run function(*args) on the writer thread, in queue order
+
+        With after_write, lines queued before it are written out first (e.g. a journal
+        snapshot that records the file size); otherwise they keep batching.
+        """
+        self._queue.put(("call", function, args, after_write))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written; False on timeout"""
+        if not self._thread or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def release(self, path: str) -> None:
+        """Close the handle for path (writer thread only, e.g. before the file is replaced)"""
+        handle = self._files.pop(path, None)
+        self._unsynced.discard(path)
+        if handle:
+            handle.close()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drain the queue, fsync (unless policy is never) and stop the thread"""
+        if self._closed:
+            return
+        self._closed = True
+        done = threading.Event()
+        self._queue.put(("stop", done))
+        if self._thread and self._thread.is_alive() and not done.wait(timeout):
+            print(f"[Terminal] Chat log writer did not drain within {timeout:.0f}s ({self._queue.qsize()} items left)")
+
+    def _handle(self, path: str) -> TextIO:
+        handle = self._files.get(path)
+        if handle is None:
+            handle = open(path, "a", encoding="utf-8")
+            self._files[path] = handle
+        return handle
+
+    def _write_out(self, pending: Dict[str, List[str]]) -> None:
+        """Write buffered lines, one write per file, then fsync per policy"""
+        if not pending:
+            return
+        started = time.perf_counter()
+        for path, lines in pending.items():
+            try:
+                handle = self._handle(path)
+                handle.write("".join(lines))
+                handle.flush()
+                self._unsynced.add(path)
+                self.lines_written += len(lines)
+            except Exception as e:
+                self.errors += 1
+                print(f"[Terminal] Chat log write error ({os.path.basename(path)}): {e}")
+        pending.clear()
+        if self.fsync == "always" or (self.fsync == "interval"
+                                      and time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self._sync()
+        self.batches += 1
+        self.max_batch_seconds = max(self.max_batch_seconds, time.perf_counter() - started)
+
+    def _sync(self) -> None:
+        for path in list(self._unsynced):
+            try:
+                os.fsync(self._files[path].fileno())
+            except Exception as e:
+                self.errors += 1
+                print(f"[Terminal] Chat log fsync error ({os.path.basename(path)}): {e}")
+        self._unsynced.clear()
+        self._last_fsync = time.monotonic()
+
+    def _run(self) -> None:
+        pending: Dict[str, List[str]] = {}
+        waiting = 0
+        first_at: Optional[float] = None
+        while True:
+            timeout = None if first_at is None else max(0.0, first_at + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item[0] != "line" and (item[0] != "call" or item[3]):
+                # Flush interval reached, or a call/flush/stop needs everything before it on disk
+                self._write_out(pending)
+                waiting, first_at = 0, None
+                if item is None:
+                    continue
+
+            kind = item[0]
+            if kind == "line":
+                pending.setdefault(item[1], []).append(item[2])
+                waiting += 1
+                first_at = first_at or time.monotonic()
+                if waiting >= self.batch_size:
+                    self._write_out(pending)
+                    waiting, first_at = 0, None
+            elif kind == "call":
+                try:
+                    item[1](*item[2])
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[Terminal] Background write error: {e}")
+            elif kind == "flush":
+                item[1].set()
+            elif kind == "stop":
+                if self.fsync != "never":
+                    self._sync()
+                for path in list(self._files):
+                    self.release(path)
+                item[1].set()
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "lines_written": self.lines_written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "max_batch_seconds": self.max_batch_seconds,
+            "fsync": self.fsync,
+        }
+
+
+class ChatLogArchive:
+    """Text chat logs split into segments, rotated by day and size, compressed and indexed by time
+
+    Segments are named chat_YYYYmmdd_HHMMSS.txt after their first line, like the per-session
+    logs older versions wrote (recover() folds those in). A closed segment is gzipped, or
+    appended as another gzip member to the same day's last segment while that stays under
+    max_segment_bytes, so a day of short sessions ends up as one file.
+    chat_index.json lists every segment with its time range, line count and size; it can be
+    rebuilt from the segments, so it is written without fsync. Times are Unix timestamps.
+    """
+
+    INDEX_NAME = "chat_index.json"
+    LINE_PATTERN = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2})\] ([^:]*): ?(.*)$")
+    NAME_PATTERN = re.compile(r"^chat_(\d{8}_\d{6})")
+
+    def __init__(self, folder: str, writer: Optional[ChatLogWriter] = None,
+                 max_segment_bytes: int = 1024 * 1024, compress: bool = True,
+                 retention_days: Optional[float] = None):
+        self.folder = folder
+        self.writer = writer
+        self.max_segment_bytes = max_segment_bytes  # Rotate (and stop merging) past this many bytes
+        self.compress = compress
+        self.retention_days = retention_days        # None keeps every segment
+        self.index_path = os.path.join(folder, self.INDEX_NAME)
+        self._entries: List[Dict[str, Any]] = []    # Sorted by start
+        self._active: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+        self._load_index()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._entries = sorted(json.load(f), key=lambda entry: entry["start"])
+        except Exception as e:
+            print(f"[Terminal] Chat log index unreadable, it will be rebuilt: {e}")
+            self._entries = []
+
+    def _save_index(self) -> None:
+        with self._lock:
+            text = json.dumps(self._entries, ensure_ascii=False)
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, self.index_path)
+
+    @property
+    def active_path(self) -> Optional[str]:
+        active = self._active
+        return self._path(active["file"]) if active else None
+
+    def write(self, text: str, when: Optional[datetime] = None) -> str:
+        """Append text to the active segment, rotating first on a new day or size limit; returns its path"""
+        when = when or datetime.now()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            active = self._active
+            if active and (datetime.fromtimestamp(active["start"]).date() != when.date()
+                           or active["bytes"] + size > self.max_segment_bytes):
+                self._close_active()
+                active = None
+            if active is None:
+                active = self._new_segment(when)
+            active["end"] = when.timestamp()
+            active["lines"] += text.count("\n")
+            active["bytes"] += size
+            path = self._path(active["file"])
+            # Queued under the lock so a rotation can never slip in between path and write
+            if self.writer:
+                self.writer.write(path, text)
+            else:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(text)
+        return path
+
+    def _new_segment(self, when: datetime) -> Dict[str, Any]:
+        """Start a segment; caller holds the lock"""
+        stem = f"chat_{when.strftime('%Y%m%d_%H%M%S')}"
+        name, suffix = f"{stem}.txt", 1
+        taken = {entry["file"] for entry in self._entries}
+        while name in taken or os.path.exists(self._path(name)) or os.path.exists(self._path(name + ".gz")):
+            name, suffix = f"{stem}_{suffix}.txt", suffix + 1
+        entry = {"file": name, "start": when.timestamp(), "end": when.timestamp(),
+                 "lines": 0, "bytes": 0, "closed": False}
+        self._entries.append(entry)
+        self._active = entry
+        return entry
+
+    def _close_active(self) -> None:
+        """Hand the active segment over to be finished after its queued lines; caller holds the lock"""
+        entry, self._active = self._active, None
+        if entry is None:
+            return
+        if self.writer:
+            self.writer.call(self._finish, entry)
+        else:
+            self._finish(entry)
+
+    def _merge_target(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The same day's latest closed segment that entry can be appended to; caller holds the lock"""
+        day = datetime.fromtimestamp(entry["start"]).date()
+        for other in reversed(self._entries):
+            if other is entry or other["start"] > entry["start"] or not other["closed"]:
+                continue
+            if datetime.fromtimestamp(other["start"]).date() != day:
+                return None
+            if other["file"].endswith(".gz") == self.compress and other["end"] <= entry["start"] \
+                    and other["bytes"] + entry["bytes"] <= self.max_segment_bytes:
+                return other
+            return None
+        return None
+
+    def _finish(self, entry: Dict[str, Any]) -> None:
+        """Compress a closed segment or merge it into the day's last one, then update the index
+
+        The destination and its size before the append are saved in the index as entry["archiving"]
+        first, and the segment is removed before that marker is cleared. After a crash, recover()
+        cuts a half-done append back to that size and retries, or only updates the index when the
+        segment is already gone, so a day is never archived twice.
+        """
+        if entry.get("closed"):
+            return
+        path = self._path(entry["file"])
+        if self.writer:
+            self.writer.release(path)
+        with self._lock:
+            archiving = entry.get("archiving")
+            if archiving:
+                target = next((other for other in self._entries
+                               if other is not entry and other["file"] == archiving["into"]), None)
+                destination = archiving["into"]
+            else:
+                target = self._merge_target(entry)
+                destination = target["file"] if target else entry["file"] + (".gz" if self.compress else "")
+        if not os.path.exists(path):
+            if archiving:
+                self._archived(entry, target, destination)  # Crashed after the segment was archived
+                return
+            with self._lock:
+                if entry in self._entries:
+                    self._entries.remove(entry)
+            return
+        if destination != entry["file"]:
+            destination_path = self._path(destination)
+            if archiving:
+                if os.path.exists(destination_path):
+                    with open(destination_path, "rb+") as f:
+                        f.truncate(archiving["offset"])  # Drop the partial copy of a crashed append
+            else:
+                offset = os.path.getsize(destination_path) if os.path.exists(destination_path) else 0
+                with self._lock:
+                    entry["archiving"] = {"into": destination, "offset": offset}
+                self._save_index()
+            with open(path, "rb") as f:
+                data = f.read()
+            if self.compress:
+                with gzip.open(destination_path, "ab") as f:
+                    f.write(data)  # Each append is one more gzip member; readers see one stream
+            else:
+                with open(destination_path, "ab") as f:
+                    f.write(data)
+            os.remove(path)
+        self._archived(entry, target, destination)
+
+    def _archived(self, entry: Dict[str, Any], target: Optional[Dict[str, Any]], destination: str) -> None:
+        """Record a finished segment in the index: merged into target, or renamed to destination"""
+        with self._lock:
+            entry.pop("archiving", None)
+            entry["closed"] = True
+            if target:
+                target["end"] = max(target["end"], entry["end"])
+                target["lines"] += entry["lines"]
+                target["bytes"] += entry["bytes"]
+                if entry in self._entries:
+                    self._entries.remove(entry)
+            else:
+                entry["file"] = destination
+        self._save_index()
+
+    def close(self) -> None:
+        """Close the active segment (compressed once its queued lines are written)"""
+        with self._lock:
+            self._close_active()
+
+    def recover(self) -> int:
+        """Finish segments left open by a crash or written by older versions, index stray
+        compressed segments and prune expired ones; returns the number of segments finished"""
+        paths = sorted(glob.glob(self._path("chat_*.txt")) + glob.glob(self._path("chat_*.txt.gz")))
+        with self._lock:
+            known = {entry["file"]: entry for entry in self._entries}
+            active = self._active["file"] if self._active else None
+            # Files a crashed _finish was appending to; that entry's own retry sorts them out
+            claimed = {entry["archiving"]["into"] for entry in self._entries if entry.get("archiving")}
+        finished = 0
+        for path in paths:
+            name = os.path.basename(path)
+            entry = known.get(name)
+            if name == active or (entry and entry["closed"]) or (entry is None and name in claimed):
+                continue
+            if entry is None:
+                entry = self._scan(name)
+                if entry is None:
+                    continue
+                with self._lock:
+                    self._entries.append(entry)
+                    self._entries.sort(key=lambda item: item["start"])
+            if not entry["closed"]:
+                self._finish(entry)
+                finished += 1
+        present = {os.path.basename(path) for path in paths}
+        with self._lock:
+            interrupted = [entry for entry in self._entries
+                           if entry.get("archiving") and not entry["closed"] and entry["file"] not in present]
+        for entry in interrupted:
+            # Archived and removed, but the crash came before the index was updated
+            self._finish(entry)
+            finished += 1
+        with self._lock:
+            # Segments deleted by hand drop out of the index
+            self._entries = [entry for entry in self._entries if not entry["closed"] or entry["file"] in present
+                             or os.path.exists(self._path(entry["file"]))]
+        pruned = self.prune()
+        self._save_index()
+        if finished or pruned:
+            print(f"[Terminal] Chat logs: {finished} segments compressed, {pruned} pruned")
+        return finished
+
+    def _scan(self, name: str) -> Optional[Dict[str, Any]]:
+        """Index entry for a segment file that is not in the index"""
+        match = self.NAME_PATTERN.match(name)
+        if not match:
+            return None
+        start = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+        entry = {"file": name, "start": start, "end": start, "lines": 0, "bytes": 0,
+                 "closed": name.endswith(".gz")}
+        for record in self._records(entry):
+            entry["end"] = max(entry["end"], record["created"])
+            entry["lines"] += 1 + record["message"].count("\n")
+            entry["bytes"] += len(f"[00:00:00] {record['sender']}: {record['message']}\n".encode("utf-8"))
+        return entry
+
+    def prune(self) -> int:
+        """Delete closed segments older than retention_days; returns how many"""
+        if self.retention_days is None:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock:
+            expired = [entry for entry in self._entries if entry["closed"] and entry["end"] < cutoff]
+            self._entries = [entry for entry in self._entries if entry not in expired]
+        for entry in expired:
+            try:
+                os.remove(self._path(entry["file"]))
+            except OSError:
+                pass
+        return len(expired)
+
+    def _records(self, entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Parse a segment into messages; lines only carry a time, so the date comes from
+        the segment start and moves on a day whenever the clock goes backwards"""
+        path = self._path(entry["file"])
+        opener = gzip.open if path.endswith(".gz") else open
+        day = datetime.fromtimestamp(entry["start"]).replace(hour=0, minute=0, second=0, microsecond=0)
+        last_seconds = -1
+        record: Optional[Dict[str, Any]] = None
+        try:
+            with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    match = self.LINE_PATTERN.match(line)
+                    if not match:
+                        if record is not None:
+                            record["message"] += "\n" + line  # Continuation of a multi-line message
+                        continue
+                    if record is not None:
+                        yield record
+                    hours, minutes, seconds = (int(value) for value in match.group(1, 2, 3))
+                    seconds_of_day = hours * 3600 + minutes * 60 + seconds
+                    if seconds_of_day < last_seconds:
+                        day += timedelta(days=1)
+                    last_seconds = seconds_of_day
+                    record = {"created": (day + timedelta(seconds=seconds_of_day)).timestamp(),
+                              "sender": match.group(4), "message": match.group(5),
+                              "segment": entry["file"]}
+        except (OSError, EOFError) as e:
+            print(f"[Terminal] Chat log segment {entry['file']} unreadable past this point: {e}")
+        if record is not None:
+            yield record
+
+    def segments_between(self, start: float, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Index entries whose time range overlaps start <= t < end, oldest first"""
+        end = end if end is not None else float("inf")
+        with self._lock:
+            return [dict(entry) for entry in self._entries if entry["start"] < end and entry["end"] >= start]
+
+    def read_between(self, start: float, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Logged messages with start <= created < end, oldest first"""
+        end = end if end is not None else float("inf")
+        return [record for entry in self.segments_between(start, end)
+                for record in self._records(entry) if start <= record["created"] < end]
+
+    def read_day(self, day: Union[date, datetime, str]) -> List[Dict[str, Any]]:
+        """Every logged message of one day (date, datetime or "YYYY-MM-DD"), oldest first"""
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        elif isinstance(day, datetime):
+            day = day.date()
+        start = datetime.combine(day, datetime.min.time())
+        return self.read_between(start.timestamp(), (start + timedelta(days=1)).timestamp())
+
+    def search(self, query: str, limit: int = 20, start: Optional[float] = None,
+               end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Messages containing every word of query (case-insensitive), newest first
+
+        Only segments overlapping the time range are opened, newest first, stopping at limit.
+        """
+        words = [word.lower() for word in re.findall(r"\w+", query)]
+        if not words:
+            return []
+        start = start if start is not None else 0.0
+        end = end if end is not None else float("inf")
+        found: List[Dict[str, Any]] = []
+        for entry in reversed(self.segments_between(start, end)):
+            matches = [record for record in self._records(entry)
+                       if start <= record["created"] < end
+                       and all(word in f"{record['sender']} {record['message']}".lower() for word in words)]
+            found.extend(reversed(matches))
+            if len(found) >= limit:
+                break
+        found.sort(key=lambda record: record["created"], reverse=True)
+        return found[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": len(self._entries),
+                "compressed": sum(1 for entry in self._entries if entry["file"].endswith(".gz")),
+                "lines": sum(entry["lines"] for entry in self._entries),
+                "bytes": sum(entry["bytes"] for entry in self._entries),
+            }
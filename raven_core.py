@@ -13,8 +13,12 @@ import asyncio
 import tempfile
 import re
 import subprocess
+import copy
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator, Union, Tuple
 import requests
 import pyautogui
 import webbrowser
@@ -23,6 +27,16 @@ import edge_tts
 import pygame
 from duckduckgo_search import DDGS
 from PIL import Image
+from raven_ollama import OllamaClient, BackendPool, OllamaError, OllamaUnavailable, CancelToken, ModelRouter
+from raven_prompt import PromptBuilder, GENERATION_PROFILES, USER_SENDERS, estimate_tokens, select_history
+from raven_memory import ConversationSummarizer, MemoryJournal, ConversationStore
+from raven_cache import ResponseCache
+from raven_vectors import VectorIndex, VectorMemory
+from raven_chatlog import ChatLogWriter, ChatLogArchive
+from raven_nlp import IntentRouter, IntentMatch, Message
+from raven_mood import MoodEngine
+from raven_langid import LanguageID
+from raven_intent import IntentClassifier
 
 
 class RavenCore:
@@ -41,17 +55,132 @@ class RavenCore:
         # Add your contacts here
     }
     
-    def __init__(self):
+    def __init__(self, ollama_client: Optional[OllamaClient] = None,
+                 ollama_hosts: Optional[List[str]] = None,
+                 memory_path: Optional[str] = None,
+                 headless: bool = False,
+                 fast_text_model: Optional[str] = None):
+        # Headless = no microphone, no speech, no screenshots and dry-run system commands
+        # (used by raven_batch for offline runs)
+        self.headless = headless
+        
         # Ollama configuration
         self.ollama_base_url = "http://localhost:11434"
+        # More than one host = spread requests over them (least-loaded host with the model)
+        self.ollama_hosts = ollama_hosts or [self.ollama_base_url]
         self.text_model = "Raven"  # User's custom model
         self.vision_model = "llama3.2-vision"
         
+        # Shared pooled client for every Ollama request (chat, stream, screenshots).
+        # Pass your own client to point Raven at another server or a local fake.
+        # A client passed in belongs to the caller, who closes it; one made here is closed by shutdown()
+        self._owns_ollama = ollama_client is None
+        self.ollama = ollama_client or self.create_ollama_client(self.ollama_hosts)
+        # Probe /api/tags in the background; an open circuit makes turns fail fast
+        self.health_check_interval = 10
+        if not headless:
+            self.ollama.on_recover = self.start_model_warmup  # Re-warm cold models once Ollama is back
+        self.ollama.start_health_monitor(self.health_check_interval)
+        
+        # Route each text turn to the fast or the large model; fall back to the fast
+        # one when the large model's p95 first-token latency breaks the SLO.
+        # Routing is off until a fast model is set: RavenCore(fast_text_model="llama3.2:1b")
+        # or core.fast_text_model = "llama3.2:1b" (see the fast_text_model property)
+        self.model_router = ModelRouter(
+            fast_model=fast_text_model or self.text_model,
+            large_model=self.text_model,
+            max_fast_words=8,
+            slo_p95_seconds=8.0
+        )
+        
+        # Prompt construction: static persona first, per-turn context last (prefix-cache friendly)
+        self.prompt_builder = PromptBuilder(self.USER_NAME)
+        # Use /api/chat with the persona as a system message instead of /api/generate
+        self.use_chat_api = False
+        
+        # Session mode: continue from the context tokens Ollama returned last turn
+        # instead of re-sending the history as text
+        self.reuse_context = True
+        # Ollama options per route (chat, screenshot, vision_context, summarize):
+        # num_predict, num_ctx, stop and sampling, plus a max_seconds cap on the stream.
+        # The history budget is derived from the profile's num_ctx and num_predict.
+        self.generation_profiles: Dict[str, Dict[str, Any]] = copy.deepcopy(GENERATION_PROFILES)
+        self.response_token_reserve = 512  # Room left for Raven's reply when num_predict is unlimited
+        self.history_token_budget: Optional[int] = None  # Fixed budget; None = derive from num_ctx
+        self.max_context_tokens = 3072  # Rebuild from text once the context grows past this
+        self._session_context: Optional[Dict[str, Any]] = None
+        # prompt_eval_count of recent turns, split by how the prompt was built
+        self.prompt_eval_stats: Dict[str, deque] = {
+            "rebuild": deque(maxlen=50),
+            "context": deque(maxlen=50),
+        }
+        
+        # Keep models resident between turns (sent with every request)
+        self.keep_alive = "30m"
+        # Warm up text and vision models in the background at startup
+        # (not headless: batch runs time every request, warm-up traffic would skew them)
+        self.warmup_on_start = not headless
+        # Per-model load state: {"state": "cold" | "loading" | "hot", "load_seconds": float}
+        self.model_status: Dict[str, Dict[str, Any]] = {
+            model: {"state": "cold", "load_seconds": None}
+            for model in (self.text_model, self.fast_text_model, self.vision_model)
+        }
+        
         # Memory configuration
-        self.memory_path = "D:/Raven/Memory"
+        self.memory_path = memory_path or "D:/Raven/Memory"
         os.makedirs(self.memory_path, exist_ok=True)
-        self.memory_file = os.path.join(self.memory_path, "history.json")
-        self.chat_log_file = os.path.join(self.memory_path, f"chat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        self.memory_file = os.path.join(self.memory_path, "history.json")  # Old format, migrated on load
+        # Chat log, journal and history store writes happen on one background thread
+        # fsync: "always" (safest), "interval" (every fsync_interval seconds) or "never"
+        self.log_writer = ChatLogWriter(
+            flush_interval=0.5,
+            batch_size=100,
+            fsync="interval",
+            fsync_interval=5.0
+        )
+        # Append-only journal (one line per message) + snapshot for fast startup
+        self.journal = MemoryJournal(
+            os.path.join(self.memory_path, "history.jsonl"),
+            os.path.join(self.memory_path, "history_snapshot.json"),
+            snapshot_every=50,
+            compact_bytes=1024 * 1024,
+            writer=self.log_writer
+        )
+        self._checkpoint_queued = False  # A snapshot/compaction is waiting on the writer thread
+        self.history_load_window = 20  # Messages loaded into chat_history at startup
+        # Every turn, mood and screenshot ever, indexed for time-range and keyword search
+        self.store = ConversationStore(os.path.join(self.memory_path, "conversations.db"))
+        self.last_screenshot_id: Optional[int] = None
+        
+        # Relevant-memory recall: every turn is embedded in the background and the few
+        # past messages most similar to the new input are added to its prompt
+        self.embedding_model = "nomic-embed-text"
+        self.recall_enabled = not headless  # Headless turns skip the embedding traffic
+        self.recall_k = 3
+        self.recall_min_score = 0.5  # Cosine similarity below this is not "relevant"
+        self.recall_max_chars = 400  # Long recalled messages are cut to keep prompts small
+        # Recall (an embedding request) runs beside payload building; a turn waits at most
+        # this long for it, then goes ahead without recalled messages
+        self.recall_timeout = 0.3
+        self._recall_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="raven-recall")
+        # Stored turns the index hasn't seen are embedded a batch at a time, only after the
+        # user has been idle this long, so the backlog never competes with a live turn
+        self.embed_backlog_idle_seconds = 30
+        self.vector_memory = VectorMemory(
+            VectorIndex(os.path.join(self.memory_path, "vectors"), model=self.embedding_model),
+            self._embed_texts
+        )
+        self.max_history_in_memory = 200  # Older messages move to the summary backlog
+        # Text chat logs: a new segment per day (or past 1 MB), closed segments gzipped and indexed
+        self.chat_log = ChatLogArchive(
+            self.memory_path,
+            writer=self.log_writer,
+            max_segment_bytes=1024 * 1024,
+            compress=True,
+            retention_days=None  # Delete text logs older than this many days (None keeps them all)
+        )
+        # Compress logs left by a crash or by older versions (one file per session) in the background
+        self.log_writer.call(self.chat_log.recover)
         
         # State tracking
         self.chat_history: List[Dict[str, Any]] = []
@@ -59,57 +188,168 @@ class RavenCore:
         self.vision_enabled = False
         self.voice_enabled = False
         self.language_mode = "banglish"  # Can be "english" or "banglish"
+        # Script scan + n-gram model (raven_data/langid_model.npz); romanized Banglish
+        # at or above banglish_threshold switches English mode back to Banglish
+        self.language_id = LanguageID()
+        self.banglish_threshold = 0.9
+        self.banglish_min_words = 2  # "ok" or "lol" alone is too short to judge
+        # How the last process_message call was handled ("chat", "time", "search", ...)
+        self.last_intent: Optional[str] = None
+        self.last_model: Optional[str] = None  # Model that answered the last LLM turn
+        self.last_response_cached = False
         
         # ELITE: Mood tracking for emotional intelligence
         self.mood_history: List[Dict[str, Any]] = []  # Track last 5 moods
         self.current_mood = "neutral"  # neutral, happy, sad, stressed, tired
+        # Weighted mood lexicon (raven_data/mood_lexicon.tsv) with negation and intensifiers
+        self.mood_engine = MoodEngine(threshold=0.5)
+        
+        # Streaming: seconds until the first token of the last streamed reply
+        self.last_first_token_latency: Optional[float] = None
+        
+        # Cancellation / barge-in
+        self._active_cancel: Optional[CancelToken] = None
+        self.last_generation_cancelled = False
+        self.is_speaking = False
+        self._speech_cancelled = False
+        self._speaking_text = ""  # What Raven is saying, to tell its own echo from the user
         
         # Speech engines
         self.recognizer = sr.Recognizer()
         # Better hearing settings
         self.recognizer.pause_threshold = 1.0
         self.recognizer.energy_threshold = 4000
+        # Barge-in listens while the speakers play Raven's voice, so it has its own recognizer
+        # whose threshold sits above the measured playback level, and it needs real words:
+        # at least barge_in_min_words, mostly not words Raven is saying itself
+        self.barge_in_recognizer = sr.Recognizer()
+        self.barge_in_recognizer.dynamic_energy_threshold = False
+        self.barge_in_energy_ratio = 2.0  # Times the playback level picked up by the mic
+        self.barge_in_min_words = 2
+        self.barge_in_max_echo = 0.5  # Share of heard words found in Raven's reply above which it is echo
         
-        self.mic_available = True
+        self.mic_available = not headless
         
         # Bengali TTS with edge-tts
         self.tts_voice = "bn-BD-NabanitaNeural"  # Bengali female voice
-        pygame.mixer.init()
+        if not headless:
+            pygame.mixer.init()
         self.temp_audio_path = os.path.join(tempfile.gettempdir(), "raven_speech.mp3")
         
+        # Cache for repeatable, history-independent replies ("who are you", greetings, ...)
+        self.response_cache_enabled = True
+        self.response_cache = ResponseCache(
+            os.path.join(self.memory_path, "response_cache.db"),
+            max_entries=256,
+            ttl_seconds=7 * 24 * 3600
+        )
+        self.last_request_ok = False  # Whether the last Ollama call produced a real reply
+        
+        # Rolling summary of turns that fell out of the prompt window
+        self.conversation_summary = ""
+        self.summary_backlog: List[Dict[str, Any]] = []  # Unsummarized turns trimmed by load_memory
+        self._summarized_through = 0  # Journal seq of the newest summarized message
+        self.summary_idle_seconds = 20  # Only summarize after this much user silence
+        self.last_activity_time = time.time()
+        self.summarizer = ConversationSummarizer(self._generate_summary, self.USER_NAME)
+        self.summarize_in_background = not headless  # summarize_if_idle can still be called directly
+        self._summary_lock = threading.Lock()
+        
         # Load memory on startup
         self.load_memory()
         
-        # Initialize commands handler
-        self.commands = CommandsHandler()
+        # Initialize commands handler and the keyword intent router (compiled once)
+        self.commands = CommandsHandler(dry_run=headless)
+        self.intent_router = IntentRouter()
+        # Fallback for messages the router finds no command in (raven_data/intent_model.npz)
+        self.intent_classifier = IntentClassifier(threshold=0.75)
+        # Intents a classifier guess runs straight away: read-only ones whose mistake costs nothing.
+        # Any other guess (open an app, message someone, search, type, ...) is asked about first
+        # and only runs if the next message confirms it.
+        self.classifier_intents = ("time", "date")
+        self.confirm_words = {"yes", "y", "yeah", "yep", "sure", "ok", "okay", "do it", "go ahead",
+                              "yes please", "ha", "haa", "hya", "ji", "thik ache", "koro"}
+        self.pending_command: Optional[Tuple[str, Message, IntentMatch]] = None  # Waiting for a yes
         
         print("[Terminal] 🦅 Raven ELITE Core initialized - Emotionally intelligent and ready!")
         
-    def detect_mood(self, text: str) -> str:
-        """ELITE: Detect user's mood from their message"""
-        text_lower = text.lower()
+        # Load models while the user is still reading the greeting
+        if self.warmup_on_start:
+            self.start_model_warmup()
         
-        # Stressed/Angry keywords
-        stressed_keywords = ['stressed', 'angry', 'frustrated', 'রাগ', 'irritated', 'annoyed', 'problem', 'issue']
-        if any(keyword in text_lower for keyword in stressed_keywords):
-            return "stressed"
+        # Summarize old turns in the background while the user is idle
+        if self.summarize_in_background:
+            threading.Thread(target=self._summary_worker, daemon=True).start()
         
-        # Sad keywords
-        sad_keywords = ['sad', 'upset', 'মন খারাপ', 'down', 'depressed', 'unhappy', 'lonely']
-        if any(keyword in text_lower for keyword in sad_keywords):
-            return "sad"
-        
-        # Tired keywords
-        tired_keywords = ['tired', 'thaka', 'ক্লান্ত', 'exhausted', 'sleepy', 'fatigue']
-        if any(keyword in text_lower for keyword in tired_keywords):
-            return "tired"
-        
-        # Happy keywords
-        happy_keywords = ['happy', 'great', 'excellent', 'খুশি', 'awesome', 'wonderful', 'amazing', 'love']
-        if any(keyword in text_lower for keyword in happy_keywords):
-            return "happy"
-        
-        return "neutral"
+        # Embed new turns, and stored turns the vector index hasn't seen yet while the user is idle
+        if self.recall_enabled:
+            newest = self.store.recent_turns(limit=1)
+            threading.Thread(target=self._index_backlog, args=(newest[0]["id"] if newest else 0,),
+                             daemon=True).start()
+    
+    @staticmethod
+    def create_ollama_client(hosts: List[str]) -> Union[OllamaClient, BackendPool]:
+        """Pooled Ollama client for hosts (a BackendPool when there is more than one)"""
+        client_options = dict(
+            connect_timeout=3.05,   # Fail fast when Ollama is not running
+            read_timeout=120,       # Generations can take a while
+            max_concurrency=2,      # Max requests in flight at once (per host)
+            max_retries=2           # Jittered retries for failed connects / busy server
+        )
+        if len(hosts) > 1:
+            return BackendPool(hosts, **client_options)
+        return OllamaClient(hosts[0], **client_options)
+    
+    @property
+    def fast_text_model(self) -> str:
+        """Small, fast model for short chit-chat turns (same as text_model = routing off)"""
+        return self.model_router.fast_model
+    
+    @fast_text_model.setter
+    def fast_text_model(self, model: Optional[str]) -> None:
+        self.model_router.fast_model = model or self.text_model
+        self.model_status.setdefault(self.model_router.fast_model, {"state": "cold", "load_seconds": None})
+    
+    def start_model_warmup(self) -> None:
+        """Warm up the text and vision models in background threads"""
+        for model in dict.fromkeys((self.text_model, self.fast_text_model, self.vision_model)):
+            threading.Thread(target=self._warm_up_model, args=(model,), daemon=True).start()
+    
+    def _warm_up_model(self, model: str) -> None:
+        """Load one model into Ollama and report when it is hot"""
+        status = self.model_status.setdefault(model, {"state": "cold", "load_seconds": None})
+        if status["state"] != "cold":
+            return
+        status["state"] = "loading"
+        started = time.perf_counter()
+        try:
+            self.ollama.warm_up(model, self.keep_alive)
+            status["load_seconds"] = time.perf_counter() - started
+            status["state"] = "hot"
+            print(f"[Terminal] 🔥 Model {model} is hot (loaded in {status['load_seconds']:.2f}s)")
+        except Exception as e:
+            status["state"] = "cold"
+            print(f"[Terminal] Warm-up failed for {model}: {e}")
+    
+    def _mark_model_hot(self, model: str) -> None:
+        """Record that a model answered, so it is resident in Ollama"""
+        self.model_status.setdefault(model, {"state": "cold", "load_seconds": None})["state"] = "hot"
+
+    def detect_mood(self, text: Union[str, Message]) -> str:
+        """ELITE: Detect user's mood from their message (weighted lexicon, see MoodEngine)"""
+        return self.mood_engine.detect(text)
+    
+    def mood_timeline(self, start: Any, end: Optional[Any] = None) -> Dict[str, Dict[str, int]]:
+        """Mood counts per day of the user's stored messages in a time range"""
+        turns = [turn for turn in self.store.turns_between(self._to_timestamp(start), self._to_timestamp(end),
+                                                           limit=10_000_000)
+                 if turn["sender"] in USER_SENDERS]
+        timeline: Dict[str, Dict[str, int]] = {}
+        for turn, mood in zip(turns, self.mood_engine.detect_batch([turn["message"] for turn in turns])):
+            day = datetime.fromtimestamp(turn["created"]).strftime("%Y-%m-%d")
+            counts = timeline.setdefault(day, {})
+            counts[mood] = counts.get(mood, 0) + 1
+        return timeline
     
     def update_mood_history(self, mood: str, message: str):
         """ELITE: Track mood history for contextual awareness"""
@@ -120,9 +360,10 @@ class RavenCore:
             "timestamp": datetime.now().isoformat()
         })
         
-        # Keep only last 5 moods
+        # Keep only last 5 moods (all of them go to the history store)
         if len(self.mood_history) > 5:
             self.mood_history.pop(0)
+        self.log_writer.call(self.store.add_mood, mood, message, after_write=False)
         
         print(f"[Terminal] 💭 Mood detected: {mood}")
     
@@ -194,219 +435,697 @@ class RavenCore:
     
     def load_memory(self) -> None:
         """Load last 20 messages, language mode, and mood history from memory"""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    all_history = data.get("chat_history", [])
-                    # Load last 20 messages
-                    self.chat_history = all_history[-20:] if len(all_history) > 20 else all_history
-                    # Load language mode
-                    self.language_mode = data.get("language_mode", "banglish")
-                    # Load mood history
-                    self.mood_history = data.get("mood_history", [])
-                    if self.mood_history:
-                        self.current_mood = self.mood_history[-1].get("mood", "neutral")
-                print(f"[Terminal] Memory loaded: {len(self.chat_history)} messages, Language: {self.language_mode}, Last mood: {self.current_mood}")
-            except Exception as e:
-                print(f"[Terminal] Memory load error: {e}")
-        else:
-            print("[Terminal] No previous memory, starting fresh")
+        try:
+            if not self.journal.exists and os.path.exists(self.memory_file):
+                self.journal.migrate(self.memory_file)
+                self.log_writer.flush()
+            if not self.journal.exists:
+                print("[Terminal] No previous memory, starting fresh")
+                return
+            
+            data = self.journal.load()
+            all_history = data.get("messages", [])
+            if all_history and not self.store.count_turns():
+                # First run with the store: keep the turns memory still has (timestamped now)
+                self.store.add_turns(all_history)
+            window = self.history_load_window
+            # Load last 20 messages
+            self.chat_history = all_history[-window:]
+            # Older turns not yet in the summary still get summarized later
+            self.summary_backlog = [msg for msg in all_history[:-window] if not msg.get("summarized")]
+            self.conversation_summary = data.get("conversation_summary", "")
+            self._summarized_through = data.get("summarized_through", 0)
+            # Load language mode
+            self.language_mode = data.get("language_mode", "banglish")
+            # Load mood history
+            self.mood_history = data.get("mood_history", [])
+            if self.mood_history:
+                self.current_mood = self.mood_history[-1].get("mood", "neutral")
+            print(f"[Terminal] Memory loaded: {len(self.chat_history)} messages, Language: {self.language_mode}, Last mood: {self.current_mood}")
+        except Exception as e:
+            print(f"[Terminal] Memory load error: {e}")
+    
+    def _memory_state(self) -> Dict[str, Any]:
+        """Memory fields journaled alongside the messages"""
+        summarized = [msg.get("seq", 0) for msg in self.summary_backlog + self.chat_history if msg.get("summarized")]
+        return {
+            "language_mode": self.language_mode,
+            "mood_history": self.mood_history,
+            "conversation_summary": self.conversation_summary,
+            # Summaries fold the oldest turns first, so this marks everything at or below it
+            "summarized_through": max(summarized + [self._summarized_through]),
+        }
+    
+    def _live_memory(self) -> tuple:
+        """Copies of the live messages and state, safe to hand to the writer thread"""
+        state = copy.deepcopy(self._memory_state())
+        return [dict(msg) for msg in self.summary_backlog + self.chat_history], state
+    
+    def _checkpoint_memory(self, messages: List[Dict[str, Any]], state: Dict[str, Any]) -> None:
+        """Compact the journal if it has grown too big, else snapshot it (runs on the writer thread)"""
+        self._checkpoint_queued = False
+        if self.journal.should_compact:
+            self.journal.compact(messages, state)
+        elif self.journal.should_snapshot:
+            self.journal.snapshot(messages, state)
+    
+    def _journal_state(self) -> None:
+        """Append the memory state to the journal if it changed, queue a snapshot/compaction"""
+        try:
+            state = self._memory_state()
+            self._summarized_through = state["summarized_through"]
+            self.journal.append_state(state)
+            if self.journal.should_snapshot and not self._checkpoint_queued:
+                self._checkpoint_queued = True
+                self.log_writer.call(self._checkpoint_memory, *self._live_memory())
+        except Exception as e:
+            print(f"[Terminal] Memory journal error: {e}")
     
     def save_memory(self) -> None:
-        """Save conversation history, language mode, and mood history to JSON file"""
+        """Compact the memory journal and write a fresh snapshot (used at shutdown)"""
         try:
-            data = {
-                "chat_history": self.chat_history,
-                "language_mode": self.language_mode,
-                "mood_history": self.mood_history,
-                "last_updated": datetime.now().isoformat()
-            }
-            with open(self.memory_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            messages, state = self._live_memory()
+            self.log_writer.call(self.journal.compact, messages, state)
+            self.log_writer.flush()
+            self.journal.close()
             print(f"[Terminal] Memory saved: {len(self.chat_history)} messages, Mood: {self.current_mood}")
         except Exception as e:
             print(f"[Terminal] Memory save error: {e}")
     
+    def shutdown(self) -> None:
+        """Stop generating, save memory and drain pending disk writes before exit"""
+        self.cancel_generation()
+        self.save_memory()
+        self.chat_log.close()
+        self.log_writer.close()
+        print(f"[Terminal] Chat log writer stats: {self.log_writer.stats()}")
+        self._recall_executor.shutdown(wait=False)
+        self.store.close()
+        self.response_cache.close()
+        # Health monitor threads and pooled connections
+        if self._owns_ollama:
+            self.ollama.close()
+    
+    def reset_conversation(self, language_mode: str = "banglish") -> None:
+        """Start a fresh conversation in memory (history, summary, mood); files on disk are untouched"""
+        with self._summary_lock:
+            self.chat_history = []
+            self.summary_backlog = []
+            self.conversation_summary = ""
+        self.mood_history = []
+        self.current_mood = "neutral"
+        self.language_mode = language_mode
+        self.pending_command = None
+        self.invalidate_context("conversation reset")
+    
+    @staticmethod
+    def _to_timestamp(value: Optional[Any]) -> Optional[float]:
+        """Accept a datetime or a Unix timestamp"""
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return value
+    
+    def search_history(self, query: str, limit: int = 10,
+                       since: Optional[Any] = None, until: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Past turns matching all keywords in query, optionally within a time range"""
+        return self.store.search(query, limit, self._to_timestamp(since), self._to_timestamp(until))
+    
+    def history_between(self, start: Any, end: Optional[Any] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """Past turns in a time range (datetimes or Unix timestamps), oldest first"""
+        return self.store.turns_between(self._to_timestamp(start), self._to_timestamp(end), limit)
+    
+    def read_chat_log(self, day: Any) -> List[Dict[str, Any]]:
+        """Messages from the text chat logs of one day (date, datetime or "YYYY-MM-DD")"""
+        self.log_writer.flush(timeout=2.0)
+        return self.chat_log.read_day(day)
+    
+    def describe_last_screenshot(self, description: str) -> None:
+        """Store Raven's description with the last saved screenshot"""
+        if self.last_screenshot_id is None:
+            return
+        try:
+            self.store.describe_screenshot(self.last_screenshot_id, description)
+        except Exception as e:
+            print(f"[Terminal] History store write error: {e}")
+    
     def log_chat(self, sender: str, message: str) -> None:
         """Log chat message to file and history"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        now = datetime.now()
+        timestamp = now.strftime("%H:%M:%S")
         formatted_msg = f"[{timestamp}] {sender}: {message}\n"
         
-        # Save to chat log file
-        try:
-            with open(self.chat_log_file, "a", encoding="utf-8") as f:
-                f.write(formatted_msg)
-        except Exception as e:
-            print(f"[Terminal] Chat log write error: {e}")
+        # Save to chat log file (queued - the writer thread does the disk I/O)
+        self.chat_log.write(formatted_msg, now)
         
-        # Add to history
-        self.chat_history.append({
+        # Add to history and the journal (one appended line, safe if Raven crashes later)
+        msg = {
             "timestamp": timestamp,
             "sender": sender,
             "message": message
+        }
+        self.chat_history.append(msg)
+        try:
+            self.journal.append_message(msg)
+        except Exception as e:
+            print(f"[Terminal] Memory journal write error: {e}")
+        self.log_writer.call(self._store_turn, sender, message, msg.get("seq"), after_write=False)
+        
+        # Keep RAM bounded: the oldest messages live on disk, unsummarized ones wait in the backlog
+        overflow = len(self.chat_history) - self.max_history_in_memory
+        if overflow > 0:
+            evicted, self.chat_history = self.chat_history[:overflow], self.chat_history[overflow:]
+            self.summary_backlog.extend(msg for msg in evicted if not msg.get("summarized"))
+        
+        self._journal_state()
+    
+    def _store_turn(self, sender: str, message: str, seq: Optional[int]) -> None:
+        """Add a turn to the history store and queue it for embedding (runs on the writer thread)"""
+        try:
+            turn_id = self.store.add_turn(sender, message, seq=seq)
+            if self.recall_enabled:
+                self.vector_memory.add(turn_id, message)
+        except Exception as e:
+            print(f"[Terminal] History store write error: {e}")
+    
+    def _generation_options(self, profile: str = "chat") -> Dict[str, Any]:
+        """Ollama options for a generation profile (unknown names fall back to chat)"""
+        settings = self.generation_profiles.get(profile) or self.generation_profiles["chat"]
+        return copy.deepcopy(settings.get("options", {}))
+    
+    def _history_budget(self, user_input: str, profile: str = "chat") -> int:
+        """Tokens available for history once persona, new turn and reply are accounted for"""
+        if self.history_token_budget is not None:
+            return self.history_token_budget
+        options = self._generation_options(profile)
+        num_predict = options.get("num_predict", -1)
+        reply_reserve = num_predict if num_predict and num_predict > 0 else self.response_token_reserve
+        fixed = (estimate_tokens(self.prompt_builder.persona(self.language_mode))
+                 + estimate_tokens(self.conversation_summary)
+                 + estimate_tokens(user_input)
+                 + 128  # Time, date and mood context
+                 + reply_reserve)
+        return max(0, options.get("num_ctx", 2048) - fixed)
+    
+    def _select_history(self, user_input: str, profile: str = "chat") -> List[Dict[str, Any]]:
+        """Most recent history that fits the token budget"""
+        return select_history(self.chat_history, self._history_budget(user_input, profile))
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return self.ollama.embed(self.embedding_model, texts)
+    
+    def _index_backlog(self, last_stored_id: int) -> None:
+        """Check the embedding model, then embed stored turns up to last_stored_id during idle time
+        
+        A missing embedding model turns recall off (no turn waits on it any more);
+        an unreachable server does not, the embedder retries it with backoff.
+        """
+        try:
+            self._embed_texts(["ping"])
+        except OllamaError as e:
+            if e.status_code is not None and 400 <= e.status_code < 500:
+                self.recall_enabled = False
+                print(f"[Terminal] Embedding model {self.embedding_model} not available "
+                      f"(status {e.status_code}) - related-message recall is off")
+                return
+        except Exception as e:
+            print(f"[Terminal] Embedding check failed, will retry with the first turn: {e}")
+        self.vector_memory.start()
+        
+        after = self.vector_memory.index.max_id
+        while self.recall_enabled and after < last_stored_id:
+            idle = time.time() - self.last_activity_time >= self.embed_backlog_idle_seconds
+            if not idle or self.vector_memory.pending or not self.vector_memory.available:
+                time.sleep(1.0)
+                continue
+            turns = [turn for turn in self.store.turns_after(after, limit=self.vector_memory.batch_size)
+                     if turn["id"] <= last_stored_id]
+            if not turns:
+                break
+            for turn in turns:
+                self.vector_memory.add(turn["id"], turn["message"])
+            after = turns[-1]["id"]
+    
+    def _start_recall(self, user_input: str) -> Optional[Future]:
+        """Search the vector memory in the background; _recall collects the result"""
+        if not self.recall_enabled:
+            return None
+        # Ask for extra hits: some are usually already in the history window
+        return self._recall_executor.submit(self.vector_memory.search, user_input,
+                                            k=min(self.recall_k + len(self.chat_history) + 1, 32),
+                                            min_score=self.recall_min_score)
+    
+    def _recall(self, user_input: str, history: List[Dict[str, Any]],
+                pending: Optional[Future] = None) -> List[Dict[str, Any]]:
+        """Past messages most relevant to user_input that are not already in the prompt"""
+        started = time.perf_counter()
+        pending = pending or self._start_recall(user_input)
+        if pending is None:
+            return []
+        try:
+            hits = pending.result(timeout=self.recall_timeout)
+        except FutureTimeout:
+            # The embedding still lands in the recent-embedding cache for later turns
+            print(f"[Terminal] Recall skipped: no embedding within {self.recall_timeout * 1000:.0f} ms")
+            return []
+        if not hits:
+            return []
+        shown = {msg.get("message") for msg in history} | {user_input}
+        recalled = [turn for turn in self.store.get_turns([turn_id for turn_id, _ in hits])
+                    if turn["message"] not in shown]
+        # Best matches, presented in chronological order
+        rank = {turn_id: position for position, (turn_id, _) in enumerate(hits)}
+        recalled = sorted(sorted(recalled, key=lambda turn: rank[turn["id"]])[:self.recall_k],
+                          key=lambda turn: turn["id"])
+        if recalled:
+            print(f"[Terminal] Recalled {len(recalled)} related messages ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return [{"sender": turn["sender"], "message": turn["message"][:self.recall_max_chars]}
+                for turn in recalled]
+    
+    def _build_prompt(self, user_input: str, profile: str = "chat",
+                      history: Optional[List[Dict[str, Any]]] = None,
+                      recalled: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Build the mood-aware /api/generate prompt for the current language mode"""
+        return self.prompt_builder.build_prompt(
+            self.language_mode,
+            history if history is not None else self._select_history(user_input, profile),
+            user_input,
+            mood_guidance=self.get_mood_adaptive_response_prefix(),
+            mood_context=self.get_mood_context(),
+            summary=self.conversation_summary,
+            recalled=recalled
+        )
+    
+    def _choose_model(self, user_input: str, image_data: Optional[str] = None) -> str:
+        """Vision model for images, otherwise whatever the model router picks"""
+        if image_data:
+            return self.vision_model
+        model, reason = self.model_router.choose(user_input)
+        if self.model_router.enabled:
+            print(f"[Terminal] Routing to {model} ({reason})")
+        return model
+    
+    def _build_payload(self, user_input: str, image_data: Optional[str] = None, stream: bool = False,
+                       model: Optional[str] = None, profile: str = "chat") -> Dict[str, Any]:
+        """Build the /api/generate or /api/chat payload for a user turn"""
+        payload = {
+            "model": model or self._choose_model(user_input, image_data),
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self._generation_options(profile)
+        }
+        recall = None if image_data else self._start_recall(user_input)
+        # Continuing a session sends only the new turn, so it needs no history selection
+        session = None if image_data or self.use_chat_api else self._usable_session_context(payload["model"])
+        history = None if session else self._select_history(user_input, profile)
+        # The session context holds the recent history, so recalled turns are checked against it
+        recalled = None if image_data else self._recall(user_input, history if history is not None else self.chat_history,
+                                                        recall)
+        
+        if self.use_chat_api:
+            payload["messages"] = self.prompt_builder.build_messages(
+                self.language_mode,
+                history,
+                user_input,
+                mood_guidance=self.get_mood_adaptive_response_prefix(),
+                mood_context=self.get_mood_context(),
+                image_data=image_data,
+                summary=self.conversation_summary,
+                recalled=recalled
+            )
+            return payload
+        
+        if image_data:
+            payload["prompt"] = self._build_prompt(user_input, profile, history)
+            payload["images"] = [image_data]
+            return payload
+        
+        if session:
+            # Only the new turn - the persona and history are already in the context
+            payload["prompt"] = self.prompt_builder.build_turn(
+                self.language_mode,
+                user_input,
+                mood_guidance=self.get_mood_adaptive_response_prefix(),
+                mood_context=self.get_mood_context(),
+                recalled=recalled
+            )
+            payload["context"] = session["tokens"]
+        else:
+            payload["prompt"] = self._build_prompt(user_input, profile, history, recalled)
+        
+        return payload
+    
+    def _usable_session_context(self, model: str) -> Optional[Dict[str, Any]]:
+        """Return the stored session context if it can be continued this turn"""
+        session = self._session_context
+        if not self.reuse_context or self.use_chat_api or not session:
+            return None
+        if session["model"] != model or session["language_mode"] != self.language_mode:
+            self.invalidate_context("language mode or model changed")
+            return None
+        if len(session["tokens"]) > self.max_context_tokens:
+            self.invalidate_context(f"context grew past {self.max_context_tokens} tokens")
+            return None
+        return session
+    
+    def invalidate_context(self, reason: str = "") -> None:
+        """Drop the stored session context; the next turn rebuilds the prompt from text"""
+        if self._session_context:
+            print(f"[Terminal] Session context reset{': ' + reason if reason else ''}")
+        self._session_context = None
+    
+    def _record_generation(self, payload: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Keep the returned context for the next turn and log prompt_eval_count"""
+        mode = "context" if "context" in payload else "rebuild"
+        prompt_eval_count = result.get("prompt_eval_count")
+        if prompt_eval_count is not None:
+            self.prompt_eval_stats[mode].append(prompt_eval_count)
+            print(f"[Terminal] prompt_eval_count={prompt_eval_count} ({mode})")
+        
+        if not self.reuse_context or "images" in payload or "messages" in payload:
+            return
+        if result.get("context"):
+            self._session_context = {
+                "tokens": result["context"],
+                "model": payload["model"],
+                "language_mode": self.language_mode
+            }
+        else:
+            self.invalidate_context("no context returned")
+    
+    def get_prompt_eval_summary(self) -> Dict[str, Optional[float]]:
+        """Average prompt_eval_count for rebuilt vs. context-continued turns"""
+        return {
+            mode: (sum(counts) / len(counts) if counts else None)
+            for mode, counts in self.prompt_eval_stats.items()
+        }
+    
+    def _generate_summary(self, prompt: str) -> str:
+        """Run a summarization prompt on the text model (no streaming)"""
+        result = self.ollama.generate({
+            "model": self.text_model,
+            "prompt": prompt,
+            "keep_alive": self.keep_alive,
+            "options": self._generation_options("summarize")
         })
+        return result.get("response", "")
     
-    def chat_with_ollama(self, user_input: str, image_data: Optional[str] = None) -> str:
-        """Send message to Ollama and get mood-aware response"""
+    def summarize_if_idle(self) -> bool:
+        """Fold turns evicted from the prompt window into the running summary
+        
+        Does nothing unless the user has been idle for summary_idle_seconds.
+        Returns True if the summary was updated.
+        """
+        if time.time() - self.last_activity_time < self.summary_idle_seconds:
+            return False
+        if not self._summary_lock.acquire(blocking=False):
+            return False
         try:
-            url = f"{self.ollama_base_url}/api/generate"
-            
-            # Build context from recent history
-            context = "\n".join([f"{msg['sender']}: {msg['message']}" 
-                               for msg in self.chat_history[-10:]])
-            
-            # Add time context
-            current_time = datetime.now().strftime("%I:%M %p")
-            current_date = datetime.now().strftime("%A, %B %d, %Y")
-            
-            # ELITE: Get mood context and adaptive response guidance
-            mood_context = self.get_mood_context()
-            mood_guidance = self.get_mood_adaptive_response_prefix()
+            window = self._select_history("")
+            window_start = len(self.chat_history) - len(window)
+            pending = self.summary_backlog + self.summarizer.pending(self.chat_history, window_start)
+            new_summary = self.summarizer.summarize(self.conversation_summary, pending)
+            if new_summary is None:
+                return False
+            self.conversation_summary = new_summary
+            summarized = [msg.get("seq", 0) for msg in pending if msg.get("summarized")]
+            self._summarized_through = max(summarized + [self._summarized_through])
+            self.summary_backlog = [msg for msg in self.summary_backlog if not msg.get("summarized")]
+            self._journal_state()
+            print(f"[Terminal] Conversation summary updated ({estimate_tokens(new_summary)} tokens)")
+            return True
+        except Exception as e:
+            print(f"[Terminal] Summarization error: {e}")
+            return False
+        finally:
+            self._summary_lock.release()
+    
+    def _summary_worker(self) -> None:
+        """Background loop that summarizes during idle time"""
+        while True:
+            time.sleep(5)
+            self.summarize_if_idle()
+    
+    def chat_with_ollama(self, user_input: str, image_data: Optional[str] = None,
+                         on_token: Optional[Callable[[str], None]] = None,
+                         use_cache: bool = False, profile: Optional[str] = None) -> str:
+        """Send message to Ollama and get mood-aware response
+        
+        If on_token is given the reply is streamed and on_token is called with
+        every chunk as soon as Ollama emits it. The full reply is returned either way.
+        use_cache looks the reply up in the response cache first; only pass it
+        for turns that don't depend on the conversation history.
+        profile names the generation profile; the default is "vision_context"
+        when an image is attached and "chat" otherwise.
+        """
+        self.last_activity_time = time.time()
+        
+        model = self._choose_model(user_input, image_data)
+        self.last_model = model
+        self.last_response_cached = False
+        cache_key = None
+        if use_cache and self.response_cache_enabled and not image_data:
+            cache_key = self.response_cache.make_key(user_input, self.language_mode, self.current_mood, model)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print("[Terminal] Response cache hit")
+                self.last_response_cached = True
+                # The replayed exchange is not in Ollama's context; rebuild from text next turn
+                self.invalidate_context("cached reply")
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+        
+        profile = profile or ("vision_context" if image_data else "chat")
+        response = self._chat_with_ollama(user_input, image_data, on_token, model, profile)
+        if cache_key and self.last_request_ok:
+            self.response_cache.put(cache_key, response)
+        return response
+    
+    def _chat_with_ollama(self, user_input: str, image_data: Optional[str] = None,
+                          on_token: Optional[Callable[[str], None]] = None,
+                          model: Optional[str] = None, profile: str = "chat") -> str:
+        """Uncached chat_with_ollama; always streams so the turn can be cancelled"""
+        chunks = []
+        for token in self.stream_with_ollama(user_input, image_data, model, profile):
+            chunks.append(token)
+            if on_token is not None:
+                on_token(token)
+        return "".join(chunks)
+    
+    def stream_with_ollama(self, user_input: str, image_data: Optional[str] = None,
+                           model: Optional[str] = None, profile: str = "chat") -> Iterator[str]:
+        """Stream a mood-aware response from Ollama, yielding tokens as they arrive
+        
+        Errors are yielded as a single user-facing message, same as chat_with_ollama.
+        cancel_generation() stops the stream (and Ollama's work) mid-reply.
+        The stream is also cut once the profile's max_seconds have passed.
+        """
+        started = time.perf_counter()
+        got_token = False
+        self.last_request_ok = False
+        self.last_generation_cancelled = False
+        cancel = CancelToken()
+        self._active_cancel = cancel
+        deadline = None
+        timed_out = threading.Event()
+        max_seconds = (self.generation_profiles.get(profile) or {}).get("max_seconds")
+        if max_seconds:
+            def cut_stream():
+                timed_out.set()
+                cancel.cancel()
+            deadline = threading.Timer(max_seconds, cut_stream)
+            deadline.daemon = True
+            deadline.start()
+        try:
+            payload = self._build_payload(user_input, image_data, stream=True, model=model, profile=profile)
+            model = payload["model"]
+            # Cold vs. warm: was the model already resident when this turn started?
+            warmth = "warm" if self.model_status.get(model, {}).get("state") == "hot" else "cold"
             
-            # Dynamic prompt based on language mode and mood
-            if self.language_mode == "english":
-                prompt = f"""You are Raven, a witty and caring AI assistant who speaks in English.
-
-Personality traits:
-- 70% witty and playful, 30% caring and supportive
-- Speak ONLY in English - clear, natural, and professional
-- Address the user as "{self.USER_NAME}"
-- Be conversational and warm, like a professional assistant
-- When you don't understand something, say "Sorry {self.USER_NAME}, I didn't understand that"
-
-{mood_guidance}
-
-Current time: {current_time}
-Current date: {current_date}
-{mood_context}
-
-Recent conversation:
-{context}
-
-User: {user_input}
-
-Raven (respond in English ONLY, address user as {self.USER_NAME}, adapt to their mood):"""
+            if self.use_chat_api:
+                chunks = self.ollama.stream_chat(payload, cancel)
             else:
-                # Banglish mode with mood awareness
-                prompt = f"""You are Raven, a witty and caring AI assistant who speaks in Banglish (Bengali + English mix).
-
-Personality traits:
-- 70% witty and playful, 30% caring and supportive
-- Mix Bengali and English naturally (e.g., "আমি একটু ভাবছি..." or "Wait koro, I'm checking")
-- Use STANDARD BENGALI only - NO Hindi words, NO broken grammar
-- Address the user as "{self.USER_NAME}" (not "bondhu" or any other term)
-- Use common Bengali phrases like "আচ্ছা", "ঠিক আছে", "কেমন আছো", etc.
-- Be conversational and warm, like a professional assistant
-- When you don't understand something, say "Sorry {self.USER_NAME}, বুঝতে পারিনি"
-
-{mood_guidance}
-
-Current time: {current_time}
-Current date: {current_date}
-{mood_context}
-
-Recent conversation:
-{context}
-
-User: {user_input}
-
-Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengali and English, address user as {self.USER_NAME}, ADAPT TO THEIR MOOD):"""
-            
-            payload = {
-                "model": self.vision_model if image_data else self.text_model,
-                "prompt": prompt,
-                "stream": False
-            }
-            
-            if image_data:
-                payload["images"] = [image_data]
+                chunks = self.ollama.stream_generate(payload, cancel)
+            for chunk in chunks:
+                token = OllamaClient.chunk_text(chunk)
+                if token:
+                    if not got_token:
+                        got_token = True
+                        self.last_first_token_latency = time.perf_counter() - started
+                        self._mark_model_hot(model)
+                        self.model_router.record(model, self.last_first_token_latency)
+                        print(f"[Terminal] First token after {self.last_first_token_latency:.2f}s ({model}, {warmth})")
+                    yield token
+                if chunk.get("done"):
+                    self._record_generation(payload, chunk)
+                    self.last_request_ok = got_token
             
-            response = requests.post(url, json=payload, timeout=120)
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("response", f"Ami ektu confused, sorry {self.USER_NAME}!")
-            else:
-                print(f"[Terminal] Ollama error: Status {response.status_code}")
-                return "Ami ektu technical problem face korchi. Thik kore nebo!"
+            if timed_out.is_set():
+                print(f"[Terminal] Reply cut after {max_seconds}s ({profile} profile limit)")
+                if not got_token:
+                    yield f"Ektu beshi shomoy lagche, {self.USER_NAME}. Abar try korbo?"
+            elif cancel.cancelled:
+                self.last_generation_cancelled = True
+                # The cut-off exchange is not in the last returned context either
+                self.invalidate_context("reply cancelled")
+                print("[Terminal] Generation cancelled")
+            elif not got_token:
+                yield f"Ami ektu confused, sorry {self.USER_NAME}!"
                 
+        except OllamaUnavailable as e:
+            print(f"[Terminal] {e}")
+            if not got_token:
+                yield f"Ollama ekhon reachable na, {self.USER_NAME}. Ami check korte thakbo - ektu pore try koro (ollama serve cholche to?)"
+        except OllamaError as e:
+            print(f"[Terminal] Ollama error: Status {e.status_code} ({e})")
+            if not got_token:
+                yield "Ami ektu technical problem face korchi. Thik kore nebo!"
         except requests.exceptions.ConnectionError:
             print("[Terminal] Cannot connect to Ollama server")
-            return "Error: Ollama er sathe connection nei. Please check if Ollama is running (ollama serve)"
+            if not got_token:
+                yield "Error: Ollama er sathe connection nei. Please check if Ollama is running (ollama serve)"
         except Exception as e:
             print(f"[Terminal] Ollama communication error: {e}")
-            return f"Ami ektu error face korchi, {self.USER_NAME}. Try again koro?"
+            if not got_token:
+                yield f"Ami ektu error face korchi, {self.USER_NAME}. Try again koro?"
+        finally:
+            if deadline:
+                deadline.cancel()
+            if self._active_cancel is cancel:
+                self._active_cancel = None
     
-    def process_message(self, user_input: str) -> tuple[str, str]:
-        """Process user message and return (response, new_state)"""
+    def cancel_generation(self) -> bool:
+        """Barge-in: stop the in-flight generation and any speech playback
+        
+        Returns True if a generation was actually cancelled.
+        """
+        cancelled = False
+        cancel = self._active_cancel
+        if cancel and not cancel.cancelled:
+            cancel.cancel()
+            cancelled = True
+            print("[Terminal] Cancelling in-flight generation")
+        self.stop_speaking()
+        return cancelled
+    
+    def process_message(self, user_input: str,
+                        on_token: Optional[Callable[[str], None]] = None,
+                        use_cache: Optional[bool] = None) -> tuple[str, str]:
+        """Process user message and return (response, new_state)
+        
+        on_token is forwarded to chat_with_ollama so LLM replies can be streamed.
+        Instant command replies are returned without calling it.
+        use_cache=None caches only the response cache's allowlisted repeatable
+        questions (greetings, "who are you", ...); pass False to always ask the model.
+        """
+        self.last_activity_time = time.time()
+        self.last_intent = "chat"
+        self.last_model = None
+        self.last_response_cached = False
+        
+        # Analyse the message once; every detector below reads this view
+        message = Message(user_input)
         
         # ELITE: Detect mood from user input
-        detected_mood = self.detect_mood(user_input)
+        detected_mood = self.detect_mood(message)
         if detected_mood != "neutral":
             self.update_mood_history(detected_mood, user_input)
         
-        # Check for language switching commands
-        user_lower = user_input.lower().strip()
-        
         # Switch to English mode
-        if user_lower == "english" or user_lower == "speak english" or user_lower == "switch to english":
+        if message.lower in ("english", "speak english", "switch to english"):
             self.language_mode = "english"
+            self.invalidate_context("language mode changed")
+            self.last_intent = "language_switch"
             return f"Switching to English mode, {self.USER_NAME}. I will speak only in English now until you speak Bengali again.", "happy"
         
-        # Detect Bengali language and switch to Banglish mode
-        bengali_indicators = ['আমি', 'তুমি', 'কি', 'কেমন', 'আছো', 'বলো', 'করো', 'হয়েছে', 'যাও', 'দাও']
-        has_bengali_script = any('\u0980' <= char <= '\u09FF' for char in user_input)
-        has_bengali_words = any(word in user_input for word in bengali_indicators)
-        
-        if (has_bengali_script or has_bengali_words) and self.language_mode == "english":
+        # Detect Bengali language (any Bengali script) and switch to Banglish mode
+        if message.has_bengali and self.language_mode == "english":
             self.language_mode = "banglish"
+            self.invalidate_context("language mode changed")
+            self.last_intent = "language_switch"
             return f"ঠিক আছে {self.USER_NAME}! Banglish mode e switch korchi. Now I'll mix Bengali and English naturally.", "happy"
         
+        # Banglish in Latin letters ("kemon acho") switches too, but the message is still handled
+        if self.language_mode == "english" and len(message.words) >= self.banglish_min_words:
+            banglish = self.language_id.score(message)["banglish"]
+            if banglish >= self.banglish_threshold:
+                self.language_mode = "banglish"
+                self.invalidate_context("language mode changed")
+                print(f"[Terminal] Banglish detected ({banglish:.2f}), switched to Banglish mode")
+        
+        # One pass over the message finds every command keyword (see raven_nlp.INTENT_TABLE)
+        route = self.intent_router.route(message)
+        
         # ELITE: Check for file path in message
-        file_result = self.commands.detect_and_open_file(user_input, self.language_mode)
+        file_result = self.commands.detect_and_open_file(message, self.language_mode,
+                                                         has_open_intent=route.has("open_verb"))
         if file_result:
+            self.last_intent = "open_file"
             return file_result, "happy"
         
+        # No command keyword: the local classifier catches other phrasings ("pull up chrome")
+        # before the message costs an LLM round trip. Read-only guesses run at once; anything
+        # with side effects is asked about and runs only if the next message says yes.
+        intent = route.intent
+        pending, self.pending_command = self.pending_command, None
+        if intent is None and pending and message.lower.strip(" .!") in self.confirm_words:
+            intent, message, route = pending
+            print(f"[Terminal] Confirmed guessed command: {intent}")
+        elif intent is None:
+            intent, confidence = self.intent_classifier.classify(message)
+            if intent in self.classifier_intents:
+                print(f"[Terminal] Intent classifier: {intent} ({confidence:.2f})")
+            elif intent:
+                print(f"[Terminal] Intent classifier guessed {intent} ({confidence:.2f}), asking first")
+                self.pending_command = (intent, message, route)
+                self.last_intent = "confirm"
+                return self._confirm_question(intent, route), "idle"
+        
         # Check for system time/date commands
-        if any(word in user_input.lower() for word in ["time", "what time", "clock", "somoy", "koyta baje"]):
+        if intent == "time":
+            self.last_intent = "time"
             return self.commands.get_time(self.language_mode), "happy"
         
-        if any(word in user_input.lower() for word in ["date", "what day", "today", "aj", "ajke", "tarikh"]):
+        if intent == "date":
+            self.last_intent = "date"
             return self.commands.get_date(self.language_mode), "happy"
         
-        # Enhanced WhatsApp command
-        if "whatsapp" in user_input.lower():
-            result = self.commands.execute_whatsapp_command(user_input, self.CONTACTS, self.language_mode)
-            return result, "happy"
-        
-        # Handle "send message" separately
-        if "message" in user_input.lower() and "send" in user_input.lower():
-            result = self.commands.execute_whatsapp_command(user_input, self.CONTACTS, self.language_mode)
+        # Enhanced WhatsApp command (also "send ... message")
+        if intent == "whatsapp":
+            self.last_intent = "whatsapp"
+            result = self.commands.execute_whatsapp_command(message, self.CONTACTS, self.language_mode)
             return result, "happy"
         
         # Enhanced search command
-        if "search" in user_input.lower() or "google" in user_input.lower() or "khoj" in user_input.lower() or "khuje" in user_input.lower():
-            result = self.commands.execute_search_command(user_input, self.language_mode)
+        if intent == "search":
+            self.last_intent = "search"
+            result = self.commands.execute_search_command(message, self.language_mode)
             return result, "happy"
         
         # Check for system commands
-        if "open" in user_input.lower() and any(app in user_input.lower() for app in ["chrome", "whatsapp", "code", "notepad"]):
-            result = self.commands.open_application(user_input, self.language_mode)
+        if intent == "open_app":
+            self.last_intent = "open_app"
+            result = self.commands.open_application(message, self.language_mode,
+                                                    app_name=self.intent_router.first_keyword(route, "app"))
             return result, "happy"
         
-        if "type this" in user_input.lower() or "type:" in user_input.lower():
-            result = self.commands.type_text(user_input, self.language_mode)
+        if intent == "type_text":
+            self.last_intent = "type_text"
+            result = self.commands.type_text(message, self.language_mode)
             return result, "happy"
         
-        if "minimize" in user_input.lower() and "everything" in user_input.lower():
+        if intent == "minimize":
+            self.last_intent = "minimize"
             result = self.commands.minimize_all(self.language_mode)
             return result, "happy"
         
-        if "screenshot" in user_input.lower():
+        if intent == "screenshot":
+            self.last_intent = "screenshot"
             image_data = self.take_screenshot()
             if image_data:
-                response = self.chat_with_ollama("Describe what you see in this screenshot in detail.", image_data)
+                response = self.chat_with_ollama("Describe what you see in this screenshot in detail.", image_data, on_token,
+                                                 profile="screenshot")
+                self.describe_last_screenshot(response)
                 return response, "talking"
             return f"Screenshot nite parini, {self.USER_NAME}." if self.language_mode == "banglish" else f"Couldn't take screenshot, {self.USER_NAME}.", "idle"
         
@@ -416,8 +1135,10 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
             print("[Terminal] Vision mode active - capturing screen for context")
             image_data = self.take_screenshot()
         
-        # Regular chat with Ollama (mood-aware)
-        response = self.chat_with_ollama(user_input, image_data)
+        # Regular chat with Ollama (mood-aware); allowlisted repeatable questions may come from the cache
+        if use_cache is None:
+            use_cache = image_data is None and self.response_cache.is_cacheable(user_input)
+        response = self.chat_with_ollama(user_input, image_data, on_token, use_cache=use_cache)
         
         # Determine response state based on mood and sentiment
         if self.current_mood == "stressed":
@@ -429,8 +1150,26 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
         
         return response, new_state
     
+    def _confirm_question(self, intent: str, route: IntentMatch) -> str:
+        """Ask before running a command the intent classifier only guessed"""
+        app = self.intent_router.first_keyword(route, "app")
+        action = {
+            "open_app": f"open {app}" if app else "open that app",
+            "whatsapp": "send a WhatsApp message",
+            "search": "search Google for that",
+            "type_text": "type that",
+            "minimize": "minimize all windows",
+            "screenshot": "take a screenshot",
+        }.get(intent, intent.replace("_", " "))
+        if self.language_mode == "english":
+            return f"Should I {action}, {self.USER_NAME}? Say yes to go ahead."
+        return f"{action} korbo, {self.USER_NAME}? Yes bolle kore dicchi."
+    
     def take_screenshot(self) -> Optional[str]:
         """Take screenshot and return as base64 string"""
+        if self.headless:
+            return None
+        
         try:
             screenshot = pyautogui.screenshot()
             
@@ -445,6 +1184,7 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
                 f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
             )
             screenshot.save(screenshot_path)
+            self.last_screenshot_id = self.store.add_screenshot(screenshot_path)
             
             # Delete old screenshots (keep only last 20)
             self._cleanup_old_screenshots()
@@ -471,6 +1211,11 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
     
     def speak(self, text: str) -> None:
         """Convert text to speech using edge-tts with Bengali voice"""
+        if self.headless:
+            return
+        self._speech_cancelled = False
+        self._speaking_text = text
+        self.is_speaking = True
         try:
             # Run async TTS in sync context
             loop = asyncio.new_event_loop()
@@ -479,6 +1224,18 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
             loop.close()
         except Exception as e:
             print(f"[Terminal] TTS error: {e}")
+        finally:
+            self.is_speaking = False
+    
+    def stop_speaking(self) -> None:
+        """Stop speech playback right away"""
+        self._speech_cancelled = True
+        try:
+            if self.is_speaking:
+                pygame.mixer.music.stop()
+                print("[Terminal] Speech interrupted")
+        except Exception as e:
+            print(f"[Terminal] TTS stop error: {e}")
     
     async def _async_speak(self, text: str) -> None:
         """Async method to generate and play speech"""
@@ -486,13 +1243,15 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
             # Generate speech using edge-tts
             communicate = edge_tts.Communicate(text, self.tts_voice)
             await communicate.save(self.temp_audio_path)
+            if self._speech_cancelled:
+                return
             
             # Play the audio using pygame
             pygame.mixer.music.load(self.temp_audio_path)
             pygame.mixer.music.play()
             
             # Wait for playback to finish
-            while pygame.mixer.music.get_busy():
+            while pygame.mixer.music.get_busy() and not self._speech_cancelled:
                 await asyncio.sleep(0.1)
             
             print("[Terminal] Speech playback complete")
@@ -500,6 +1259,52 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
         except Exception as e:
             print(f"[Terminal] Async TTS error: {e}")
     
+    def calibrate_barge_in(self, duration: float = 0.5) -> None:
+        """Measure how loud Raven's own playback is at the mic; barge-in must be louder"""
+        if not self.mic_available:
+            return
+        try:
+            with sr.Microphone() as source:
+                self.barge_in_recognizer.adjust_for_ambient_noise(source, duration=duration)
+            playback_level = self.barge_in_recognizer.energy_threshold
+            self.barge_in_recognizer.energy_threshold = max(self.recognizer.energy_threshold,
+                                                            playback_level * self.barge_in_energy_ratio)
+        except Exception as e:
+            print(f"[Terminal] Barge-in calibration error: {e}")
+            self.barge_in_recognizer.energy_threshold = self.recognizer.energy_threshold * self.barge_in_energy_ratio
+    
+    def is_barge_in(self, heard: str) -> bool:
+        """Whether recognized words are the user talking rather than Raven's own voice"""
+        words = [word for word, _, _ in Message(heard).tokens]
+        if len(words) < self.barge_in_min_words:
+            return False
+        spoken = Message(self._speaking_text).words
+        echo = sum(word in spoken for word in words) / len(words)
+        return echo <= self.barge_in_max_echo
+    
+    def detect_speech(self, timeout: float = 1.0) -> Optional[str]:
+        """Words the user says over Raven's playback, or None (used for barge-in)
+        
+        Call calibrate_barge_in once playback has started. Loud sound that is not
+        recognized as words, or that matches what Raven is saying, does not count.
+        """
+        if not self.mic_available:
+            return None
+        
+        try:
+            with sr.Microphone() as source:
+                audio = self.barge_in_recognizer.listen(source, timeout=timeout, phrase_time_limit=2)
+            heard = self.barge_in_recognizer.recognize_google(audio)
+        except (sr.WaitTimeoutError, sr.UnknownValueError):
+            return None
+        except Exception as e:
+            print(f"[Terminal] Barge-in detection error: {e}")
+            return None
+        if not self.is_barge_in(heard):
+            print(f"[Terminal] Barge-in ignored (Raven's own voice?): {heard}")
+            return None
+        return heard
+    
     def listen_for_voice(self) -> Optional[str]:
         """Listen for voice input with better ambient noise handling"""
         if not self.mic_available:
@@ -529,31 +1334,43 @@ Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengal
 class CommandsHandler:
     """Handle system automation commands with ELITE file opener"""
     
-    def detect_and_open_file(self, text: str, language_mode: str = "banglish") -> Optional[str]:
-        """ELITE: Automatically detect and open files from user message"""
-        # Look for file path patterns
-        # Patterns: D:/path/file.ext, C:\path\file.ext, /path/file.ext
-        file_patterns = [
-            r'[A-Za-z]:[\\\w\s\.\-\_\(\)]+\.[a-zA-Z0-9]+',  # Windows absolute path
-            r'[A-Za-z]:/[\w\s\.\-\_\/\(\)]+\.[a-zA-Z0-9]+',    # Windows with forward slash
-            r'/[\w\s\.\-\_\/\(\)]+\.[a-zA-Z0-9]+',             # Unix path
-            r'\w+\.[a-zA-Z0-9]+',                                # Just filename.ext
-        ]
+    def __init__(self, dry_run: bool = False):
+        # Dry run: build the same replies but never open, type, click or launch anything
+        self.dry_run = dry_run
+    
+    def _system(self, action: Callable, *args, **kwargs) -> None:
+        """Run a side-effecting automation call (skipped in dry-run mode)"""
+        if self.dry_run:
+            call_args = ", ".join([repr(arg) for arg in args] + [f"{k}={v!r}" for k, v in kwargs.items()])
+            print(f"[Terminal] Dry run - skipped {getattr(action, '__name__', action)}({call_args})")
+            return
+        action(*args, **kwargs)
+    
+    def _pause(self, seconds: float) -> None:
+        """Wait for the desktop to catch up (no wait in dry-run mode)"""
+        if not self.dry_run:
+            time.sleep(seconds)
+    
+    def detect_and_open_file(self, text: Union[str, Message], language_mode: str = "banglish",
+                             has_open_intent: Optional[bool] = None) -> Optional[str]:
+        """ELITE: Automatically detect and open files from user message
+        
+        has_open_intent comes from the intent router when the caller already scanned the text.
+        """
+        # File path candidates (D:/path/file.ext, C:\path\file.ext, /path/file.ext, file.ext)
+        # were found when the message was analysed
+        message = Message.of(text)
         
         # Check if user is asking to open a file
-        open_keywords = ['open', 'read', 'show', 'launch', 'start']
-        has_open_intent = any(keyword in text.lower() for keyword in open_keywords)
+        if has_open_intent is None:
+            has_open_intent = message.contains_any(['open', 'read', 'show', 'launch', 'start'])
         
-        for pattern in file_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                filepath = matches[0].strip()
-                
-                # If no open intent, check if it's a clear file path mention
-                if not has_open_intent and not os.path.exists(filepath):
-                    continue
-                
-                return self.open_file(filepath, language_mode)
+        for _, _, filepath in message.paths:
+            # If no open intent, check if it's a clear file path mention
+            if not has_open_intent and not os.path.exists(filepath):
+                continue
+            
+            return self.open_file(filepath, language_mode)
         
         return None
     
@@ -576,9 +1393,9 @@ class CommandsHandler:
             # PDFs and Documents
             if ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']:
                 if os.name == 'nt':  # Windows
-                    os.startfile(filepath)
+                    self._system(os.startfile, filepath)
                 else:  # Linux/Mac
-                    subprocess.Popen(['xdg-open', filepath])
+                    self._system(subprocess.Popen, ['xdg-open', filepath])
                 
                 if language_mode == "english":
                     return f"Opening document: {os.path.basename(filepath)}, {user_name}!"
@@ -588,9 +1405,9 @@ class CommandsHandler:
             # Images
             elif ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.svg']:
                 if os.name == 'nt':  # Windows
-                    os.startfile(filepath)
+                    self._system(os.startfile, filepath)
                 else:  # Linux/Mac
-                    subprocess.Popen(['xdg-open', filepath])
+                    self._system(subprocess.Popen, ['xdg-open', filepath])
                 
                 if language_mode == "english":
                     return f"Opening image: {os.path.basename(filepath)}, {user_name}!"
@@ -601,7 +1418,7 @@ class CommandsHandler:
             elif ext in ['.py', '.js', '.html', '.css', '.json', '.txt', '.md', '.java', '.cpp', '.c', '.ts', '.jsx', '.tsx']:
                 try:
                     # Try VS Code first
-                    subprocess.Popen(['code', filepath])
+                    self._system(subprocess.Popen, ['code', filepath])
                     if language_mode == "english":
                         return f"Opening code file in VS Code: {os.path.basename(filepath)}, {user_name}!"
                     else:
@@ -609,9 +1426,9 @@ class CommandsHandler:
                 except:
                     # Fallback to default editor
                     if os.name == 'nt':
-                        os.startfile(filepath)
+                        self._system(os.startfile, filepath)
                     else:
-                        subprocess.Popen(['xdg-open', filepath])
+                        self._system(subprocess.Popen, ['xdg-open', filepath])
                     
                     if language_mode == "english":
                         return f"Opening code file: {os.path.basename(filepath)}, {user_name}!"
@@ -621,9 +1438,9 @@ class CommandsHandler:
             # Video files
             elif ext in ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv']:
                 if os.name == 'nt':
-                    os.startfile(filepath)
+                    self._system(os.startfile, filepath)
                 else:
-                    subprocess.Popen(['xdg-open', filepath])
+                    self._system(subprocess.Popen, ['xdg-open', filepath])
                 
                 if language_mode == "english":
                     return f"Opening video: {os.path.basename(filepath)}, {user_name}!"
@@ -633,9 +1450,9 @@ class CommandsHandler:
             # Audio files
             elif ext in ['.mp3', '.wav', '.ogg', '.flac', '.aac']:
                 if os.name == 'nt':
-                    os.startfile(filepath)
+                    self._system(os.startfile, filepath)
                 else:
-                    subprocess.Popen(['xdg-open', filepath])
+                    self._system(subprocess.Popen, ['xdg-open', filepath])
                 
                 if language_mode == "english":
                     return f"Opening audio: {os.path.basename(filepath)}, {user_name}!"
@@ -645,9 +1462,9 @@ class CommandsHandler:
             # Default: try to open with system default
             else:
                 if os.name == 'nt':
-                    os.startfile(filepath)
+                    self._system(os.startfile, filepath)
                 else:
-                    subprocess.Popen(['xdg-open', filepath])
+                    self._system(subprocess.Popen, ['xdg-open', filepath])
                 
                 if language_mode == "english":
                     return f"Opening file: {os.path.basename(filepath)}, {user_name}!"
@@ -680,16 +1497,17 @@ class CommandsHandler:
         else:
             return f"আজকের date হলো {current_date}."
     
-    def execute_whatsapp_command(self, command: str, contacts: Dict[str, str], language_mode: str = "banglish") -> str:
+    def execute_whatsapp_command(self, command: Union[str, Message], contacts: Dict[str, str],
+                                 language_mode: str = "banglish") -> str:
         """Smart WhatsApp with flexible opening"""
-        command_lower = command.lower()
+        message = Message.of(command)
         user_name = RavenCore.USER_NAME
         
         # Check if user just wants to open WhatsApp without sending a message
-        open_only_keywords = ["open whatsapp", "whatsapp open", "launch whatsapp", "start whatsapp"]
-        if any(keyword in command_lower for keyword in open_only_keywords) and "send" not in command_lower and "message" not in command_lower:
+        open_only_keywords = ["open whatsapp", "opening whatsapp", "whatsapp open", "launch whatsapp", "start whatsapp"]
+        if message.contains_any(open_only_keywords) and not message.contains_any(["send", "sending", "message", "messages"]):
             try:
-                webbrowser.open('https://web.whatsapp.com')
+                self._system(webbrowser.open, 'https://web.whatsapp.com')
                 print("[Terminal] Opening WhatsApp Web")
                 
                 if language_mode == "english":
@@ -708,25 +1526,25 @@ class CommandsHandler:
         phone_number = None
         
         for name, number in contacts.items():
-            if name in command_lower:
+            if message.contains(name):
                 contact_name = name
                 phone_number = number
                 break
         
         if phone_number:
             # Extract message if provided
-            message = self._extract_message_from_command(command)
-            if not message:
+            text = self._extract_message_from_command(message)
+            if not text:
                 if language_mode == "english":
                     return f"Okay! I'll message {contact_name}. But what do you want to say? Type the message."
                 else:
                     return f"ঠিক আছে! {contact_name} কে message পাঠাবো। But কি বলতে চাও? Type করো message টা।"
             
             # Send WhatsApp message
-            return self._send_whatsapp_message(phone_number, message, contact_name, language_mode)
+            return self._send_whatsapp_message(phone_number, text, contact_name, language_mode)
         else:
             # Extract potential contact name from "send message to [name]"
-            potential_name = self._extract_contact_name(command)
+            potential_name = self._extract_contact_name(message)
             
             if language_mode == "english":
                 if potential_name:
@@ -739,25 +1557,24 @@ class CommandsHandler:
                 else:
                     return f"Contact টা আমার list এ নেই, {user_name}। Phone number দাও please, বা শুধু 'open WhatsApp' বলো তুমি নিজে খুঁজে নাও।"
     
-    def _extract_contact_name(self, command: str) -> Optional[str]:
+    def _extract_contact_name(self, command: Union[str, Message]) -> Optional[str]:
         """Extract potential contact name from command"""
-        patterns = ["send message to ", "message to ", "text to ", "send to "]
+        message = Message.of(command)
+        patterns = ["send message to", "message to", "text to", "send to"]
         for pattern in patterns:
-            if pattern in command.lower():
-                parts = command.lower().split(pattern, 1)
-                if len(parts) > 1:
-                    name_part = parts[1].strip().split()[0] if parts[1].strip() else None
-                    return name_part
+            rest = message.after(pattern)
+            if rest is not None:
+                return rest.split()[0].lower() if rest else None
         return None
     
-    def _extract_message_from_command(self, command: str) -> Optional[str]:
-        """Extract message from command"""
+    def _extract_message_from_command(self, command: Union[str, Message]) -> Optional[str]:
+        """Extract message from command (whole words, so "text" is not found in "context")"""
+        message = Message.of(command)
         keywords = ["message", "text", "tell", "say"]
         for keyword in keywords:
-            if keyword in command.lower():
-                parts = command.lower().split(keyword, 1)
-                if len(parts) > 1:
-                    return parts[1].strip()
+            rest = message.after(keyword)
+            if rest is not None:
+                return rest.lower()
         return None
     
     def _send_whatsapp_message(self, phone: str, message: str, contact_name: str = None, language_mode: str = "banglish") -> str:
@@ -772,14 +1589,14 @@ class CommandsHandler:
             
             # Open WhatsApp Web
             url = f"https://web.whatsapp.com/send?phone={phone_clean}&text={message_encoded}"
-            webbrowser.open(url)
+            self._system(webbrowser.open, url)
             
             print(f"[Terminal] Opening WhatsApp for {contact_name or phone}")
             
             # Auto-press Enter after 2 seconds
             def auto_send():
                 time.sleep(2)
-                pyautogui.press('enter')
+                self._system(pyautogui.press, 'enter')
                 print("[Terminal] Auto-pressed Enter to send message")
             
             import threading
@@ -801,21 +1618,21 @@ class CommandsHandler:
             else:
                 return f"WhatsApp open করতে problem হয়েছে, {user_name}."
     
-    def execute_search_command(self, query: str, language_mode: str = "banglish") -> str:
+    def execute_search_command(self, query: Union[str, Message], language_mode: str = "banglish") -> str:
         """Enhanced Google search command"""
-        # Extract search term
-        search_keywords = ["search", "search for", "google", "look up", "khoj", "khuje dao"]
-        search_term = query
+        # Extract search term (longer phrases first so "search for" drops the "for" too)
+        message = Message.of(query)
+        search_keywords = ["search for", "searching", "searches", "search", "google", "look up", "khuje dao", "khuje", "khoj"]
+        search_term = message.text
         
-        for keyword in search_keywords:
-            if keyword in query.lower():
-                search_term = query.lower().replace(keyword, "").strip()
-                break
+        keyword = message.first_of(search_keywords)
+        if keyword:
+            search_term = message.without(keyword)
         
         if search_term:
             try:
                 url = f"https://www.google.com/search?q={search_term.replace(' ', '+')}"
-                webbrowser.open(url)
+                self._system(webbrowser.open, url)
                 print(f"[Terminal] Searching for: {search_term}")
                 user_name = RavenCore.USER_NAME
                 
@@ -836,29 +1653,22 @@ class CommandsHandler:
         else:
             return "কি search করবো? একটু clearly বলো।"
     
-    def open_application(self, command: str, language_mode: str = "banglish") -> str:
-        """Open application using Windows start menu"""
-        app_name = ""
-        
-        if "chrome" in command.lower():
-            app_name = "chrome"
-        elif "whatsapp" in command.lower():
-            app_name = "whatsapp"
-        elif "code" in command.lower() or "vscode" in command.lower():
+    def open_application(self, command: Union[str, Message], language_mode: str = "banglish",
+                         app_name: Optional[str] = None) -> str:
+        """Open application using Windows start menu (app_name skips the keyword scan)"""
+        if not app_name:
+            app_name = Message.of(command).first_of(["chrome", "whatsapp", "code", "vscode", "notepad", "calculator"]) or ""
+        if app_name == "vscode":
             app_name = "code"
-        elif "notepad" in command.lower():
-            app_name = "notepad"
-        elif "calculator" in command.lower():
-            app_name = "calculator"
         
         if app_name:
             try:
                 print(f"[Terminal] Opening {app_name}...")
-                pyautogui.press('win')
-                time.sleep(0.5)
-                pyautogui.write(app_name, interval=0.1)
-                time.sleep(0.3)
-                pyautogui.press('enter')
+                self._system(pyautogui.press, 'win')
+                self._pause(0.5)
+                self._system(pyautogui.write, app_name, interval=0.1)
+                self._pause(0.3)
+                self._system(pyautogui.press, 'enter')
                 
                 if language_mode == "english":
                     return f"Opening {app_name}, just a second..."
@@ -876,19 +1686,21 @@ class CommandsHandler:
         else:
             return "কোন application টা খুলবো? Clearly বলো।"
     
-    def type_text(self, command: str, language_mode: str = "banglish") -> str:
+    def type_text(self, command: Union[str, Message], language_mode: str = "banglish") -> str:
         """Type text at current cursor position"""
-        # Extract text to type
+        # Extract text to type (original case, whatever case "Type this:" was written in)
+        message = Message.of(command)
         text = ""
-        if "type this:" in command.lower():
-            text = command.split("type this:", 1)[1].strip()
-        elif "type:" in command.lower():
-            text = command.split("type:", 1)[1].strip()
+        for marker in ("type this:", "type:"):
+            position = message.lower.find(marker)
+            if position >= 0:
+                text = message.text[position + len(marker):].strip()
+                break
         
         if text:
             try:
-                time.sleep(1)
-                pyautogui.write(text, interval=0.05)
+                self._pause(1)
+                self._system(pyautogui.write, text, interval=0.05)
                 print(f"[Terminal] Typed: {text}")
                 user_name = RavenCore.USER_NAME
                 
@@ -912,7 +1724,7 @@ class CommandsHandler:
     def minimize_all(self, language_mode: str = "banglish") -> str:
         """Minimize all windows and show desktop"""
         try:
-            pyautogui.hotkey('win', 'd')
+            self._system(pyautogui.hotkey, 'win', 'd')
             print("[Terminal] Minimized all windows")
             
             if language_mode == "english":
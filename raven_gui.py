@@ -11,6 +11,8 @@ import time
 import os
 from datetime import datetime
 from raven_core import RavenCore
+from raven_scheduler import (TurnScheduler, PRIORITY_VOICE, PRIORITY_TYPED,
+                             PRIORITY_SCREENSHOT, PRIORITY_PROACTIVE)
 
 
 class RavenGUI:
@@ -56,6 +58,11 @@ class RavenGUI:
         self.current_state = "idle"
         self.is_processing = False
         
+        # Every turn (voice, typed, screenshot, idle chatter) goes through one priority queue.
+        # One worker keeps turns in order in the chat pane and one request at a time on Ollama.
+        self.scheduler = TurnScheduler(workers=1, max_queue=32)
+        self.scheduler.start()
+        
         # ELITE: Animation control
         self.is_bouncing = False
         self.pulse_active = True
@@ -246,6 +253,20 @@ class RavenGUI:
         )
         screenshot_btn.pack(side="left", padx=5)
         
+        # Stop button - cancels the answer being generated or spoken
+        self.stop_btn = ctk.CTkButton(
+            control_frame,
+            text="⏹ Stop",
+            command=self.stop_generation,
+            width=90,
+            height=40,
+            fg_color=self.COLORS["bg_light"],
+            hover_color="#dc2626",
+            font=("Consolas", 11, "bold"),
+            corner_radius=10
+        )
+        self.stop_btn.pack(side="left", padx=5)
+        
         # Clear chat button
         clear_btn = ctk.CTkButton(
             control_frame,
@@ -524,40 +545,98 @@ class RavenGUI:
         # Log to core
         self.core.log_chat(sender, message)
     
+    def begin_stream_message(self, sender: str = "Raven"):
+        """Start a chat entry whose text arrives token by token"""
+        self.chat_display.configure(state="normal")
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.chat_display.insert("end", f"🦅 [{timestamp}] {sender}:\n")
+        self.chat_display.see("end")
+        self.chat_display.configure(state="disabled")
+    
+    def append_stream_token(self, token: str):
+        """Append a streamed token to the open chat entry"""
+        self.chat_display.configure(state="normal")
+        self.chat_display.insert("end", token)
+        self.chat_display.see("end")
+        self.chat_display.configure(state="disabled")
+    
+    def end_stream_message(self, sender: str, message: str):
+        """Close the streamed chat entry and log the full message"""
+        self.append_stream_token("\n\n")
+        self.core.log_chat(sender, message)
+    
+    def _make_stream_callback(self, header: str = ""):
+        """Create an on_token callback that opens the chat entry on the first token
+        
+        Returns (callback, started) where started() tells whether anything was streamed.
+        """
+        state = {"started": False}
+        
+        def on_token(token: str):
+            if not state["started"]:
+                state["started"] = True
+                self.update_state("talking")
+                self.begin_stream_message("Raven")
+                if header:
+                    self.append_stream_token(header)
+            self.append_stream_token(token)
+        
+        return on_token, lambda: state["started"]
+    
     def send_message(self):
         """Handle sending user message"""
         user_input = self.input_entry.get().strip()
-        if not user_input or self.is_processing:
+        if not user_input:
             return
         
+        # Barge-in: a new message stops the current answer and runs right after it
+        if self.is_processing:
+            self.core.cancel_generation()
+        
         self.input_entry.delete(0, "end")
         self.add_message_to_chat("You", user_input)
         
         # Process in background
-        thread = threading.Thread(target=self._process_message, args=(user_input,), daemon=True)
-        thread.start()
+        if not self.scheduler.submit(PRIORITY_TYPED, self._run_turn, user_input):
+            self._report_busy()
+    
+    def _report_busy(self):
+        """Tell the user a turn was not queued (the turn queue is full of user turns)"""
+        self.add_message_to_chat("Raven", f"Ektu busy achi, {self.core.USER_NAME}! Ektu pore abar bolo?")
     
-    def _process_message(self, user_input: str):
-        """Process message in background thread"""
+    def _run_turn(self, user_input: str):
+        """Run one user turn (on a scheduler worker)"""
         self.is_processing = True
         self.update_state("thinking")
         
         try:
-            # Process with core (mood-aware)
-            response, new_state = self.core.process_message(user_input)
+            # Process with core (mood-aware), streaming LLM replies into the chat
+            on_token, streamed = self._make_stream_callback()
+            response, new_state = self.core.process_message(user_input, on_token=on_token)
+            
+            if self.core.last_generation_cancelled:
+                # Keep what was already shown, mark it as stopped
+                if streamed():
+                    self.end_stream_message("Raven", f"{response} ⏹")
+                self.update_state("idle")
+                return
             
             # Update to appropriate state
             self.update_state(new_state)
             
-            # Add response to chat
-            self.add_message_to_chat("Raven", response)
+            # Add response to chat (already shown token by token if streamed)
+            if streamed():
+                self.end_stream_message("Raven", response)
+            else:
+                self.add_message_to_chat("Raven", response)
             
             # Text-to-speech if voice mode enabled
             if self.core.voice_enabled:
-                self.core.speak(response)
+                self._speak(response)
             
-            # Return to idle after 2 seconds
-            time.sleep(2)
+            # Return to idle after 2 seconds (straight away if more turns are waiting)
+            if not self.scheduler.depth:
+                time.sleep(2)
             self.update_state("idle")
             
         except Exception as e:
@@ -566,6 +645,28 @@ class RavenGUI:
         finally:
             self.is_processing = False
     
+    def stop_generation(self):
+        """Stop button: cancel the answer being generated or spoken"""
+        if self.core.cancel_generation():
+            print("[Terminal] Stopped by user")
+    
+    def _speak(self, text: str):
+        """Speak text; in voice mode, talking over Raven stops the playback (barge-in)"""
+        if self.core.voice_enabled and self.core.mic_available:
+            threading.Thread(target=self._barge_in_monitor, daemon=True).start()
+        self.core.speak(text)
+    
+    def _barge_in_monitor(self):
+        """Watch the mic while Raven speaks and interrupt when the user starts talking"""
+        time.sleep(0.5)  # Let playback start before listening
+        self.core.calibrate_barge_in()  # Our own voice through the speakers sets the bar
+        while self.core.is_speaking:
+            heard = self.core.detect_speech(timeout=1.0)
+            if heard:
+                print(f"[Terminal] Barge-in: user said {heard!r}")
+                self.core.cancel_generation()
+                break
+    
     def toggle_voice_mode(self):
         """Toggle voice input/output"""
         self.core.voice_enabled = not self.core.voice_enabled
@@ -599,7 +700,12 @@ class RavenGUI:
                     idle_counter = 0
                     last_activity_time = time.time()
                     self.add_message_to_chat("You (voice)", text)
-                    self._process_message(text)
+                    turn = self.scheduler.submit(PRIORITY_VOICE, self._run_turn, text)
+                    # Wait for the answer before listening again (speaking over it is barge-in)
+                    if turn:
+                        turn.done.wait()
+                    else:
+                        self._report_busy()
                     
                     # After processing, continue listening immediately
                     continue
@@ -620,9 +726,7 @@ class RavenGUI:
                             ]
                             import random
                             witty_msg = random.choice(witty_messages)
-                            self.add_message_to_chat("Raven", witty_msg)
-                            if self.core.voice_enabled:
-                                self.core.speak(witty_msg)
+                            self.scheduler.submit(PRIORITY_PROACTIVE, self._say_proactive, witty_msg)
                             last_activity_time = current_time
                         elif idle_counter > 6:
                             idle_counter = 0
@@ -632,6 +736,12 @@ class RavenGUI:
         
         self.update_state("idle")
     
+    def _say_proactive(self, message: str):
+        """Idle chatter from Raven (lowest priority turn)"""
+        self.add_message_to_chat("Raven", message)
+        if self.core.voice_enabled:
+            self._speak(message)
+    
     def toggle_vision_mode(self):
         """Toggle automatic vision mode"""
         self.core.vision_enabled = not self.core.vision_enabled
@@ -643,31 +753,38 @@ class RavenGUI:
     
     def manual_screenshot(self):
         """Manually trigger screenshot and analysis"""
-        if self.is_processing:
-            return
-        
-        thread = threading.Thread(target=self._take_screenshot, daemon=True)
-        thread.start()
+        if not self.scheduler.submit(PRIORITY_SCREENSHOT, self._take_screenshot):
+            self._report_busy()
     
     def _take_screenshot(self):
-        """Take and analyze screenshot in background"""
+        """Take and analyze screenshot (on a scheduler worker)"""
         self.is_processing = True
         self.update_state("thinking")
         
         try:
             image_data = self.core.take_screenshot()
             if image_data:
+                header = "📸 Screenshot Analysis:\n"
+                on_token, streamed = self._make_stream_callback(header)
                 response = self.core.chat_with_ollama(
                     "Describe what you see in this screenshot in detail.",
-                    image_data
+                    image_data,
+                    on_token,
+                    profile="screenshot"
                 )
+                self.core.describe_last_screenshot(response)
                 self.update_state("talking")
-                self.add_message_to_chat("Raven", f"📸 Screenshot Analysis:\n{response}")
+                stopped = " ⏹" if self.core.last_generation_cancelled else ""
+                if streamed():
+                    self.end_stream_message("Raven", f"{header}{response}{stopped}")
+                elif not stopped:
+                    self.add_message_to_chat("Raven", f"{header}{response}")
                 
-                if self.core.voice_enabled:
-                    self.core.speak(response)
+                if self.core.voice_enabled and not self.core.last_generation_cancelled:
+                    self._speak(response)
             
-            time.sleep(2)
+            if not self.scheduler.depth:
+                time.sleep(2)
             self.update_state("idle")
             
         except Exception as e:
@@ -688,7 +805,10 @@ class RavenGUI:
         print("[Terminal] Saving memory and closing...")
         self.pulse_active = False
         self.is_bouncing = False
-        self.core.save_memory()
+        self.core.cancel_generation()
+        self.scheduler.stop()
+        print(f"[Terminal] Turn queue stats: {self.scheduler.stats()}")
+        self.core.shutdown()
         self.root.destroy()
     
     def run(self):
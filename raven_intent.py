@@ -0,0 +1,104 @@
+"""Raven Assistant - Intent Classifier
+
+This module is the fallback for command phrasings the keyword router misses ("could you
+pull up chrome", "ping mom on wa"). A message becomes hashed features (words, word
+pairs and 2-4 character pieces of each word), and a linear softmax model over them,
+trained offline by train_intent.py from raven_data/intent_commands.tsv and shipped as
+raven_data/intent_model.npz, picks the intent. It takes well under a millisecond, so
+a confident guess saves a full LLM round trip.
+
+RavenCore runs a guessed read-only intent (time, date) at once. A guess with side
+effects (opening an app, messaging, searching, ...) is asked about first and only
+runs if the next message confirms it.
+"""
+
+import os
+import zlib
+from collections import Counter
+from typing import Optional, List, Dict, Tuple, Union, Sequence
+import numpy as np
+
+from raven_nlp import Message
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raven_data", "intent_model.npz")
+
+CHAT_LABEL = "chat"  # Not a command: the message goes to the LLM
+CHAR_ORDERS = (2, 3, 4)
+
+
+def hashed_features(text: Union[str, Message], bits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(slot, weight) of the message's features in a 2**bits table, L2-normalized"""
+    words = [word for word, _, _ in Message.of(text).tokens]
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        for order in CHAR_ORDERS:
+            features += [padded[start:start + order] for start in range(len(padded) - order + 1)]
+
+    mask = (1 << bits) - 1
+    counts = Counter(zlib.crc32(feature.encode("utf-8")) & mask for feature in features)
+    slots = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    weights = np.sqrt(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    norm = float(np.sqrt(np.dot(weights, weights)))
+    return slots, weights / norm if norm else weights
+
+
+class IntentClassifier:
+    """Linear softmax intent model over hashed n-gram features, gated by a confidence threshold"""
+
+    def __init__(self, model_path: Optional[str] = None, threshold: float = 0.6):
+        self.model_path = model_path or DEFAULT_MODEL
+        self.threshold = threshold  # A command needs at least this probability, otherwise it is chat
+        self.bits = 0
+        self.labels: List[str] = []
+        self._weights: Optional[np.ndarray] = None  # (len(labels), 2**bits)
+        self._bias: Optional[np.ndarray] = None
+        self.load(self.model_path)
+
+    def load(self, path: str) -> None:
+        """Load a model written by train_intent.py"""
+        try:
+            with np.load(path) as model:
+                self.labels = [str(label) for label in model["labels"]]
+                self._weights = model["weights"].astype(np.float32)
+                self._bias = model["bias"].astype(np.float32)
+                self.bits = int(model["bits"])
+            if self._weights.shape != (len(self.labels), 1 << self.bits):
+                raise ValueError(f"weights have shape {self._weights.shape}")
+        except (OSError, KeyError, ValueError) as e:
+            self.labels, self._weights, self._bias = [], None, None
+            print(f"[Terminal] Intent classifier not loaded, keyword routing only: {e}")
+
+    @property
+    def loaded(self) -> bool:
+        return self._weights is not None
+
+    def _probabilities(self, slots: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        logits = self._weights[:, slots] @ weights + self._bias
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+    def score(self, text: Union[str, Message]) -> Dict[str, float]:
+        """Probability of every intent (including "chat") for one message"""
+        if not self.loaded:
+            return {}
+        return dict(zip(self.labels, self._probabilities(*hashed_features(text, self.bits)).tolist()))
+
+    def score_batch(self, texts: Sequence[Union[str, Message]]) -> np.ndarray:
+        """Probabilities, one row per text and one column per self.labels entry"""
+        if not self.loaded:
+            return np.zeros((len(texts), 0), dtype=np.float32)
+        return np.array([self._probabilities(*hashed_features(text, self.bits)) for text in texts],
+                        dtype=np.float32).reshape(len(texts), len(self.labels))
+
+    def classify(self, text: Union[str, Message]) -> Tuple[Optional[str], float]:
+        """(intent, probability); intent is None for chat or when below the threshold"""
+        if not self.loaded:
+            return None, 0.0
+        probabilities = self._probabilities(*hashed_features(text, self.bits))
+        best = int(np.argmax(probabilities))
+        confidence = float(probabilities[best])
+        if self.labels[best] == CHAT_LABEL or confidence < self.threshold:
+            return None, confidence
+        return self.labels[best], confidence
@@ -0,0 +1,195 @@
+"""Raven Assistant - Language Identification
+
+This module tells Bengali, Banglish (Bengali written in Latin letters, "kemon acho")
+and English apart. Bengali script is found by a script scan; the Latin part of a
+message goes to a small character n-gram model (naive Bayes over 1-4 letter grams
+hashed into a fixed table) trained offline by train_langid.py and shipped as
+raven_data/langid_model.npz. One message is scored in plain Python in tens of
+microseconds; score_batch runs on NumPy arrays, so a whole chat log is scored in one call.
+"""
+
+import os
+import re
+import math
+from typing import Optional, List, Dict, Tuple, Union, Sequence
+import numpy as np
+
+from raven_nlp import Message
+
+DEFAULT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raven_data", "langid_model.npz")
+
+LANGUAGES = ("bengali", "banglish", "english")
+MODEL_LANGUAGES = ("banglish", "english")  # The n-gram model only sees Latin letters
+ORDERS = (1, 2, 3, 4)
+
+_NOT_LATIN = re.compile(r"[^a-z]+")
+# Gram ids: a-z are 1-26 and the word boundary is 27, five bits per letter
+_SPACE_CODE = 27
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_BENGALI_LETTER = re.compile("[\u0980-\u09FF]")
+_LATIN_LETTER = re.compile("[A-Za-z]")
+
+
+def latin_text(text: Union[str, Message]) -> str:
+    """Lowercase a-z words of text, single-spaced, with a space at each end"""
+    lower = text.lower if isinstance(text, Message) else text.lower()
+    return " " + _NOT_LATIN.sub(" ", lower).strip() + " "
+
+
+def script_counts(texts: Sequence[str]) -> np.ndarray:
+    """(bengali letters, latin letters) per text, one vectorized pass over all of them"""
+    counts = np.zeros((len(texts), 2), dtype=np.int64)
+    if not len(texts):
+        return counts
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    text_index = np.repeat(np.arange(len(texts)), lengths)
+    folded = codes | 32
+    bengali = (codes >= 0x0980) & (codes <= 0x09FF)
+    latin = (folded >= 97) & (folded <= 122)
+    counts[:, 0] = np.bincount(text_index[bengali], minlength=len(texts))
+    counts[:, 1] = np.bincount(text_index[latin], minlength=len(texts))
+    return counts
+
+
+def ngram_ids(latin_texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(gram id, text index) of every 1-4 letter gram of texts already passed through latin_text
+
+    Ids are exact (five bits per letter), so grams of different orders never collide;
+    grams never span two texts.
+    """
+    corpus = "\0".join(latin_texts)
+    codes = np.frombuffer(corpus.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    codes = np.where(codes == 32, _SPACE_CODE, np.where(codes == 0, 0, codes - 96))
+    lengths = np.fromiter((len(text) + 1 for text in latin_texts), dtype=np.int64, count=len(latin_texts))
+    text_index = np.repeat(np.arange(len(latin_texts)), lengths)[:len(codes)]
+
+    ids, owners = [], []
+    for order in ORDERS:
+        count = len(codes) - order + 1
+        if count <= 0:
+            continue
+        gram = np.zeros(count, dtype=np.uint64)
+        valid = np.ones(count, dtype=bool)
+        for offset in range(order):
+            part = codes[offset:offset + count]
+            gram = (gram << np.uint64(5)) | part
+            valid &= part != 0
+        # A gram of boundaries only (" ", "  ") says nothing about the language
+        valid &= gram != _SPACE_CODE
+        ids.append(gram[valid])
+        owners.append(text_index[:count][valid])
+    if not ids:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(ids), np.concatenate(owners)
+
+
+def bucket_of(ids: np.ndarray, bits: int) -> np.ndarray:
+    """Table slot of each gram id (multiplicative hashing into 2**bits slots)"""
+    return ((ids * _GOLDEN) >> np.uint64(64 - bits)).astype(np.int64)
+
+
+class LanguageID:
+    """Bengali / Banglish / English probabilities from a script scan and an n-gram table"""
+
+    def __init__(self, model_path: Optional[str] = None, max_grams: int = 40, temperature: float = 4.0):
+        self.model_path = model_path or DEFAULT_MODEL
+        self.max_grams = max_grams      # Longer texts count as this many grams
+        self.temperature = temperature  # Overlapping grams are not independent; soften naive Bayes
+        self.bits = 0
+        self._log_prob: Optional[np.ndarray] = None  # (len(MODEL_LANGUAGES), 2**bits)
+        self._prior: Optional[np.ndarray] = None
+        self._ratio: List[float] = []  # english-minus-banglish log-probability per slot, for single texts
+        self.load(self.model_path)
+
+    def load(self, path: str) -> None:
+        """Load a table written by train_langid.py"""
+        try:
+            with np.load(path) as model:
+                labels = tuple(str(label) for label in model["labels"])
+                if labels != MODEL_LANGUAGES or tuple(int(order) for order in model["orders"]) != ORDERS:
+                    raise ValueError(f"model is for {labels} / orders {tuple(model['orders'])}")
+                self._log_prob = model["log_prob"].astype(np.float32)
+                self._prior = model["prior"].astype(np.float32)
+                self.bits = int(model["bits"])
+            self._ratio = (self._log_prob[1] - self._log_prob[0]).tolist()
+        except (OSError, KeyError, ValueError) as e:
+            self._log_prob = self._prior = None
+            self._ratio = []
+            print(f"[Terminal] Language model not loaded, Latin text will count as English: {e}")
+
+    def score_batch(self, texts: Sequence[Union[str, Message]]) -> np.ndarray:
+        """Probabilities, one row per text and one column per LANGUAGES entry (all zero for no letters)"""
+        raw = [text.text if isinstance(text, Message) else text for text in texts]
+        counts = script_counts(raw).astype(np.float32)
+        letters = counts.sum(axis=1)
+        bengali = np.divide(counts[:, 0], letters, out=np.zeros(len(raw), dtype=np.float32), where=letters > 0)
+
+        # Latin part: banglish vs english
+        english = np.ones(len(raw), dtype=np.float32)
+        if self._log_prob is not None and len(raw):
+            ids, owners = ngram_ids([latin_text(text) for text in texts])
+            buckets = bucket_of(ids, self.bits)
+            grams = np.bincount(owners, minlength=len(raw)).astype(np.float32)
+            # Log-likelihood ratio of english over banglish
+            ratio = np.bincount(owners, weights=self._log_prob[1, buckets] - self._log_prob[0, buckets],
+                                minlength=len(raw)).astype(np.float32)
+            ratio *= np.minimum(1.0, self.max_grams / np.maximum(grams, 1.0)) / self.temperature
+            ratio += self._prior[1] - self._prior[0]
+            english = np.where(grams > 0, 1.0 / (1.0 + np.exp(-np.clip(ratio, -60, 60))), 1.0).astype(np.float32)
+
+        latin = np.where(letters > 0, 1.0 - bengali, 0.0)
+        return np.stack([bengali, latin * (1.0 - english), latin * english], axis=1)
+
+    @staticmethod
+    def labels(scores: np.ndarray) -> List[str]:
+        """Most likely language per row of score_batch output ("unknown" when there are no letters)"""
+        best = np.argmax(scores, axis=1) if len(scores) else np.zeros(0, dtype=np.int64)
+        return [LANGUAGES[index] if total > 0 else "unknown"
+                for index, total in zip(best.tolist(), scores.sum(axis=1).tolist())]
+
+    def detect_batch(self, texts: Sequence[Union[str, Message]]) -> List[str]:
+        return self.labels(self.score_batch(texts))
+
+    def _english_probability(self, latin: str) -> float:
+        """score_batch's Latin-part model for one text in plain Python (no per-call array overhead)"""
+        if self._log_prob is None:
+            return 1.0
+        codes = [_SPACE_CODE if char == " " else ord(char) - 96 for char in latin]
+        shift, mask = 64 - self.bits, (1 << 64) - 1
+        golden, ratio_of = int(_GOLDEN), self._ratio
+        ratio, grams = 0.0, 0
+        for order in ORDERS:
+            for start in range(len(codes) - order + 1):
+                gram = 0
+                for code in codes[start:start + order]:
+                    gram = (gram << 5) | code
+                if gram == _SPACE_CODE:
+                    continue
+                ratio += ratio_of[((gram * golden) & mask) >> shift]
+                grams += 1
+        if not grams:
+            return 1.0
+        ratio = ratio * min(1.0, self.max_grams / grams) / self.temperature
+        ratio += float(self._prior[1] - self._prior[0])
+        return 1.0 / (1.0 + math.exp(-max(-60.0, min(60.0, ratio))))
+
+    def score(self, text: Union[str, Message]) -> Dict[str, float]:
+        """Per-language probabilities of one message"""
+        if isinstance(text, Message):
+            bengali, latin = text.bengali_chars, text.latin_chars
+        else:
+            bengali, latin = len(_BENGALI_LETTER.findall(text)), len(_LATIN_LETTER.findall(text))
+        if not bengali + latin:
+            return dict.fromkeys(LANGUAGES, 0.0)
+        bengali_share = bengali / (bengali + latin)
+        english = self._english_probability(latin_text(text)) if latin else 1.0
+        latin_share = 1.0 - bengali_share
+        return {"bengali": bengali_share, "banglish": latin_share * (1.0 - english), "english": latin_share * english}
+
+    def detect(self, text: Union[str, Message]) -> str:
+        """The message's language: "bengali", "banglish", "english" or "unknown" """
+        scores = self.score(text)
+        if not any(scores.values()):
+            return "unknown"
+        return max(LANGUAGES, key=scores.get)
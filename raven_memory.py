@@ -0,0 +1,461 @@
+"""Raven Assistant - Conversation Memory
+
+This module holds long-term conversation memory helpers.
+Old turns that no longer fit in the prompt are folded into a compact running summary,
+live memory is persisted as an append-only journal plus a snapshot, and the full
+history is kept in a searchable SQLite store.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable
+
+
+class ConversationSummarizer:
+    """Condense turns evicted from the prompt window into one running summary"""
+
+    def __init__(self, generate: Callable[[str], str], user_name: str = "Sir",
+                 min_batch: int = 4, max_batch: int = 20, max_words: int = 150):
+        self.generate = generate  # prompt -> completion text
+        self.user_name = user_name
+        self.min_batch = min_batch  # Don't call the model for fewer evicted turns than this
+        self.max_batch = max_batch  # Fold at most this many turns per call
+        self.max_words = max_words
+
+    @staticmethod
+    def pending(history: List[Dict[str, Any]], window_start: int) -> List[Dict[str, Any]]:
+        """Entries before the prompt window that are not in the summary yet"""
+        return [msg for msg in history[:window_start] if not msg.get("summarized")]
+
+    def build_prompt(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        """Prompt asking the model to fold new messages into the existing summary"""
+        conversation = "\n".join(f"{msg['sender']}: {msg['message']}" for msg in messages)
+        return f"""You keep a short running summary of a conversation between {self.user_name} and Raven, an AI assistant.
+
+Current summary:
+{summary or "(none yet)"}
+
+New messages to add to the summary:
+{conversation}
+
+Write the updated summary in at most {self.max_words} words. Keep facts, names, preferences, decisions and open tasks.
+Drop small talk. Reply with the summary only."""
+
+    def summarize(self, summary: str, messages: List[Dict[str, Any]]) -> Optional[str]:
+        """Fold messages into the summary and mark them summarized
+
+        Returns the new summary, or None if there was not enough to summarize or the model failed.
+        """
+        if len(messages) < self.min_batch:
+            return None
+        batch = messages[:self.max_batch]
+        new_summary = self.generate(self.build_prompt(summary, batch)).strip()
+        if not new_summary:
+            return None
+        for msg in batch:
+            msg["summarized"] = True
+        return new_summary
+
+
+class MemoryJournal:
+    """Append-only JSONL journal of chat messages and memory state, with a snapshot for fast startup
+
+    Every message is one appended line (constant time, nothing lost on a crash).
+    State lines (language mode, moods, summary, summary watermark) are appended when they change.
+    The snapshot holds the live memory plus the journal offset it covers, so startup reads
+    the snapshot and replays only the journal tail. Compaction rewrites the journal down to
+    the live memory, dropping turns that are already folded into the summary.
+
+    With a writer (ChatLogWriter), lines are appended on the writer's thread; snapshot and
+    compact must then be queued with writer.call so they run after the lines they cover.
+    """
+
+    def __init__(self, journal_path: str, snapshot_path: str,
+                 snapshot_every: int = 50, compact_bytes: int = 1024 * 1024,
+                 writer: Optional[Any] = None):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every  # Appends between snapshots
+        self.compact_bytes = compact_bytes    # Compact once the journal grows past this
+        self.writer = writer
+        self.last_seq = 0
+        self.appends_since_snapshot = 0
+        self._last_state: Optional[Dict[str, Any]] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.journal_path) or os.path.exists(self.snapshot_path)
+
+    @staticmethod
+    def _message_record(msg: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "message", "seq": msg["seq"], "timestamp": msg.get("timestamp", ""),
+                "sender": msg.get("sender", ""), "message": msg.get("message", "")}
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Append one line and flush it to the OS (or queue it on the writer); caller holds the lock"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        if self.writer:
+            self.writer.write(self.journal_path, line)
+            return
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._file.write(line)
+        self._file.flush()
+
+    def append_message(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Give msg the next sequence number and append it"""
+        with self._lock:
+            self.last_seq += 1
+            msg["seq"] = self.last_seq
+            self._write(self._message_record(msg))
+            self.appends_since_snapshot += 1
+        return msg
+
+    def append_state(self, state: Dict[str, Any]) -> bool:
+        """Append a state line if anything changed since the last one; True if written"""
+        with self._lock:
+            if state == self._last_state:
+                return False
+            self._write(dict(state, type="state"))
+            self._last_state = json.loads(json.dumps(state))
+            self.appends_since_snapshot += 1
+        return True
+
+    @property
+    def should_snapshot(self) -> bool:
+        return self.appends_since_snapshot >= self.snapshot_every
+
+    @property
+    def should_compact(self) -> bool:
+        try:
+            return os.path.getsize(self.journal_path) >= self.compact_bytes
+        except OSError:
+            return False
+
+    def _replace(self, path: str, text: str) -> None:
+        """Write a file atomically (temp file + rename)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def snapshot(self, messages: List[Dict[str, Any]], state: Dict[str, Any],
+                 offset: Optional[int] = None) -> None:
+        """Save the live memory and the journal offset it covers (default: all of it)"""
+        with self._lock:
+            if self._file:
+                self._file.flush()
+            if offset is None:
+                offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            data = dict(state, seq=self.last_seq, offset=offset,
+                        messages=[self._message_record(msg) for msg in messages],
+                        saved_at=datetime.now().isoformat())
+            self._replace(self.snapshot_path, json.dumps(data, ensure_ascii=False))
+            self.appends_since_snapshot = 0
+
+    def compact(self, messages: List[Dict[str, Any]], state: Dict[str, Any]) -> None:
+        """Rewrite the journal as just the live memory, then snapshot it"""
+        # Offset 0 first: a crash before the final snapshot replays the new journal from the start
+        self.snapshot(messages, state, offset=0)
+        with self._lock:
+            lines = [json.dumps(self._message_record(msg), ensure_ascii=False) for msg in messages]
+            lines.append(json.dumps(dict(state, type="state"), ensure_ascii=False))
+            if self._file:
+                self._file.close()
+                self._file = None
+            if self.writer:
+                self.writer.release(self.journal_path)
+            before = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            self._replace(self.journal_path, "\n".join(lines) + "\n")
+            self._last_state = json.loads(json.dumps(state))
+        self.snapshot(messages, state)
+        print(f"[Terminal] Memory journal compacted: {before} -> {os.path.getsize(self.journal_path)} bytes")
+
+    def load(self) -> Dict[str, Any]:
+        """Rebuild memory from the snapshot plus the journal tail
+
+        Returns the last state fields plus "messages" (oldest first). Messages at or
+        below the summary watermark (summarized_through) come back marked summarized.
+        """
+        state: Dict[str, Any] = {}
+        messages: List[Dict[str, Any]] = []
+        offset = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                messages = data.pop("messages", [])
+                offset = data.pop("offset", 0)
+                self.last_seq = data.pop("seq", 0)
+                data.pop("saved_at", None)
+                state = data
+            except Exception as e:
+                print(f"[Terminal] Memory snapshot unreadable, replaying the whole journal: {e}")
+                state, messages, offset = {}, [], 0
+
+        if os.path.exists(self.journal_path):
+            if offset > os.path.getsize(self.journal_path):
+                offset = 0  # Journal was replaced after the snapshot - replay it all
+                messages = []
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                f.seek(offset)
+                known = {msg["seq"] for msg in messages}
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line after a crash
+                    kind = record.pop("type", None)
+                    if kind == "message" and record.get("seq") not in known:
+                        messages.append(record)
+                        known.add(record["seq"])
+                        self.last_seq = max(self.last_seq, record["seq"])
+                    elif kind == "state":
+                        state = record
+            self._trim_torn_tail()
+
+        watermark = state.get("summarized_through", 0)
+        for msg in messages:
+            msg.pop("type", None)
+            if msg["seq"] <= watermark:
+                msg["summarized"] = True
+        self._last_state = dict(state) if state else None
+        return dict(state, messages=messages)
+
+    def _trim_torn_tail(self) -> None:
+        """Cut a half-written last line (crash mid-append) so the next append starts on a fresh line"""
+        with open(self.journal_path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            keep = f.read().rfind(b"\n") + 1
+            f.truncate(keep)
+        print(f"[Terminal] Memory journal: dropped a torn last line ({size - keep} bytes)")
+
+    def migrate(self, history_file: str) -> int:
+        """Import an old history.json into the journal; returns the number of messages"""
+        with open(history_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        messages = data.get("chat_history", [])
+        for msg in messages:
+            self.append_message(msg)
+        summarized = [msg["seq"] for msg in messages if msg.get("summarized")]
+        self.append_state({
+            "language_mode": data.get("language_mode", "banglish"),
+            "mood_history": data.get("mood_history", []),
+            "conversation_summary": data.get("conversation_summary", ""),
+            "summarized_through": max(summarized) if summarized else 0,
+        })
+        os.replace(history_file, f"{history_file}.migrated")
+        print(f"[Terminal] Migrated {len(messages)} messages from {os.path.basename(history_file)} to the journal")
+        return len(messages)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class ConversationStore:
+    """Full conversation history in SQLite: every turn, mood entry and screenshot
+
+    Turns are indexed by time and, when SQLite has FTS5, by full-text keywords
+    (falls back to LIKE otherwise). Times are Unix timestamps.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self.has_fts = False
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY,
+                    seq INTEGER,
+                    created REAL NOT NULL,
+                    sender TEXT NOT NULL,
+                    message TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS turns_created ON turns (created);
+                CREATE TABLE IF NOT EXISTS moods (
+                    id INTEGER PRIMARY KEY,
+                    created REAL NOT NULL,
+                    mood TEXT NOT NULL,
+                    message TEXT
+                );
+                CREATE INDEX IF NOT EXISTS moods_created ON moods (created);
+                CREATE TABLE IF NOT EXISTS screenshots (
+                    id INTEGER PRIMARY KEY,
+                    created REAL NOT NULL,
+                    path TEXT NOT NULL,
+                    description TEXT
+                );
+                CREATE INDEX IF NOT EXISTS screenshots_created ON screenshots (created);
+            """)
+            try:
+                self._db.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts
+                        USING fts5(message, content='turns', content_rowid='id');
+                    CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+                        INSERT INTO turns_fts (rowid, message) VALUES (new.id, new.message);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS turns_fts_delete AFTER DELETE ON turns BEGIN
+                        INSERT INTO turns_fts (turns_fts, rowid, message) VALUES ('delete', old.id, old.message);
+                    END;
+                """)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                print(f"[Terminal] SQLite FTS5 not available, keyword search uses LIKE: {e}")
+            self._db.commit()
+
+    @staticmethod
+    def _rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+        return [dict(row) for row in cursor.fetchall()]
+
+    def add_turn(self, sender: str, message: str, seq: Optional[int] = None,
+                 created: Optional[float] = None) -> int:
+        """Store one chat message; returns its row id"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO turns (seq, created, sender, message) VALUES (?, ?, ?, ?)",
+                (seq, created or time.time(), sender, message)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def add_turns(self, messages: List[Dict[str, Any]], created: Optional[float] = None) -> int:
+        """Bulk-import history entries (sender/message/seq); returns how many were stored"""
+        created = created or time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO turns (seq, created, sender, message) VALUES (?, ?, ?, ?)",
+                [(msg.get("seq"), msg.get("created", created), msg.get("sender", ""), msg.get("message", ""))
+                 for msg in messages]
+            )
+            self._db.commit()
+        return len(messages)
+
+    def add_mood(self, mood: str, message: str = "", created: Optional[float] = None) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO moods (created, mood, message) VALUES (?, ?, ?)",
+                (created or time.time(), mood, message)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def add_screenshot(self, path: str, description: Optional[str] = None,
+                       created: Optional[float] = None) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO screenshots (created, path, description) VALUES (?, ?, ?)",
+                (created or time.time(), path, description)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def describe_screenshot(self, screenshot_id: int, description: str) -> None:
+        """Attach Raven's description to a stored screenshot"""
+        with self._lock:
+            self._db.execute("UPDATE screenshots SET description = ? WHERE id = ?", (description, screenshot_id))
+            self._db.commit()
+
+    def count_turns(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+
+    def recent_turns(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest turns, returned oldest first"""
+        with self._lock:
+            rows = self._rows(self._db.execute(
+                "SELECT * FROM turns ORDER BY id DESC LIMIT ?", (limit,)
+            ))
+        rows.reverse()
+        return rows
+
+    def get_turns(self, turn_ids: List[int]) -> List[Dict[str, Any]]:
+        """Turns by id, oldest first"""
+        if not turn_ids:
+            return []
+        placeholders = ", ".join("?" for _ in turn_ids)
+        with self._lock:
+            return self._rows(self._db.execute(
+                f"SELECT * FROM turns WHERE id IN ({placeholders}) ORDER BY id", list(turn_ids)
+            ))
+
+    def turns_after(self, turn_id: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Turns stored after turn_id, oldest first"""
+        with self._lock:
+            return self._rows(self._db.execute(
+                "SELECT * FROM turns WHERE id > ? ORDER BY id LIMIT ?", (turn_id, limit)
+            ))
+
+    def turns_between(self, start: float, end: Optional[float] = None,
+                      limit: int = 500) -> List[Dict[str, Any]]:
+        """Turns with start <= created < end, oldest first"""
+        with self._lock:
+            return self._rows(self._db.execute(
+                "SELECT * FROM turns WHERE created >= ? AND created < ? ORDER BY created, id LIMIT ?",
+                (start, end if end is not None else float("inf"), limit)
+            ))
+
+    def search(self, query: str, limit: int = 20, start: Optional[float] = None,
+               end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Turns containing every word of query, best match first (newest first without FTS5)"""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        start = start if start is not None else 0.0
+        end = end if end is not None else float("inf")
+        with self._lock:
+            if self.has_fts:
+                match = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+                return self._rows(self._db.execute(
+                    "SELECT turns.* FROM turns_fts JOIN turns ON turns.id = turns_fts.rowid "
+                    "WHERE turns_fts MATCH ? AND turns.created >= ? AND turns.created < ? "
+                    "ORDER BY bm25(turns_fts) LIMIT ?",
+                    (match, start, end, limit)
+                ))
+            conditions = " AND ".join("message LIKE ?" for _ in words)
+            return self._rows(self._db.execute(
+                f"SELECT * FROM turns WHERE {conditions} AND created >= ? AND created < ? "
+                "ORDER BY created DESC LIMIT ?",
+                [f"%{word}%" for word in words] + [start, end, limit]
+            ))
+
+    def moods_between(self, start: float, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._rows(self._db.execute(
+                "SELECT * FROM moods WHERE created >= ? AND created < ? ORDER BY created",
+                (start, end if end is not None else float("inf"))
+            ))
+
+    def screenshots_between(self, start: float, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._rows(self._db.execute(
+                "SELECT * FROM screenshots WHERE created >= ? AND created < ? ORDER BY created",
+                (start, end if end is not None else float("inf"))
+            ))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
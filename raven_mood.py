@@ -0,0 +1,147 @@
+"""Raven Assistant - Mood Engine
+
+This module scores the user's mood from a weighted Bengali/English/Banglish lexicon
+(raven_data/mood_lexicon.tsv). All terms are compiled into one phrase matcher; every
+matched word adds its weight to its mood, scaled by intensifiers before it ("very",
+"onek") and flipped by negation ("not happy", "bhalo na"). Scoring is vectorized with
+NumPy, so months of chat history can be scored in one call.
+"""
+
+import os
+from typing import Optional, List, Dict, Union, Sequence
+import numpy as np
+
+from raven_nlp import Message, PhraseMatcher
+
+DEFAULT_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raven_data", "mood_lexicon.tsv")
+
+MODIFIER_KINDS = ("intensify", "negate", "negate_after")
+
+
+class MoodEngine:
+    """Weighted lexicon mood scoring with negation and intensity"""
+
+    # Known moods in tie-break order (an equal score goes to the earlier one)
+    MOODS = ("stressed", "sad", "tired", "happy")
+
+    def __init__(self, lexicon_path: Optional[str] = None, threshold: float = 0.5,
+                 window: int = 3, after_window: int = 2):
+        self.lexicon_path = lexicon_path or DEFAULT_LEXICON
+        self.threshold = threshold        # A mood needs at least this score to beat "neutral"
+        self.window = window              # Words before a mood word that an intensifier/negation reaches
+        self.after_window = after_window  # Words after a mood word that a Bengali-order negation reaches
+        self.moods: List[str] = []
+        self._terms: Dict[str, tuple] = {}  # term -> (kind, weight)
+        self._matcher: Optional[PhraseMatcher] = None
+        self.load(self.lexicon_path)
+
+    def load(self, path: str) -> None:
+        """Read a term/kind/weight TSV lexicon and compile it"""
+        terms: Dict[str, tuple] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    try:
+                        term, kind, weight = line.split("\t")
+                        terms[" ".join(term.lower().split())] = (kind.strip(), float(weight))
+                    except ValueError:
+                        print(f"[Terminal] Mood lexicon line {line_number} skipped: {line!r}")
+        except OSError as e:
+            print(f"[Terminal] Mood lexicon not loaded, every message will be neutral: {e}")
+
+        found = [kind for kind, _ in terms.values() if kind not in MODIFIER_KINDS]
+        self.moods = [mood for mood in self.MOODS if mood in found]
+        self.moods += [mood for mood in dict.fromkeys(found) if mood not in self.moods]
+        self._terms = terms
+        self._matcher = PhraseMatcher(terms) if terms else None
+
+    @staticmethod
+    def _normalize(text: Union[str, Message]) -> str:
+        if isinstance(text, Message):
+            return text.lower
+        return " ".join(text.lower().split())
+
+    def score_batch(self, texts: Sequence[Union[str, Message]], chunk_size: int = 20000) -> np.ndarray:
+        """Mood scores, one row per text and one column per mood in self.moods"""
+        scores = np.zeros((len(texts), len(self.moods)), dtype=np.float32)
+        if self._matcher is None:
+            return scores
+        for first in range(0, len(texts), chunk_size):
+            chunk = [self._normalize(text) for text in texts[first:first + chunk_size]]
+            self._score_chunk(chunk, scores[first:first + len(chunk)])
+        return scores
+
+    def _score_chunk(self, texts: List[str], scores: np.ndarray) -> None:
+        """Score normalized texts into scores (a view of the caller's array)"""
+        # One corpus, one matcher pass; "\n" between texts keeps phrases from spanning two
+        corpus = "\n".join(texts)
+        matches = self._matcher.find(corpus, overlapping=False)
+        if not matches:
+            return
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        text_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        start = np.fromiter((match[0] for match in matches), dtype=np.int64, count=len(matches))
+        end = np.fromiter((match[1] for match in matches), dtype=np.int64, count=len(matches))
+        kinds = [self._terms[match[2]][0] for match in matches]
+        weight = np.fromiter((self._terms[match[2]][1] for match in matches), dtype=np.float32, count=len(matches))
+        text_index = np.searchsorted(text_starts, start, side="right") - 1
+
+        # Word distance = spaces between two matches (the corpus has single spaces only)
+        codes = np.frombuffer(corpus.encode("utf-32-le"), dtype=np.uint32)
+        spaces = np.concatenate(([0], np.cumsum(codes == 32, dtype=np.int32)))
+        word_start, word_end = spaces[start], spaces[end]
+
+        kind_of = np.array([self.moods.index(kind) if kind in self.moods else -1 - MODIFIER_KINDS.index(kind)
+                            for kind in kinds], dtype=np.int64)
+        is_mood = kind_of >= 0
+        mood_rows = np.flatnonzero(is_mood)
+        if not len(mood_rows):
+            return
+        factor = np.ones(len(mood_rows), dtype=np.float32)
+
+        for kind, before in (("intensify", True), ("negate", True), ("negate_after", False)):
+            rows = np.flatnonzero(kind_of == -1 - MODIFIER_KINDS.index(kind))
+            if not len(rows):
+                continue
+            if before:
+                # Nearest modifier ending before the mood word starts
+                nearest = np.searchsorted(end[rows], start[mood_rows], side="right") - 1
+                valid = nearest >= 0
+                nearest = np.clip(nearest, 0, None)
+                distance = word_start[mood_rows] - word_end[rows[nearest]]
+                limit = self.window
+            else:
+                # Nearest modifier starting after the mood word ends
+                nearest = np.searchsorted(start[rows], end[mood_rows], side="left")
+                valid = nearest < len(rows)
+                nearest = np.clip(nearest, 0, len(rows) - 1)
+                distance = word_start[rows[nearest]] - word_end[mood_rows]
+                limit = self.after_window
+            valid &= (text_index[rows[nearest]] == text_index[mood_rows]) & (distance <= limit)
+            factor = np.where(valid, factor * weight[rows[nearest]], factor)
+
+        np.add.at(scores, (text_index[mood_rows], kind_of[mood_rows]), weight[mood_rows] * factor)
+
+    def labels(self, scores: np.ndarray) -> List[str]:
+        """Winning mood per row of score_batch output ("neutral" below the threshold)"""
+        if not self.moods or not len(scores):
+            return ["neutral"] * len(scores)
+        best = np.argmax(scores, axis=1)
+        best_score = scores[np.arange(len(scores)), best]
+        return [self.moods[index] if score >= self.threshold else "neutral"
+                for index, score in zip(best.tolist(), best_score.tolist())]
+
+    def detect_batch(self, texts: Sequence[Union[str, Message]]) -> List[str]:
+        return self.labels(self.score_batch(texts))
+
+    def score(self, text: Union[str, Message]) -> Dict[str, float]:
+        """Per-mood scores of one message"""
+        return dict(zip(self.moods, self.score_batch([text])[0].tolist()))
+
+    def detect(self, text: Union[str, Message]) -> str:
+        """The message's mood ("neutral" when no mood scores high enough)"""
+        return self.labels(self.score_batch([text]))[0]
@@ -0,0 +1,326 @@
+"""Raven Assistant - Message Analysis and Intent Router
+
+This module analyses each user message once (Message: normalized text, word tokens,
+script, number and file path spans) for every detector to share, and decides which
+command a message is (time, search, WhatsApp, ...).
+The command keywords live in one declarative table that is compiled once into a single
+regex, so a message is scanned one time no matter how many intents there are.
+Keywords match whole words, so "aj" does not fire inside "major" nor "time" inside "sometimes".
+"""
+
+import re
+import unicodedata
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Union
+
+
+# Word characters: letters/digits/underscore plus the whole Bengali block (its vowel
+# signs and virama are not \w on their own)
+WORD_CHARS = r"\w\u0980-\u09FF"
+_TOKEN_PATTERN = re.compile(f"[{WORD_CHARS}]+")
+_NUMBER_PATTERN = re.compile(r"(?<![\w.])\d+(?:[.,:/]\d+)*(?![\w])")
+
+# File path patterns, most specific first: D:/path/file.ext, C:\path\file.ext, /path/file.ext, file.ext
+PATH_PATTERNS = [
+    re.compile(r'[A-Za-z]:[\\\w\s\.\-\_\(\)]+\.[a-zA-Z0-9]+'),  # Windows absolute path
+    re.compile(r'[A-Za-z]:/[\w\s\.\-\_\/\(\)]+\.[a-zA-Z0-9]+'),    # Windows with forward slash
+    re.compile(r'/[\w\s\.\-\_\/\(\)]+\.[a-zA-Z0-9]+'),             # Unix path
+    re.compile(r'\w+\.[a-zA-Z0-9]+'),                                # Just filename.ext
+]
+
+
+_BENGALI_LETTER = re.compile("[\u0980-\u09FF]")
+_LATIN_LETTER = re.compile("[A-Za-z]")
+
+
+class Message:
+    """Immutable analysis of one user message, built once and shared by every detector
+
+    text    - NFC-normalized, whitespace collapsed and stripped (spans index into this)
+    lower   - text lowercased
+    tokens  - (word, start, end) for every word in lower
+    script  - "bengali", "latin", "mixed" or "none" (no letters)
+    numbers - (start, end, text) of every number ("42", "3.5", "10:30")
+    paths   - (start, end, text) of the first match of each PATH_PATTERNS entry, in pattern
+              order; bare numbers like "3.5" are not paths
+    """
+
+    __slots__ = ("raw", "text", "lower", "tokens", "words", "script", "bengali_chars",
+                 "latin_chars", "numbers", "paths", "_padded")
+
+    def __init__(self, raw: str):
+        text = " ".join(unicodedata.normalize("NFC", raw).split())
+        lower = text.lower()
+        tokens = tuple((match.group(), match.start(), match.end()) for match in _TOKEN_PATTERN.finditer(lower))
+        bengali = len(_BENGALI_LETTER.findall(text))
+        latin = len(_LATIN_LETTER.findall(text))
+        if bengali and latin:
+            script = "mixed"
+        elif bengali:
+            script = "bengali"
+        elif latin:
+            script = "latin"
+        else:
+            script = "none"
+        numbers = tuple((match.start(), match.end(), match.group()) for match in _NUMBER_PATTERN.finditer(text))
+        number_texts = {number for _, _, number in numbers}
+        paths = []
+        for pattern in PATH_PATTERNS:
+            match = pattern.search(text)
+            if match and match.group().strip() not in number_texts:
+                paths.append((match.start(), match.end(), match.group().strip()))
+
+        set_attr = super().__setattr__
+        set_attr("raw", raw)
+        set_attr("text", text)
+        set_attr("lower", lower)
+        set_attr("tokens", tokens)
+        set_attr("words", frozenset(word for word, _, _ in tokens))
+        set_attr("script", script)
+        set_attr("bengali_chars", bengali)
+        set_attr("latin_chars", latin)
+        set_attr("numbers", numbers)
+        set_attr("paths", tuple(paths))
+        # Words joined by single spaces with a space at each end, for whole-phrase lookups
+        set_attr("_padded", " " + " ".join(word for word, _, _ in tokens) + " ")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Message is immutable")
+
+    @classmethod
+    def of(cls, value: Union[str, "Message"]) -> "Message":
+        """Use an existing analysis or build one from raw text"""
+        return value if isinstance(value, Message) else cls(value)
+
+    @property
+    def has_bengali(self) -> bool:
+        return self.bengali_chars > 0
+
+    def contains(self, phrase: str) -> bool:
+        """Whole-word (or whole-phrase) match, case-insensitive: "aj" is not in "major" """
+        words = _TOKEN_PATTERN.findall(phrase.lower())
+        if not words:
+            return False
+        if len(words) == 1:
+            return words[0] in self.words
+        return " " + " ".join(words) + " " in self._padded
+
+    def contains_any(self, phrases: Iterable[str]) -> bool:
+        return any(self.contains(phrase) for phrase in phrases)
+
+    def first_of(self, phrases: Iterable[str]) -> Optional[str]:
+        """The first phrase (in the given order) that the message contains"""
+        for phrase in phrases:
+            if self.contains(phrase):
+                return phrase
+        return None
+
+    def after(self, phrase: str) -> Optional[str]:
+        """Original-case text following the first whole-word occurrence of phrase, or None"""
+        match = re.search(rf"(?<![{WORD_CHARS}]){re.escape(phrase.lower())}(?![{WORD_CHARS}])", self.lower)
+        if not match:
+            return None
+        return self.text[match.end():].strip()
+
+    def without(self, phrase: str) -> str:
+        """Lowercased text with every whole-word occurrence of phrase removed"""
+        stripped = re.sub(rf"(?<![{WORD_CHARS}]){re.escape(phrase.lower())}(?![{WORD_CHARS}])", "", self.lower)
+        return " ".join(stripped.split())
+
+    def __repr__(self) -> str:
+        return f"Message({self.text!r}, script={self.script!r})"
+
+
+# Keyword slots: a slot is hit when any of its keywords occurs in the lowercased message
+INTENT_SLOTS: Dict[str, Tuple[str, ...]] = {
+    "time": ("time", "what time", "clock", "somoy", "koyta baje"),
+    "date": ("date", "what day", "today", "aj", "ajke", "tarikh"),
+    "whatsapp": ("whatsapp",),
+    # Inflected forms are listed too: matching is whole-word, so "opening" is not "open"
+    "message": ("message", "messages", "messaging"),
+    "send": ("send", "sends", "sending"),
+    "search": ("search", "searches", "searching", "google", "khoj", "khuje"),
+    "open": ("open", "opens", "opening"),
+    # Apps open_app can launch, in the order they win when several are named
+    "app": ("chrome", "whatsapp", "code", "vscode", "notepad"),
+    "type": ("type this", "type:"),
+    "minimize": ("minimize", "minimizing"),
+    "everything": ("everything",),
+    "screenshot": ("screenshot", "screenshots"),
+    # Not an intent by itself: tells the file opener the user wants something opened
+    "open_verb": ("open", "opening", "read", "show", "launch", "launching", "start"),
+}
+
+# Intents in priority order; the first whose slots are all hit wins
+INTENT_TABLE: List[Tuple[str, Tuple[str, ...]]] = [
+    ("time", ("time",)),
+    ("date", ("date",)),
+    ("whatsapp", ("whatsapp",)),
+    ("whatsapp", ("message", "send")),
+    ("search", ("search",)),
+    ("open_app", ("open", "app")),
+    ("type_text", ("type",)),
+    ("minimize", ("minimize", "everything")),
+    ("screenshot", ("screenshot",)),
+]
+
+
+def _is_word_char(char: str) -> bool:
+    return bool(re.match(f"[{WORD_CHARS}]", char))
+
+
+def _trie_pattern(words: Iterable[str], word_boundary: bool = False) -> str:
+    """One regex for a set of literals, factored by common prefix (longest match first)
+
+    Alternatives at each node start with different characters, so the regex engine
+    rejects all but one of them on the first character. With word_boundary, a literal
+    ending in a word character must not be followed by another one.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, Any], last: str) -> str:
+        branches = [re.escape(char) + render(child, char) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            # Ending here is the last resort, so longer literals win
+            branches.append(f"(?![{WORD_CHARS}])" if word_boundary and _is_word_char(last) else "")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return render(trie, "")
+
+
+class IntentMatch:
+    """Result of routing one message: the winning intent (or None) and where each slot matched"""
+
+    def __init__(self, intent: Optional[str], slots: Dict[str, List[Tuple[int, int, str]]]):
+        self.intent = intent
+        self.slots = slots  # slot -> [(start, end, keyword)], in text order
+
+    def has(self, slot: str) -> bool:
+        return slot in self.slots
+
+    def keywords(self, slot: str) -> List[str]:
+        return [keyword for _, _, keyword in self.slots.get(slot, [])]
+
+    @property
+    def spans(self) -> List[Tuple[int, int, str]]:
+        """Every keyword match, in text order"""
+        return sorted({span for spans in self.slots.values() for span in spans})
+
+    def __repr__(self) -> str:
+        return f"IntentMatch({self.intent!r}, {self.spans})"
+
+
+class PhraseMatcher:
+    """Find every occurrence of a set of phrases in one regex pass
+
+    Phrases match whole words of already-lowercased text (word_boundary=False matches plain
+    substrings). find() reports overlapping matches and, for each match, the shorter phrases
+    inside it ("what time" also yields "time"); with overlapping=False it reports only the
+    longest match at each place, left to right.
+    """
+
+    def __init__(self, phrases: Iterable[str], word_boundary: bool = True):
+        self.word_boundary = word_boundary
+        self.phrases = set(phrases)
+
+        # The regex reports the longest phrase starting at each position, so a match
+        # also stands for the shorter phrases inside it
+        self._inner: Dict[str, List[Tuple[int, str]]] = {}
+        for phrase in self.phrases:
+            self._inner[phrase] = [(start, phrase[start:end])
+                                   for start in range(len(phrase)) for end in range(start + 1, len(phrase) + 1)
+                                   if phrase[start:end] in self.phrases and self._aligned(phrase, start, end)]
+
+        # Zero-width lookahead so matches may overlap ("what time" and "time")
+        start_boundary = f"(?<![{WORD_CHARS}])" if word_boundary else ""
+        self._pattern = re.compile(
+            start_boundary + "(?=(" + _trie_pattern(self.phrases, word_boundary) + "))"
+        ) if self.phrases else None
+
+    def _aligned(self, phrase: str, start: int, end: int) -> bool:
+        """Whether phrase[start:end] would be a whole-word match there too"""
+        if not self.word_boundary:
+            return True
+        starts_clean = start == 0 or not (_is_word_char(phrase[start - 1]) and _is_word_char(phrase[start]))
+        ends_clean = end == len(phrase) or not (_is_word_char(phrase[end]) and _is_word_char(phrase[end - 1]))
+        return starts_clean and ends_clean
+
+    def find(self, text: str, overlapping: bool = True) -> List[Tuple[int, int, str]]:
+        """(start, end, phrase) matches in text order"""
+        if self._pattern is None:
+            return []
+        found: List[Tuple[int, int, str]] = []
+        covered = 0
+        for match in self._pattern.finditer(text):
+            start, phrase = match.start(), match.group(1)
+            if overlapping:
+                found.extend((start + offset, start + offset + len(inner), inner)
+                             for offset, inner in self._inner[phrase])
+            elif start >= covered:
+                found.append((start, start + len(phrase), phrase))
+                covered = start + len(phrase)
+        return sorted(set(found)) if overlapping else found
+
+
+class IntentRouter:
+    """Match a message against every intent in one regex pass
+
+    Keywords match whole words of the lowercased message; word_boundary=False matches
+    plain substrings instead (the old if-chain's behaviour).
+    """
+
+    def __init__(self, table: Optional[List[Tuple[str, Tuple[str, ...]]]] = None,
+                 slots: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 word_boundary: bool = True):
+        self.table = table if table is not None else INTENT_TABLE
+        self.slot_keywords = slots if slots is not None else INTENT_SLOTS
+        self.word_boundary = word_boundary
+        self._compile()
+
+    def _compile(self) -> None:
+        self._keyword_slots: Dict[str, List[str]] = {}
+        for slot, keywords in self.slot_keywords.items():
+            for keyword in keywords:
+                self._keyword_slots.setdefault(keyword.lower(), []).append(slot)
+        self._matcher = PhraseMatcher(self._keyword_slots, self.word_boundary)
+
+        # A row needs all its slots, so it is filed under its first one only: routing then
+        # looks at rows whose first slot the message hit, not every row sharing a common slot
+        self._rows_by_slot: Dict[str, List[int]] = {}
+        for row, (_, required) in enumerate(self.table):
+            self._rows_by_slot.setdefault(required[0], []).append(row)
+
+    def scan(self, text: str) -> Dict[str, List[Tuple[int, int, str]]]:
+        """Slots hit by text (already lowercased) with their (start, end, keyword) spans"""
+        found: Dict[str, List[Tuple[int, int, str]]] = {}
+        for span in self._matcher.find(text):
+            for slot in self._keyword_slots[span[2]]:
+                found.setdefault(slot, []).append(span)
+        return found
+
+    def route(self, message: Union[str, Message]) -> IntentMatch:
+        """Winning intent plus every slot match (intent is None for plain chat)
+
+        Spans index into the message's normalized text when given a Message.
+        """
+        slots = self.scan(message.lower if isinstance(message, Message) else message.lower())
+        candidates = sorted({row for slot in slots for row in self._rows_by_slot.get(slot, ())})
+        for row in candidates:
+            intent, required = self.table[row]
+            if all(slot in slots for slot in required):
+                return IntentMatch(intent, slots)
+        return IntentMatch(None, slots)
+
+    def first_keyword(self, match: IntentMatch, slot: str) -> Optional[str]:
+        """The hit keyword of slot that comes first in the table (e.g. which app to open)"""
+        hit = set(match.keywords(slot))
+        for keyword in self.slot_keywords.get(slot, ()):
+            if keyword in hit:
+                return keyword
+        return None
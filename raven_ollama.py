@@ -0,0 +1,747 @@
+"""Raven Assistant - Ollama Client
+
+This module owns all HTTP traffic to the Ollama server.
+One pooled keep-alive session is shared by chat, streaming and screenshot requests.
+"""
+
+import json
+import re
+import time
+import random
+import threading
+from collections import deque
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class OllamaError(Exception):
+    """Raised when Ollama answers with a non-200 status or an error payload"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OllamaUnavailable(OllamaError):
+    """Raised without contacting Ollama while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stop sending requests to a backend that keeps failing
+
+    closed -> open after failure_threshold consecutive failures.
+    open -> half-open once reset_timeout has passed; the next request is a trial.
+    half-open -> closed on success, back to open on failure. Only the trial gets
+    through while it runs; a trial that never reports back is replaced after reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_started: Optional[float] = None  # When the running half-open trial was let through
+        self._lock = threading.Lock()
+
+    def _current_state(self) -> str:
+        """State with the open -> half-open timeout applied (caller holds the lock)"""
+        if self._state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_started = None
+        return self._state
+
+    def _trial_running(self) -> bool:
+        return self._trial_started is not None and time.time() - self._trial_started < self.reset_timeout
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    @property
+    def available(self) -> bool:
+        """Whether allow_request would let a request through (without taking the trial slot)"""
+        with self._lock:
+            state = self._current_state()
+            return state == self.CLOSED or (state == self.HALF_OPEN and not self._trial_running())
+
+    def allow_request(self) -> bool:
+        """Closed: yes. Open: no. Half-open: yes for the one trial request, no for the rest"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running():
+                self._trial_started = time.time()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                print("[Terminal] Ollama circuit closed - backend is healthy again")
+            self._state = self.CLOSED
+            self._trial_started = None
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_started = None
+            reopen = self._state == self.HALF_OPEN
+            if reopen or (self._state == self.CLOSED and self.failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self.opened_at = time.time()
+                print(f"[Terminal] Ollama circuit open - failing fast for {self.reset_timeout:.0f}s")
+
+
+class CancelToken:
+    """Cancellation flag for one in-flight generation
+
+    Cancelling closes the HTTP stream, which makes Ollama stop generating.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback) -> None:
+        """Run callback when cancelled (immediately if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+class OllamaClient:
+    """Pooled, reusable HTTP client for the Ollama API"""
+
+    # Statuses worth retrying: the server (or a proxy in front of it) is busy or restarting
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, base_url: str = "http://localhost:11434",
+                 connect_timeout: float = 3.05,
+                 read_timeout: float = 120.0,
+                 pool_size: int = 4,
+                 max_concurrency: int = 2,
+                 max_retries: int = 2,
+                 retry_backoff: float = 0.25,
+                 retry_backoff_max: float = 4.0,
+                 breaker: Optional[CircuitBreaker] = None,
+                 session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip("/")
+
+        # (connect, read) - a dead server fails fast, a slow generation does not
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Cap on requests in flight at once; extra callers wait for a free slot
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        # Jittered exponential backoff for transient failures
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+
+        # Health tracking: breaker short-circuits requests, the monitor probes /api/tags
+        self.breaker = breaker or CircuitBreaker()
+        self.healthy: Optional[bool] = None  # None until the first probe
+        self.available_models: List[str] = []
+        self.last_probe_at: Optional[float] = None
+        self._monitor_stop = threading.Event()
+        self._monitor_thread: Optional[threading.Thread] = None
+        # Called when a probe finds the server back after it was unreachable
+        self.on_recover: Optional[Callable[[], None]] = None
+
+        self.session = session or self._create_session(pool_size)
+
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Create a keep-alive session with a bounded connection pool"""
+        # Retries are done in _send with jitter and breaker checks, not by urllib3
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=0,
+            pool_block=True
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * (2 ** attempt)))
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send one request through the circuit breaker, retrying transient failures
+
+        Only failed connects and busy statuses are retried - a read timeout means a
+        generation was running, and retrying it would run it again.
+        The breaker counts requests, not attempts: one failure is recorded once the
+        retries are used up, so a single busy burst does not open the circuit.
+        """
+        if not self.breaker.allow_request():
+            raise OllamaUnavailable(f"Ollama at {self.base_url} is unavailable (circuit open)")
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, self._url(path), timeout=self.timeout, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+            except requests.exceptions.RequestException:
+                # Timeouts (not retried, see above) and anything else requests raises
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                    response.close()
+                else:
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    return response
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def get(self, path: str) -> Dict[str, Any]:
+        """GET an Ollama endpoint and return the decoded JSON"""
+        with self._slots:
+            response = self._send("GET", path)
+        if response.status_code != 200:
+            raise OllamaError(f"GET {path} failed", response.status_code)
+        return response.json()
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a non-streaming request and return the decoded JSON"""
+        with self._slots:
+            response = self._send("POST", path, json=payload)
+        if response.status_code != 200:
+            raise OllamaError(f"POST {path} failed", response.status_code)
+        return response.json()
+
+    def stream(self, path: str, payload: Dict[str, Any],
+               cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """POST a streaming request and yield each decoded JSON chunk
+
+        The concurrency slot and the connection are held until the generator
+        finishes or is closed. If cancel fires, the connection is closed and the
+        generator stops early without raising.
+        """
+        payload = dict(payload, stream=True)
+        with self._slots:
+            if cancel and cancel.cancelled:
+                return
+            with self._send("POST", path, json=payload, stream=True) as response:
+                if response.status_code != 200:
+                    raise OllamaError(f"POST {path} failed", response.status_code)
+                if cancel:
+                    cancel.on_cancel(response.close)
+
+                try:
+                    for line in response.iter_lines():
+                        if cancel and cancel.cancelled:
+                            return
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise OllamaError(chunk["error"], response.status_code)
+                        yield chunk
+                        if chunk.get("done"):
+                            break
+                except Exception:
+                    # Closing the response from another thread surfaces as a read error
+                    if cancel and cancel.cancelled:
+                        return
+                    self.breaker.record_failure()
+                    raise
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Call /api/generate without streaming"""
+        return self.post("/api/generate", dict(payload, stream=False))
+
+    def stream_generate(self, payload: Dict[str, Any],
+                        cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Call /api/generate and yield streamed chunks"""
+        return self.stream("/api/generate", payload, cancel)
+
+    def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Call /api/chat without streaming"""
+        return self.post("/api/chat", dict(payload, stream=False))
+
+    def stream_chat(self, payload: Dict[str, Any],
+                    cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Call /api/chat and yield streamed chunks"""
+        return self.stream("/api/chat", payload, cancel)
+
+    @staticmethod
+    def chunk_text(chunk: Dict[str, Any]) -> str:
+        """Extract generated text from a /api/generate or /api/chat response"""
+        if "message" in chunk:
+            return chunk["message"].get("content", "")
+        return chunk.get("response", "")
+
+    def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Embedding vectors for texts (/api/embed, or /api/embeddings on older Ollama)"""
+        try:
+            return self.post("/api/embed", {"model": model, "input": texts})["embeddings"]
+        except OllamaError as e:
+            if e.status_code != 404:
+                raise
+        return [self.post("/api/embeddings", {"model": model, "prompt": text})["embedding"] for text in texts]
+
+    def warm_up(self, model: str, keep_alive: str = "30m") -> Dict[str, Any]:
+        """Load a model into memory without generating anything
+
+        Ollama loads the model when it gets a generate request with no prompt.
+        """
+        return self.post("/api/generate", {"model": model, "keep_alive": keep_alive, "stream": False})
+
+    def probe(self) -> bool:
+        """Check that Ollama answers /api/tags (same probe as check_setup.py)
+
+        Updates healthy, available_models and the circuit breaker. Probes bypass
+        the breaker - they are how an open circuit finds out the server is back.
+        """
+        was_healthy = self.healthy
+        try:
+            response = self.session.get(self._url("/api/tags"), timeout=(self.timeout[0], 5))
+            ok = response.status_code == 200
+            if ok:
+                self.available_models = [model["name"] for model in response.json().get("models", [])]
+        except Exception:
+            ok = False
+
+        self.healthy = ok
+        self.last_probe_at = time.time()
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+        if ok != was_healthy:
+            status = "reachable" if ok else "NOT reachable"
+            print(f"[Terminal] Ollama at {self.base_url} is {status}")
+            if ok and was_healthy is False and self.on_recover:
+                self.on_recover()
+        return ok
+
+    def list_models(self) -> List[str]:
+        """Names of the models installed on the server (probes if not known yet)"""
+        if self.last_probe_at is None:
+            self.probe()
+        return list(self.available_models)
+
+    def start_health_monitor(self, interval: float = 10.0) -> None:
+        """Probe /api/tags every interval seconds in a background thread"""
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        self._monitor_stop.clear()
+
+        def monitor():
+            while True:
+                self.probe()
+                if self._monitor_stop.wait(interval):
+                    return
+
+        self._monitor_thread = threading.Thread(target=monitor, daemon=True)
+        self._monitor_thread.start()
+
+    def stop_health_monitor(self) -> None:
+        self._monitor_stop.set()
+
+    def close(self) -> None:
+        """Stop the health monitor and close pooled connections"""
+        self.stop_health_monitor()
+        self.session.close()
+
+
+class BackendPool:
+    """Spread requests over several Ollama hosts
+
+    Has the same request methods as OllamaClient, so RavenCore can use either.
+    Each request goes to the least-loaded healthy host that has the model:
+    fewest requests in flight, ties broken by lower recent latency for that model.
+    Load is counted per host, across models, because one Ollama server runs every
+    model on the same GPU: a "fast" request queues behind a "large" one there.
+    Latency is kept per (host, model) because models differ in speed.
+    A host whose circuit breaker opens is skipped (ejected) until its health
+    probe or a half-open trial request succeeds again (re-admitted).
+    A request that fails before any reply (host down, busy status, or 404 because
+    the host lacks the model) is tried on the next host; a host that answered 404
+    is skipped for that model for missing_model_seconds.
+    """
+
+    def __init__(self, base_urls: List[str], latency_alpha: float = 0.3,
+                 missing_model_seconds: float = 60.0, **client_kwargs):
+        if not base_urls:
+            raise ValueError("BackendPool needs at least one Ollama host")
+        self.clients = [OllamaClient(url, **client_kwargs) for url in dict.fromkeys(base_urls)]
+        self.latency_alpha = latency_alpha  # Weight of the newest sample in the latency average
+        self.missing_model_seconds = missing_model_seconds
+
+        self._in_flight: Dict[str, int] = {client.base_url: 0 for client in self.clients}
+        self._latency: Dict[Tuple[str, str], float] = {}  # (host, model) -> smoothed seconds
+        self._missing: Dict[Tuple[str, str], float] = {}  # (host, model) -> when it answered 404
+        self._dispatched: Dict[str, int] = {client.base_url: 0 for client in self.clients}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return self.clients[0].base_url
+
+    @property
+    def healthy(self) -> Optional[bool]:
+        states = [client.healthy for client in self.clients]
+        if any(states):
+            return True
+        return None if all(state is None for state in states) else False
+
+    @property
+    def available_models(self) -> List[str]:
+        models: Dict[str, None] = {}
+        for client in self.clients:
+            models.update(dict.fromkeys(client.available_models))
+        return list(models)
+
+    @property
+    def on_recover(self) -> Optional[Callable[[], None]]:
+        return self.clients[0].on_recover
+
+    @on_recover.setter
+    def on_recover(self, callback: Optional[Callable[[], None]]) -> None:
+        for client in self.clients:
+            client.on_recover = callback
+
+    @staticmethod
+    def _model_name(name: str) -> str:
+        """Ollama treats "Raven" and "Raven:latest" as the same model"""
+        return name[:-len(":latest")] if name.endswith(":latest") else name
+
+    def _recently_missing(self, client: OllamaClient, model: Optional[str]) -> bool:
+        """Whether the host answered 404 for model within missing_model_seconds"""
+        if not model:
+            return False
+        missing_since = self._missing.get((client.base_url, self._model_name(model)))
+        return missing_since is not None and time.time() - missing_since < self.missing_model_seconds
+
+    def _has_model(self, client: OllamaClient, model: Optional[str]) -> bool:
+        if not model:
+            return True
+        if self._recently_missing(client, model):
+            return False
+        if not client.available_models:
+            return True  # Unknown until probed - let the request find out
+        wanted = self._model_name(model)
+        return any(self._model_name(name) == wanted for name in client.available_models)
+
+    def _admitted(self) -> List[OllamaClient]:
+        """Hosts not ejected: circuit not open and last probe not failed
+
+        If every host looks down, fall back to the ones whose circuit still allows a try.
+        """
+        allowed = [client for client in self.clients if client.breaker.available]
+        return [client for client in allowed if client.healthy is not False] or allowed
+
+    def _acquire(self, model: Optional[str], tried: List[OllamaClient]) -> Optional[OllamaClient]:
+        """Pick the least-loaded admitted host with the model and count the request on it"""
+        admitted = [client for client in self._admitted() if client not in tried]
+        with_model = [client for client in admitted if self._has_model(client, model)]
+        with self._lock:
+            # Without any host known to have it, try the rest - except those that just said 404
+            candidates = with_model or [client for client in admitted if not self._recently_missing(client, model)]
+            if not candidates:
+                return None
+            client = min(candidates, key=lambda c: (self._in_flight[c.base_url],
+                                                    self._latency.get((c.base_url, model or ""), 0.0)))
+            self._in_flight[client.base_url] += 1
+            self._dispatched[client.base_url] += 1
+        tried.append(client)
+        return client
+
+    def _release(self, client: OllamaClient, model: Optional[str], seconds: Optional[float]) -> None:
+        with self._lock:
+            self._in_flight[client.base_url] -= 1
+            if seconds is not None:
+                key = (client.base_url, model or "")
+                previous = self._latency.get(key)
+                self._latency[key] = seconds if previous is None else (
+                    self.latency_alpha * seconds + (1 - self.latency_alpha) * previous)
+
+    def _fail_over(self, client: OllamaClient, model: Optional[str], error: Exception) -> bool:
+        """Whether error means "try the next host" (and note a host lacking the model)"""
+        if isinstance(error, (requests.exceptions.ConnectionError, OllamaUnavailable)):
+            return True
+        if not isinstance(error, OllamaError):
+            return False
+        if error.status_code == 404 and model:
+            with self._lock:
+                self._missing[(client.base_url, self._model_name(model))] = time.time()
+            return True
+        return error.status_code is not None and error.status_code >= 500
+
+    def _unavailable(self) -> OllamaUnavailable:
+        hosts = ", ".join(client.base_url for client in self.clients)
+        return OllamaUnavailable(f"No Ollama host available ({hosts})")
+
+    def _call(self, model: Optional[str], request: Callable[[OllamaClient], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run a non-streaming request, failing over to the next host if one is down"""
+        error: Optional[Exception] = None
+        tried: List[OllamaClient] = []
+        while True:
+            client = self._acquire(model, tried)
+            if client is None:
+                break
+            start = time.perf_counter()
+            seconds = None
+            try:
+                result = request(client)
+                seconds = time.perf_counter() - start
+                return result
+            except Exception as e:
+                if not self._fail_over(client, model, e):
+                    raise
+                print(f"[Terminal] Ollama host {client.base_url} failed, trying the next one: {e}")
+                error = e
+            finally:
+                self._release(client, model, seconds)
+        raise error or self._unavailable()
+
+    def _stream(self, model: Optional[str], request: Callable[[OllamaClient], Iterator[Dict[str, Any]]],
+                cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Stream from the best host; fail over only if nothing was yielded yet
+
+        Latency recorded for a stream is the time to the first chunk.
+        """
+        error: Optional[Exception] = None
+        tried: List[OllamaClient] = []
+        while not (cancel and cancel.cancelled):
+            client = self._acquire(model, tried)
+            if client is None:
+                break
+            start = time.perf_counter()
+            seconds = None
+            chunks = request(client)
+            try:
+                for chunk in chunks:
+                    if seconds is None:
+                        seconds = time.perf_counter() - start
+                    yield chunk
+                return
+            except Exception as e:
+                if seconds is not None or not self._fail_over(client, model, e):
+                    raise
+                print(f"[Terminal] Ollama host {client.base_url} failed, trying the next one: {e}")
+                error = e
+            finally:
+                chunks.close()
+                self._release(client, model, seconds)
+        if cancel and cancel.cancelled:
+            return
+        raise error or self._unavailable()
+
+    def get(self, path: str) -> Dict[str, Any]:
+        """GET an Ollama endpoint on the least-loaded host"""
+        return self._call(None, lambda client: client.get(path))
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to the least-loaded host that has payload["model"]"""
+        return self._call(payload.get("model"), lambda client: client.post(path, payload))
+
+    def stream(self, path: str, payload: Dict[str, Any],
+               cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Stream from the least-loaded host that has payload["model"]"""
+        return self._stream(payload.get("model"), lambda client: client.stream(path, payload, cancel), cancel)
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Call /api/generate without streaming"""
+        return self.post("/api/generate", dict(payload, stream=False))
+
+    def stream_generate(self, payload: Dict[str, Any],
+                        cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Call /api/generate and yield streamed chunks"""
+        return self.stream("/api/generate", payload, cancel)
+
+    def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Call /api/chat without streaming"""
+        return self.post("/api/chat", dict(payload, stream=False))
+
+    def stream_chat(self, payload: Dict[str, Any],
+                    cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Call /api/chat and yield streamed chunks"""
+        return self.stream("/api/chat", payload, cancel)
+
+    chunk_text = staticmethod(OllamaClient.chunk_text)
+
+    def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Embedding vectors from the least-loaded host that has the model"""
+        return self._call(model, lambda client: client.embed(model, texts))
+
+    def warm_up(self, model: str, keep_alive: str = "30m") -> Dict[str, Any]:
+        """Load a model on every admitted host that has it
+
+        Returns the first successful result; raises only if every host failed.
+        """
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[Exception] = None
+        admitted = self._admitted()
+        hosts = [client for client in admitted if self._has_model(client, model)] or admitted
+        for client in hosts:
+            try:
+                response = client.warm_up(model, keep_alive)
+                result = result or response
+            except Exception as e:
+                print(f"[Terminal] Warm-up of {model} on {client.base_url} failed: {e}")
+                error = e
+        if result is None:
+            raise error or self._unavailable()
+        return result
+
+    def probe(self) -> bool:
+        """Probe every host; True if at least one is reachable"""
+        results = [client.probe() for client in self.clients]
+        return any(results)
+
+    def list_models(self) -> List[str]:
+        """Models installed on any host"""
+        for client in self.clients:
+            if client.last_probe_at is None:
+                client.probe()
+        return self.available_models
+
+    def start_health_monitor(self, interval: float = 10.0) -> None:
+        """Probe every host in the background"""
+        for client in self.clients:
+            client.start_health_monitor(interval)
+
+    def stop_health_monitor(self) -> None:
+        for client in self.clients:
+            client.stop_health_monitor()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-host load, health and smoothed latency per model"""
+        with self._lock:
+            return [{
+                "host": client.base_url,
+                "healthy": client.healthy,
+                "circuit": client.breaker.state,
+                "in_flight": self._in_flight[client.base_url],
+                "dispatched": self._dispatched[client.base_url],
+                "latency": {model: round(seconds, 3) for (host, model), seconds in self._latency.items()
+                            if host == client.base_url},
+            } for client in self.clients]
+
+    def close(self) -> None:
+        """Stop the health monitors and close every host's connections"""
+        for client in self.clients:
+            client.close()
+
+
+class ModelRouter:
+    """Send short chit-chat to a fast model and longer or reasoning-heavy turns to the large one
+
+    If the large model's recent p95 first-token latency goes over slo_p95_seconds,
+    everything goes to the fast model until old samples age out.
+    """
+
+    CHITCHAT_WORDS = {
+        "hi", "hello", "hey", "thanks", "thank", "thx", "ok", "okay", "bye", "good", "nice",
+        "cool", "great", "lol", "haha", "yes", "no", "sure", "hmm", "acha", "accha", "thik",
+        "ache", "dhonnobad", "kemon", "acho", "valo", "bhalo"
+    }
+    REASONING_WORDS = {
+        "why", "how", "explain", "compare", "analyze", "analyse", "difference", "between",
+        "plan", "steps", "calculate", "solve", "code", "debug", "write", "summarize", "translate",
+        "keno", "kivabe", "bujhao", "bujhiye", "likho"
+    }
+
+    def __init__(self, fast_model: str, large_model: str,
+                 max_fast_words: int = 8,
+                 min_large_words: int = 25,
+                 slo_p95_seconds: float = 8.0,
+                 min_samples: int = 5,
+                 sample_ttl_seconds: float = 300.0,
+                 window: int = 50):
+        self.fast_model = fast_model
+        self.large_model = large_model
+        self.max_fast_words = max_fast_words    # This short or less -> fast model
+        self.min_large_words = min_large_words  # This long or more -> large model
+        self.slo_p95_seconds = slo_p95_seconds
+        self.min_samples = min_samples          # Samples needed before the SLO is enforced
+        self.sample_ttl_seconds = sample_ttl_seconds  # Old samples expire so a degraded model gets retried
+        self.window = window
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.fast_model != self.large_model
+
+    def choose(self, user_input: str) -> Tuple[str, str]:
+        """Return (model, reason) for a text turn"""
+        if not self.enabled:
+            return self.large_model, "single model"
+
+        words = re.findall(r"\w+", user_input.lower())
+        if len(words) >= self.min_large_words:
+            model, reason = self.large_model, "long message"
+        elif any(word in self.REASONING_WORDS for word in words):
+            model, reason = self.large_model, "reasoning"
+        elif len(words) <= self.max_fast_words or all(word in self.CHITCHAT_WORDS for word in words):
+            model, reason = self.fast_model, "short/chit-chat"
+        else:
+            model, reason = self.large_model, "default"
+
+        if model == self.large_model:
+            p95 = self.p95(self.large_model)
+            if p95 is not None and p95 > self.slo_p95_seconds:
+                return self.fast_model, f"degraded (p95 {p95:.1f}s > {self.slo_p95_seconds:.1f}s SLO)"
+        return model, reason
+
+    def record(self, model: str, seconds: float) -> None:
+        """Record an observed latency for a model"""
+        with self._lock:
+            samples = self._latencies.setdefault(model, deque(maxlen=self.window))
+            samples.append((time.time(), seconds))
+
+    def p95(self, model: str) -> Optional[float]:
+        """p95 of recent latencies, or None without enough fresh samples"""
+        cutoff = time.time() - self.sample_ttl_seconds
+        with self._lock:
+            values = sorted(seconds for stamp, seconds in self._latencies.get(model, ()) if stamp >= cutoff)
+        if len(values) < self.min_samples:
+            return None
+        index = min(len(values) - 1, int(round(0.95 * (len(values) - 1))))
+        return values[index]
@@ -0,0 +1,228 @@
+"""Raven Assistant - Prompt Builder
+
+This module builds the prompts sent to Ollama.
+The persona block is byte-identical for a given language mode and always comes first,
+so Ollama can reuse its prompt cache; anything that changes per turn goes at the tail.
+"""
+
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+
+# Senders that count as the user in chat history
+USER_SENDERS = ("You", "You (voice)")
+
+# Generation settings per route. "options" is sent to Ollama as-is: num_predict caps
+# the reply length, so together with max_seconds (a wall-clock cap RavenCore enforces
+# by cutting the stream) it bounds how long one turn can take.
+GENERATION_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Normal conversation turn
+    "chat": {
+        "options": {
+            "num_predict": 256,
+            "num_ctx": 4096,
+            "temperature": 0.7,
+            "top_p": 0.9,
+            # Stop if the model starts writing the user's next line
+            "stop": ["\nUser:", "\nYou:", "\nYou (voice):"],
+        },
+        "max_seconds": 60,
+    },
+    # "Describe this screenshot" - the one route that is allowed to be long
+    "screenshot": {
+        "options": {
+            "num_predict": 400,
+            "num_ctx": 4096,
+            "temperature": 0.4,
+            "top_p": 0.9,
+            "stop": ["\nUser:", "\nYou:"],
+        },
+        "max_seconds": 90,
+    },
+    # Chat turn with vision mode on: the screen is context, the answer stays short
+    "vision_context": {
+        "options": {
+            "num_predict": 200,
+            "num_ctx": 4096,
+            "temperature": 0.6,
+            "top_p": 0.9,
+            "stop": ["\nUser:", "\nYou:", "\nYou (voice):"],
+        },
+        "max_seconds": 60,
+    },
+    # Background conversation summary (max ~150 words)
+    "summarize": {
+        "options": {
+            "num_predict": 256,
+            "num_ctx": 4096,
+            "temperature": 0.2,
+            "top_p": 0.9,
+            "stop": [],
+        },
+        "max_seconds": 120,
+    },
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 ASCII chars per token, ~1.5 chars per token for Bengali and other scripts"""
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    ascii_chars = len(text) - non_ascii
+    return int(ascii_chars / 4 + non_ascii / 1.5) + 1
+
+
+def message_tokens(msg: Dict[str, Any]) -> int:
+    """Token estimate for one history entry, cached on the entry as msg["tokens"]"""
+    if "tokens" not in msg:
+        # +4 for the "Sender: " label and newline
+        msg["tokens"] = estimate_tokens(msg.get("message", "")) + 4
+    return msg["tokens"]
+
+
+def select_history(history: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+    """Pick the most recent history entries that fit in a token budget (oldest first)"""
+    selected = []
+    used = 0
+    for msg in reversed(history):
+        cost = message_tokens(msg)
+        if used + cost > budget:
+            break
+        selected.append(msg)
+        used += cost
+    selected.reverse()
+    return selected
+
+
+class PromptBuilder:
+    """Build cache-friendly prompts: static persona prefix, volatile context tail"""
+
+    def __init__(self, user_name: str):
+        self.user_name = user_name
+        self._persona_cache: Dict[str, str] = {}
+
+    def persona(self, language_mode: str) -> str:
+        """Return the static persona block for a language mode (same string every call)"""
+        if language_mode not in self._persona_cache:
+            self._persona_cache[language_mode] = self._render_persona(language_mode)
+        return self._persona_cache[language_mode]
+
+    def _render_persona(self, language_mode: str) -> str:
+        if language_mode == "english":
+            return f"""You are Raven, a witty and caring AI assistant who speaks in English.
+
+Personality traits:
+- 70% witty and playful, 30% caring and supportive
+- Speak ONLY in English - clear, natural, and professional
+- Address the user as "{self.user_name}"
+- Be conversational and warm, like a professional assistant
+- When you don't understand something, say "Sorry {self.user_name}, I didn't understand that"
+- Adapt to the user's mood and follow any mood guidance given with their message"""
+        else:
+            return f"""You are Raven, a witty and caring AI assistant who speaks in Banglish (Bengali + English mix).
+
+Personality traits:
+- 70% witty and playful, 30% caring and supportive
+- Mix Bengali and English naturally (e.g., "আমি একটু ভাবছি..." or "Wait koro, I'm checking")
+- Use STANDARD BENGALI only - NO Hindi words, NO broken grammar
+- Address the user as "{self.user_name}" (not "bondhu" or any other term)
+- Use common Bengali phrases like "আচ্ছা", "ঠিক আছে", "কেমন আছো", etc.
+- Be conversational and warm, like a professional assistant
+- When you don't understand something, say "Sorry {self.user_name}, বুঝতে পারিনি"
+- ADAPT TO THE USER'S MOOD and follow any mood guidance given with their message"""
+
+    def response_cue(self, language_mode: str) -> str:
+        """Closing line that asks the model to answer as Raven"""
+        if language_mode == "english":
+            return f"Raven (respond in English ONLY, address user as {self.user_name}, adapt to their mood):"
+        return (f"Raven (respond in Banglish with proper Standard Bengali, naturally mixing Bengali and English, "
+                f"address user as {self.user_name}, ADAPT TO THEIR MOOD):")
+
+    def volatile_context(self, mood_guidance: str, mood_context: str,
+                         now: Optional[datetime] = None) -> str:
+        """Per-turn context: time, date and mood. Always placed after the history."""
+        now = now or datetime.now()
+        lines = [
+            f"Current time: {now.strftime('%I:%M %p')}",
+            f"Current date: {now.strftime('%A, %B %d, %Y')}",
+            mood_context,
+        ]
+        if mood_guidance:
+            lines.append(mood_guidance)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _without_current_turn(history: List[Dict[str, Any]], user_input: str) -> List[Dict[str, Any]]:
+        """Drop the trailing history entry if it is the message being answered"""
+        if history and history[-1].get("sender") in USER_SENDERS and history[-1].get("message") == user_input:
+            return history[:-1]
+        return history
+
+    @staticmethod
+    def summary_block(summary: str) -> str:
+        """Compact block carrying the running summary of older turns"""
+        return f"Summary of earlier conversation:\n{summary}"
+
+    @staticmethod
+    def recall_block(recalled: Optional[List[Dict[str, Any]]]) -> str:
+        """Older messages picked for relevance to this turn (empty string if none)"""
+        if not recalled:
+            return ""
+        lines = "\n".join(f"- {msg['sender']}: {msg['message']}" for msg in recalled)
+        return f"Related earlier messages:\n{lines}\n\n"
+
+    def build_prompt(self, language_mode: str, history: List[Dict[str, Any]], user_input: str,
+                     mood_guidance: str = "", mood_context: str = "",
+                     now: Optional[datetime] = None, summary: str = "",
+                     recalled: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Build a single /api/generate prompt"""
+        history = self._without_current_turn(history, user_input)
+        conversation = "\n".join(f"{msg['sender']}: {msg['message']}" for msg in history)
+        # The summary changes rarely, so it sits right after the persona
+        summary_text = f"\n\n{self.summary_block(summary)}" if summary else ""
+
+        return f"""{self.persona(language_mode)}{summary_text}
+
+Recent conversation:
+{conversation}
+
+{self.recall_block(recalled)}{self.volatile_context(mood_guidance, mood_context, now)}
+
+User: {user_input}
+
+{self.response_cue(language_mode)}"""
+
+    def build_turn(self, language_mode: str, user_input: str,
+                   mood_guidance: str = "", mood_context: str = "",
+                   now: Optional[datetime] = None,
+                   recalled: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Build only the new turn, for requests that continue from Ollama's returned context"""
+        return f"""{self.recall_block(recalled)}{self.volatile_context(mood_guidance, mood_context, now)}
+
+User: {user_input}
+
+{self.response_cue(language_mode)}"""
+
+    def build_messages(self, language_mode: str, history: List[Dict[str, Any]], user_input: str,
+                       mood_guidance: str = "", mood_context: str = "",
+                       now: Optional[datetime] = None,
+                       image_data: Optional[str] = None,
+                       summary: str = "",
+                       recalled: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Build an /api/chat message list with the persona as the system message"""
+        history = self._without_current_turn(history, user_input)
+        messages: List[Dict[str, Any]] = [{"role": "system", "content": self.persona(language_mode)}]
+        if summary:
+            messages.append({"role": "system", "content": self.summary_block(summary)})
+
+        for msg in history:
+            role = "user" if msg.get("sender") in USER_SENDERS else "assistant"
+            messages.append({"role": role, "content": msg["message"]})
+
+        final = {
+            "role": "user",
+            "content": f"[{self.recall_block(recalled)}{self.volatile_context(mood_guidance, mood_context, now)}]\n\n{user_input}"
+        }
+        if image_data:
+            final["images"] = [image_data]
+        messages.append(final)
+        return messages
@@ -0,0 +1,163 @@
+"""Raven Assistant - Turn Scheduler
+
+This module queues user turns in front of RavenCore.process_message.
+Turns run by priority (voice > typed > screenshot > proactive idle messages)
+on a fixed number of worker threads, so nothing is dropped and Ollama never
+sees more concurrent turns than there are workers.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional, List, Dict, Any, Callable
+
+
+# Lower number = served first
+PRIORITY_VOICE = 0
+PRIORITY_TYPED = 1
+PRIORITY_SCREENSHOT = 2
+PRIORITY_PROACTIVE = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_VOICE: "voice",
+    PRIORITY_TYPED: "typed",
+    PRIORITY_SCREENSHOT: "screenshot",
+    PRIORITY_PROACTIVE: "proactive",
+}
+
+
+class Turn:
+    """One queued unit of work; done is set once it has run (or been dropped)"""
+
+    def __init__(self, priority: int, handler: Callable, args: tuple):
+        self.priority = priority
+        self.handler = handler
+        self.args = args
+        self.queued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.dropped = False
+
+
+class TurnScheduler:
+    """Bounded priority queue of turns served by a pool of worker threads"""
+
+    def __init__(self, workers: int = 1, max_queue: int = 32):
+        self.workers = workers
+        self.max_queue = max_queue
+
+        self._heap: List[tuple] = []
+        self._order = itertools.count()  # FIFO within the same priority
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+        # Metrics
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.max_depth_seen = 0
+        self.total_wait = 0.0
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"raven-turn-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop accepting turns and let the workers exit after their current turn"""
+        with self._cond:
+            self._running = False
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, turn in pending:
+            turn.dropped = True
+            turn.done.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, priority: int, handler: Callable, *args) -> Optional[Turn]:
+        """Queue handler(*args) at a priority
+
+        When the queue is full, a queued proactive turn is dropped to make room.
+        Returns the Turn, or None if the queue is full of real user turns.
+        """
+        turn = Turn(priority, handler, args)
+        with self._cond:
+            if len(self._heap) >= self.max_queue and not self._drop_proactive(priority):
+                self.rejected += 1
+                print(f"[Terminal] Turn queue full ({self.max_queue}), rejected {PRIORITY_NAMES.get(priority, priority)} turn")
+                return None
+            heapq.heappush(self._heap, (priority, next(self._order), turn))
+            self.submitted += 1
+            depth = len(self._heap)
+            self.max_depth_seen = max(self.max_depth_seen, depth)
+            self._cond.notify()
+        if depth > 1 or self.in_flight:
+            print(f"[Terminal] Queued {PRIORITY_NAMES.get(priority, priority)} turn (queue depth {depth})")
+        return turn
+
+    def _drop_proactive(self, incoming_priority: int) -> bool:
+        """Make room by dropping the newest queued proactive turn; caller holds the lock"""
+        if incoming_priority >= PRIORITY_PROACTIVE:
+            return False
+        candidates = [entry for entry in self._heap if entry[0] >= PRIORITY_PROACTIVE]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda entry: entry[1])
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        victim[2].dropped = True
+        victim[2].done.set()
+        self.dropped += 1
+        return True
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not self._heap:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, _, turn = heapq.heappop(self._heap)
+                self.in_flight += 1
+                self.total_wait += time.perf_counter() - turn.queued_at
+
+            try:
+                turn.handler(*turn.args)
+            except Exception as e:
+                print(f"[Terminal] Turn error: {e}")
+            finally:
+                with self._cond:
+                    self.in_flight -= 1
+                    self.completed += 1
+                turn.done.set()
+
+    @property
+    def depth(self) -> int:
+        """Turns waiting (not counting the ones running)"""
+        return len(self._heap)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            started = self.completed + self.in_flight
+            return {
+                "depth": len(self._heap),
+                "in_flight": self.in_flight,
+                "max_depth_seen": self.max_depth_seen,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "avg_wait_seconds": self.total_wait / started if started else 0.0,
+                "workers": self.workers,
+            }
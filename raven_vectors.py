@@ -0,0 +1,306 @@
+"""Raven Assistant - Vector Memory
+
+This module finds past messages that are relevant to the current input.
+Turns are embedded in the background (Ollama embeddings) and stored in a NumPy index
+under the memory folder. Search is a 256-bit SimHash prefilter over every stored turn
+followed by exact cosine re-ranking of the best candidates, which stays in the
+low milliseconds at 100k turns.
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Callable, Tuple
+import numpy as np
+
+from raven_ollama import OllamaError, OllamaUnavailable
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Set bits per element (np.bitwise_count needs NumPy 2; fall back to a byte table)"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    table = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (-1,))
+    return table[as_bytes].sum(axis=-1, dtype=np.uint16)
+
+
+class VectorIndex:
+    """Append-only store of unit vectors keyed by integer id, with fast top-k cosine search
+
+    Files in the index folder (all appended, never rewritten):
+      meta.json   - dimension, code size, projection seed and embedding model
+      ids.i64     - one int64 id per row
+      vectors.f16 - float16 unit vectors, used to re-rank candidates exactly
+      codes.u64   - SimHash sign bits of each vector, scanned for candidates
+    """
+
+    def __init__(self, path: str, model: str = "", bits: int = 256, candidates: int = 256, seed: int = 1234):
+        self.path = path
+        self.model = model
+        self.bits = bits
+        self.candidates = candidates  # Rows re-ranked exactly per search
+        self.seed = seed
+        self.dim: Optional[int] = None
+        self.count = 0
+        self._words = bits // 64
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, 0), dtype=np.float16)
+        self._codes = np.zeros((0, self._words), dtype=np.uint64)
+        self._projection: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self) -> None:
+        """Read the index files; a different model or dimension starts a fresh index"""
+        meta_path = self._file("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model or meta.get("bits") != self.bits:
+                print(f"[Terminal] Vector index was built for {meta.get('model')}, starting a new one")
+                self._reset_files()
+                return
+            self.seed = meta.get("seed", self.seed)
+            self._init_dim(meta["dim"])
+            ids = np.fromfile(self._file("ids.i64"), dtype=np.int64)
+            vectors = np.fromfile(self._file("vectors.f16"), dtype=np.float16)
+            codes = np.fromfile(self._file("codes.u64"), dtype=np.uint64)
+            # A crash can leave a partial row at the end of any file - keep complete rows only
+            rows = min(len(ids), len(vectors) // self.dim, len(codes) // self._words)
+            self._ids = ids[:rows].copy()
+            self._vectors = vectors[:rows * self.dim].reshape(rows, self.dim).copy()
+            self._codes = codes[:rows * self._words].reshape(rows, self._words).copy()
+            self.count = rows
+            self._truncate_files(rows)
+            print(f"[Terminal] Vector index loaded: {rows} turns ({self.dim} dims)")
+        except Exception as e:
+            print(f"[Terminal] Vector index unreadable, starting a new one: {e}")
+            self._reset_files()
+
+    def _reset_files(self) -> None:
+        for name in ("meta.json", "ids.i64", "vectors.f16", "codes.u64"):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        self.dim = None
+        self.count = 0
+
+    def _truncate_files(self, rows: int) -> None:
+        for name, row_bytes in (("ids.i64", 8), ("vectors.f16", 2 * self.dim), ("codes.u64", 8 * self._words)):
+            with open(self._file(name), "ab") as f:
+                f.truncate(rows * row_bytes)
+
+    def _init_dim(self, dim: int) -> None:
+        """Fix the dimension and build the (seeded, reproducible) SimHash projection"""
+        self.dim = dim
+        rng = np.random.default_rng(self.seed)
+        self._projection = rng.standard_normal((dim, self.bits)).astype(np.float32)
+        self._vectors = np.zeros((0, dim), dtype=np.float16)
+        with open(self._file("meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "bits": self.bits, "seed": self.seed, "model": self.model}, f)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _encode(self, unit: np.ndarray) -> np.ndarray:
+        """SimHash: one sign bit per random hyperplane, packed into uint64 words"""
+        bits = (unit @ self._projection) > 0
+        packed = np.packbits(bits, axis=-1, bitorder="little")
+        return packed.view(np.uint64).reshape(len(unit), self._words)
+
+    @property
+    def max_id(self) -> int:
+        return int(self._ids[:self.count].max()) if self.count else 0
+
+    def add(self, ids: List[int], vectors: List[List[float]]) -> None:
+        """Append vectors (any scale - they are normalized) under the given ids"""
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        with self._lock:
+            if self.dim is None:
+                self._init_dim(matrix.shape[1])
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding has {matrix.shape[1]} dims, index has {self.dim}")
+            unit = self._normalize(matrix)
+            new_ids = np.asarray(ids, dtype=np.int64)
+            new_vectors = unit.astype(np.float16)
+            new_codes = self._encode(unit)
+
+            for name, rows in (("ids.i64", new_ids), ("vectors.f16", new_vectors), ("codes.u64", new_codes)):
+                with open(self._file(name), "ab") as f:
+                    f.write(rows.tobytes())
+
+            self._reserve(self.count + len(new_ids))
+            end = self.count + len(new_ids)
+            self._ids[self.count:end] = new_ids
+            self._vectors[self.count:end] = new_vectors
+            self._codes[self.count:end] = new_codes
+            self.count = end
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the in-memory arrays (doubling) so appends are amortized O(1); caller holds the lock"""
+        capacity = len(self._ids)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        ids = np.zeros(capacity, dtype=np.int64)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float16)
+        codes = np.zeros((capacity, self._words), dtype=np.uint64)
+        ids[:self.count] = self._ids[:self.count]
+        vectors[:self.count] = self._vectors[:self.count]
+        codes[:self.count] = self._codes[:self.count]
+        self._ids, self._vectors, self._codes = ids, vectors, codes
+
+    def search(self, vector: List[float], k: int = 3) -> List[Tuple[int, float]]:
+        """Top-k (id, cosine similarity), best first"""
+        with self._lock:
+            if not self.count or self.dim is None:
+                return []
+            # Rows below count never change, so these views stay valid while add() appends
+            ids = self._ids[:self.count]
+            vectors = self._vectors[:self.count]
+            codes = self._codes[:self.count]
+        query = self._normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+        if query.shape[1] != self.dim:
+            return []
+
+        if len(ids) > self.candidates:
+            # Hamming distance between sign codes approximates the angle between vectors
+            query_code = self._encode(query)[0]
+            bit_counts = _popcount(codes ^ query_code)
+            distance = bit_counts[:, 0].astype(np.uint16)
+            for word in range(1, self._words):
+                distance += bit_counts[:, word]
+            # Distances are small integers: a histogram finds the cut-off faster than a partition
+            histogram = np.bincount(distance, minlength=self.bits + 1)
+            cutoff = int(np.searchsorted(np.cumsum(histogram), self.candidates))
+            rows = np.flatnonzero(distance <= cutoff)
+            limit = 4 * self.candidates
+            if len(rows) > limit:
+                # Many ties at the cut-off: keep the nearest rows, not the first ones by position
+                rows = rows[np.argpartition(distance[rows], limit - 1)[:limit]]
+        else:
+            rows = np.arange(len(ids))
+
+        scores = vectors[rows].astype(np.float32) @ query[0]
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(ids[rows[i]]), float(scores[i])) for i in best]
+
+
+class VectorMemory:
+    """Embed turns in the background and recall the most similar past turns
+
+    embed maps a list of texts to a list of vectors (Ollama in RavenCore, anything in tests).
+    After a transient embedding failure (server down or 5xx) recall and indexing pause,
+    retry_seconds at first and doubling up to max_retry_seconds, and the batch is retried.
+    Any other failure (a 4xx, a dimension mismatch) would fail again, so that batch is dropped.
+    """
+
+    def __init__(self, index: VectorIndex, embed: Callable[[List[str]], List[List[float]]],
+                 batch_size: int = 16, retry_seconds: float = 60.0, max_retry_seconds: float = 900.0):
+        self.index = index
+        self.embed = embed
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.unavailable_until = 0.0
+        self._failures = 0  # Transient failures in a row (backoff exponent)
+        self._queue: "queue.Queue[Tuple[int, str]]" = queue.Queue()
+        self._recent: "OrderedDict[str, List[float]]" = OrderedDict()  # text -> embedding
+        self._recent_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        return time.time() >= self.unavailable_until
+
+    def start(self) -> None:
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def add(self, turn_id: int, text: str) -> None:
+        """Queue a logged turn for embedding"""
+        if text.strip():
+            self._queue.put((turn_id, text))
+
+    def _embed_cached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing recent results (the query is usually the turn just logged)"""
+        with self._recent_lock:
+            cached = {text: self._recent[text] for text in texts if text in self._recent}
+        missing = [text for text in dict.fromkeys(texts) if text not in cached]
+        if missing:
+            for text, vector in zip(missing, self.embed(missing)):
+                cached[text] = vector
+            with self._recent_lock:
+                for text in missing:
+                    self._recent[text] = cached[text]
+                while len(self._recent) > 64:
+                    self._recent.popitem(last=False)
+        return [cached[text] for text in texts]
+
+    @staticmethod
+    def _transient(error: Exception) -> bool:
+        """Whether an embedding error may go away on its own (retry) or not (drop the batch)"""
+        if isinstance(error, OllamaUnavailable):
+            return True
+        if isinstance(error, OllamaError):
+            return error.status_code is None or error.status_code >= 500
+        # Connection errors and timeouts (requests' exceptions are OSErrors too)
+        return isinstance(error, OSError)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            while not self.available:
+                time.sleep(1.0)
+            try:
+                vectors = self._embed_cached([text for _, text in batch])
+                self.index.add([turn_id for turn_id, _ in batch], vectors)
+                self._failures = 0
+            except Exception as e:
+                if not self._transient(e):
+                    print(f"[Terminal] Embedding failed, dropping {len(batch)} turns: {e}")
+                    continue
+                delay = min(self.max_retry_seconds, self.retry_seconds * 2 ** self._failures)
+                self._failures += 1
+                self.unavailable_until = time.time() + delay
+                print(f"[Terminal] Embedding failed, retrying in {delay:.0f}s: {e}")
+                for item in batch:
+                    self._queue.put(item)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def search(self, text: str, k: int = 3, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Ids and scores of the stored turns most similar to text"""
+        if not self.available or not self.index.count:
+            return []
+        try:
+            vector = self._embed_cached([text])[0]
+        except Exception as e:
+            self.unavailable_until = time.time() + self.retry_seconds
+            print(f"[Terminal] Embedding failed, recall paused for {self.retry_seconds:.0f}s: {e}")
+            return []
+        return [(turn_id, score) for turn_id, score in self.index.search(vector, k) if score >= min_score]
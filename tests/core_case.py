@@ -0,0 +1,44 @@
+"""Shared setup for tests that run a headless RavenCore against a fake Ollama server"""
+
+import shutil
+import tempfile
+import unittest
+
+from tests.fake_ollama import FakeOllama
+
+try:
+    from raven_core import RavenCore
+    CORE_MISSING = ""
+except Exception as e:  # pyautogui needs a display; the GUI and voice packages may be missing
+    RavenCore = None
+    CORE_MISSING = f"{type(e).__name__}: {e}"
+
+
+@unittest.skipIf(RavenCore is None, f"RavenCore cannot be imported here ({CORE_MISSING})")
+class CoreTestCase(unittest.TestCase):
+    """Each test gets a fresh memory folder, a FakeOllama and a headless core on it"""
+
+    models = ["Raven:latest", "llama3.2-vision:latest"]
+
+    def setUp(self):
+        self.fake = FakeOllama(self.models)
+        self.folder = tempfile.mkdtemp(prefix="raven_core_")
+        self.cores = []
+        self.core = self.make_core()
+
+    def tearDown(self):
+        for core in self.cores:
+            core.shutdown()
+        self.fake.stop()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def make_core(self, **kwargs):
+        kwargs.setdefault("memory_path", self.folder)
+        core = RavenCore(ollama_hosts=[self.fake.url], headless=True, **kwargs)
+        self.cores.append(core)
+        return core
+
+    def generate_payloads(self):
+        """Bodies of the /api/generate requests the fake has seen"""
+        return [payload for path, payload in zip(self.fake.requests, self.fake.payloads)
+                if path == "/api/generate"]
@@ -0,0 +1,158 @@
+"""Raven Assistant - Fake Ollama server for tests
+
+A tiny local HTTP server that speaks enough of the Ollama API (/api/tags,
+/api/generate, /api/chat, streaming or not, and /api/embed) for the client, pool and
+core tests.
+Each instance records what it saw and can be told to misbehave.
+"""
+
+import hashlib
+import json
+import socket
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List
+
+
+class FakeOllama:
+    """One fake Ollama host on 127.0.0.1 (a random free port unless one is given)"""
+
+    def __init__(self, models: Optional[List[str]] = None, port: int = 0):
+        self.models = list(models) if models is not None else ["Raven:latest"]
+        self.delay = 0.0          # Seconds before answering a POST
+        self.chunks = 5           # Chunks in a streamed reply
+        self.chunk_delay = 0.0    # Seconds between streamed chunks
+        self.statuses = deque()   # Statuses for the next POSTs (then 200)
+        self.drop = False         # Close the connection instead of answering a POST
+        self.cut_after: Optional[int] = None  # Close a stream after this many chunks
+
+        self.requests: List[str] = []   # Path of every POST, in arrival order
+        self.payloads: List[dict] = []  # Body of every POST, in arrival order
+        self.client_ports = set()       # One port per client connection seen
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chunks_sent = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.port = port
+        self.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> None:
+        """Listen (again) on self.port"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop listening; new connections are refused"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @staticmethod
+    def embedding(text: str) -> List[float]:
+        """A stable 32-dim vector per text (same text, same vector)"""
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 - 0.5 for byte in digest]
+
+    def _done(self) -> dict:
+        """Final chunk fields: a context that differs per request, like Ollama's"""
+        with self._lock:
+            return {"done": True, "context": [len(self.payloads)] * 4, "prompt_eval_count": 10}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    pass  # The client went away; nothing to report
+
+            def _send_json(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                fake.client_ports.add(self.client_address[1])
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": name} for name in fake.models]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                fake.client_ports.add(self.client_address[1])
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests.append(self.path)
+                    fake.payloads.append(payload)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    status = fake.statuses.popleft() if fake.statuses else 200
+                try:
+                    if fake.drop:
+                        self.close_connection = True
+                        self.connection.close()
+                        return
+                    time.sleep(fake.delay)
+                    if status != 200:
+                        self._send_json(status, {"error": f"fake status {status}"})
+                    elif payload.get("model") and not any(
+                            name.split(":")[0] == payload["model"].split(":")[0] for name in fake.models):
+                        self._send_json(404, {"error": f"model '{payload['model']}' not found"})
+                    elif self.path == "/api/embed":
+                        self._send_json(200, {"embeddings": [fake.embedding(text) for text in payload["input"]]})
+                    elif payload.get("stream"):
+                        self._stream()
+                    else:
+                        self._send_json(200, dict(fake._done(), response="Hello Sir"))
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _stream(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for index in range(fake.chunks):
+                        if index == fake.cut_after:
+                            self.close_connection = True
+                            self.connection.shutdown(socket.SHUT_RDWR)
+                            return
+                        self._write_chunk({"response": f"word{index} ", "done": False})
+                        with fake._lock:
+                            fake.chunks_sent += 1
+                        time.sleep(fake.chunk_delay)
+                    self._write_chunk(dict(fake._done(), response=""))
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except OSError:
+                    # The client hung up (cancelled stream)
+                    self.close_connection = True
+
+            def _write_chunk(self, chunk: dict) -> None:
+                data = (json.dumps(chunk) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,121 @@
+"""Tests for BackendPool against several local fake Ollama servers"""
+
+import threading
+import time
+import unittest
+
+from raven_ollama import BackendPool, CircuitBreaker, OllamaError
+from tests.fake_ollama import FakeOllama
+
+PAYLOAD = {"model": "Raven", "prompt": "hi"}
+
+
+class BackendPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fakes = [FakeOllama() for _ in range(3)]
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool:
+            self.pool.close()
+        for fake in self.fakes:
+            fake.stop()
+
+    def make_pool(self, hosts=3, **kwargs):
+        kwargs.setdefault("max_retries", 0)
+        self.pool = BackendPool([fake.url for fake in self.fakes[:hosts]], **kwargs)
+        for client in self.pool.clients:
+            client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.3)
+        return self.pool
+
+    def test_least_loaded_dispatch(self):
+        for fake in self.fakes:
+            fake.delay = 0.3
+        pool = self.make_pool()
+        threads = []
+        for _ in range(3):
+            thread = threading.Thread(target=pool.generate, args=(PAYLOAD,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.05)  # Let the request get counted as in flight
+        for thread in threads:
+            thread.join()
+        self.assertEqual([len(fake.requests) for fake in self.fakes], [1, 1, 1])
+
+    def test_idle_pool_prefers_lower_latency(self):
+        pool = self.make_pool(hosts=2)
+        self.fakes[0].delay = 0.2
+        pool.generate(PAYLOAD)  # Host 0 (first tie) is now known to be slow
+        pool.generate(PAYLOAD)  # Host 1 has no latency yet
+        pool.generate(PAYLOAD)
+        self.assertEqual(len(self.fakes[0].requests), 1)
+        self.assertEqual(len(self.fakes[1].requests), 2)
+
+    def test_dead_host_is_ejected_and_readmitted(self):
+        pool = self.make_pool(hosts=2)
+        dead = self.fakes[0]
+        dead.stop()
+
+        # The first request fails over; after that the dead host is skipped
+        for _ in range(4):
+            self.assertEqual(pool.generate(PAYLOAD)["response"], "Hello Sir")
+        stats = {entry["host"]: entry for entry in pool.stats()}
+        self.assertEqual(stats[dead.url]["circuit"], CircuitBreaker.OPEN)
+        self.assertEqual(stats[dead.url]["dispatched"], 1)
+        self.assertEqual(len(self.fakes[1].requests), 4)
+
+        # Back up: after reset_timeout the half-open trial goes to it and re-admits it
+        dead.start()
+        time.sleep(0.35)
+        pool.generate(PAYLOAD)
+        self.assertEqual(len(dead.requests), 1)
+        self.assertEqual(pool.clients[0].breaker.state, CircuitBreaker.CLOSED)
+
+    def test_stream_fails_over_before_first_chunk(self):
+        pool = self.make_pool(hosts=2)
+        self.fakes[0].drop = True
+        chunks = list(pool.stream_generate(PAYLOAD))
+        self.assertEqual(len(self.fakes[0].requests), 1)
+        self.assertEqual(len(self.fakes[1].requests), 1)
+        self.assertTrue(chunks[-1]["done"])
+        self.assertEqual(len(chunks), self.fakes[1].chunks + 1)
+
+    def test_stream_error_after_first_chunk_is_raised(self):
+        pool = self.make_pool(hosts=2)
+        self.fakes[0].cut_after = 2
+        received = []
+        with self.assertRaises(Exception):
+            for chunk in pool.stream_generate(PAYLOAD):
+                received.append(chunk)
+        # Half a reply is never replayed on another host
+        self.assertEqual(len(received), 2)
+        self.assertEqual(len(self.fakes[1].requests), 0)
+
+    def test_host_without_model_is_skipped(self):
+        self.fakes[0].models = ["llama3.2:1b"]
+        pool = self.make_pool(hosts=2)
+        for _ in range(3):
+            self.assertEqual(pool.generate(PAYLOAD)["response"], "Hello Sir")
+        # One 404, then the host is skipped for this model but still used for others
+        self.assertEqual(len(self.fakes[0].requests), 1)
+        self.assertEqual(len(self.fakes[1].requests), 3)
+        self.assertEqual(pool.clients[0].breaker.state, CircuitBreaker.CLOSED)
+        pool.generate({"model": "llama3.2:1b", "prompt": "hi"})
+        self.assertEqual(len(self.fakes[0].requests), 2)
+
+    def test_model_missing_everywhere_raises(self):
+        pool = self.make_pool(hosts=2)
+        with self.assertRaises(OllamaError) as raised:
+            pool.generate({"model": "nope", "prompt": "hi"})
+        self.assertEqual(raised.exception.status_code, 404)
+
+    def test_busy_host_fails_over(self):
+        pool = self.make_pool(hosts=2)
+        self.fakes[0].statuses.append(503)
+        self.assertEqual(pool.generate(PAYLOAD)["response"], "Hello Sir")
+        self.assertEqual(len(self.fakes[1].requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
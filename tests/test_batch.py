@@ -0,0 +1,49 @@
+"""Tests for BatchRunner against a fake Ollama server"""
+
+import shutil
+import tempfile
+import unittest
+
+from tests.core_case import RavenCore, CORE_MISSING
+from tests.fake_ollama import FakeOllama
+
+if RavenCore is not None:
+    from raven_batch import BatchRunner
+
+
+@unittest.skipIf(RavenCore is None, f"RavenCore cannot be imported here ({CORE_MISSING})")
+class BatchRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeOllama()
+        self.fake.chunk_delay = 0.05
+        self.folder = tempfile.mkdtemp(prefix="raven_batch_test_")
+        self.runner = BatchRunner(workers=4, ollama_hosts=[self.fake.url], memory_root=self.folder)
+
+    def tearDown(self):
+        self.runner.close()
+        self.fake.stop()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_workers_share_one_client(self):
+        items = [{"id": index, "input": f"tell me a story about rivers number {index}"} for index in range(8)]
+        results = list(self.runner.run(items))
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result["ok"] for result in results))
+        cores = list(self.runner._cores.queue)
+        self.assertGreater(len(cores), 1)
+        self.assertTrue(all(core.ollama is self.runner.ollama_client for core in cores))
+        # The core default cap (2 per host) holds for the whole batch, not per worker
+        self.assertLessEqual(self.fake.max_in_flight, 2)
+
+    def test_headless_cores_send_only_the_turns(self):
+        list(self.runner.run([{"input": "hello there"}, {"input": "how are you doing"}]))
+        # No warm-up generations, no embedding requests, no summaries
+        self.assertEqual(self.fake.requests, ["/api/generate", "/api/generate"])
+        for core in self.runner._cores.queue:
+            self.assertFalse(core.recall_enabled)
+            self.assertEqual(core.vector_memory.pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
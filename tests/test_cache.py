@@ -0,0 +1,90 @@
+"""Tests for the response cache and how RavenCore uses it"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from raven_cache import ResponseCache
+from tests.core_case import CoreTestCase
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_cache_")
+        self.cache = ResponseCache(os.path.join(self.folder, "cache.db"), max_entries=2)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_only_repeatable_queries_are_cacheable(self):
+        for text in ("Hi!", "who are you?", "What's your name", "what can you do"):
+            self.assertTrue(self.cache.is_cacheable(text), text)
+        for text in ("yes", "why?", "sure", "thanks", "tell me a joke", "sometimes I feel lost", ""):
+            self.assertFalse(self.cache.is_cacheable(text), text)
+
+    def test_custom_queries(self):
+        cache = ResponseCache(queries=["Tell me a joke!"])
+        self.assertTrue(cache.is_cacheable("tell me a joke"))
+        self.assertFalse(cache.is_cacheable("hello"))
+
+    def test_lru_and_disk_tier(self):
+        for name in ("a", "b", "c"):
+            self.cache.put(name, f"reply {name}")
+        self.assertEqual(len(self.cache._memory), 2)
+        # "a" fell out of memory but is still on disk
+        self.assertEqual(self.cache.get("a"), "reply a")
+        self.assertEqual(self.cache.disk_hits, 1)
+        self.assertIsNone(self.cache.get("missing"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_expired_entries_are_dropped(self):
+        self.cache.put("a", "reply a")
+        self.cache.ttl_seconds = 0.05
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("a"))
+
+
+class CoreCacheTest(CoreTestCase):
+
+    def turn(self, text):
+        self.core.log_chat("You", text)
+        response, _ = self.core.process_message(text)
+        self.core.log_chat("Raven", response)
+        return response
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+
+    def test_follow_ups_are_not_cached(self):
+        self.turn("tell me about rivers")
+        self.turn("yes")
+        self.turn("yes")
+        self.assertFalse(self.core.last_response_cached)
+        self.assertEqual(len(self.generate_payloads()), 3)
+        self.assertEqual(self.core.response_cache.stats()["entries"], 0)
+
+    def test_cache_hit_then_continued_turn(self):
+        reply = self.turn("hello")
+        self.turn("tell me about rivers")
+        self.assertIn("context", self.generate_payloads()[-1])
+
+        self.assertEqual(self.turn("hello"), reply)
+        self.assertTrue(self.core.last_response_cached)
+        self.assertEqual(len(self.generate_payloads()), 2)
+
+        # The replayed exchange is not in Ollama's context, so the next prompt is rebuilt from text
+        self.turn("and what about lakes")
+        payload = self.generate_payloads()[-1]
+        self.assertNotIn("context", payload)
+        prompt = payload["prompt"]
+        self.assertGreater(prompt.rindex("hello"), prompt.index("rivers"))
+        self.assertEqual(prompt.count(reply.strip()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
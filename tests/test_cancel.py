@@ -0,0 +1,76 @@
+"""Tests for cancelling a reply mid-stream (Stop button / barge-in)"""
+
+import contextlib
+import io
+import threading
+import time
+
+from tests.core_case import CoreTestCase
+
+
+class CancelTest(CoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+        self.fake.chunks = 40
+        self.fake.chunk_delay = 0.05
+
+    def test_cancelled_stream_stops_with_partial_reply(self):
+        tokens = []
+
+        def on_token(token):
+            tokens.append(token)
+            if len(tokens) == 2:
+                threading.Thread(target=self.core.cancel_generation).start()
+
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            response, _ = self.core.process_message("tell me a long story", on_token=on_token)
+        self.assertTrue(self.core.last_generation_cancelled)
+        self.assertIn("Generation cancelled", log.getvalue())
+        self.assertTrue(response.startswith("word0 word1 "))
+        self.assertEqual(response, "".join(tokens))
+        self.assertLess(len(tokens), self.fake.chunks)
+        # Ollama stops generating once the connection is closed
+        time.sleep(0.3)
+        self.assertLess(self.fake.chunks_sent, self.fake.chunks)
+
+    def test_partial_reply_is_logged_and_prompted_next_turn(self):
+        self.fake.chunks = 3
+        self.fake.chunk_delay = 0
+        self.core.process_message("hello there")  # Leaves a session context behind
+        self.fake.chunks = 40
+        self.fake.chunk_delay = 0.05
+
+        def on_token(token):
+            self.core.cancel_generation()
+
+        self.core.log_chat("You", "tell me a long story")
+        response, _ = self.core.process_message("tell me a long story", on_token=on_token)
+        self.core.log_chat("Raven", response)
+        self.assertEqual(self.core.chat_history[-1]["message"], response)
+
+        # The old context lacks the cut-off exchange, so the next prompt is rebuilt from the log
+        self.fake.chunks = 3
+        self.fake.chunk_delay = 0
+        self.core.process_message("go on")
+        payload = self.generate_payloads()[-1]
+        self.assertNotIn("context", payload)
+        self.assertIn("tell me a long story", payload["prompt"])
+
+    def test_cancel_without_generation(self):
+        self.assertFalse(self.core.cancel_generation())
+
+
+class BargeInTest(CoreTestCase):
+
+    def test_own_voice_is_not_barge_in(self):
+        self.core._speaking_text = "Okay Sir, here is the weather for Dhaka today"
+        self.assertFalse(self.core.is_barge_in("weather for Dhaka today"))
+        self.assertFalse(self.core.is_barge_in("stop"))  # One word is too little to trust
+        self.assertTrue(self.core.is_barge_in("wait stop please"))
+        self.assertTrue(self.core.is_barge_in("no I meant Chittagong"))
+
+    def test_headless_core_hears_nothing(self):
+        self.assertIsNone(self.core.detect_speech(timeout=0.1))
@@ -0,0 +1,244 @@
+"""Tests for the chat log archive and its background writer"""
+
+import os
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from raven_chatlog import ChatLogWriter, ChatLogArchive
+
+
+def line(when, sender, message):
+    return f"[{when.strftime('%H:%M:%S')}] {sender}: {message}\n"
+
+
+class ChatLogArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_chatlog_")
+        self.archive = ChatLogArchive(self.folder)
+        self.day = datetime(2024, 3, 10, 9, 0, 0)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write(self, archive, when, sender, message):
+        return archive.write(line(when, sender, message), when)
+
+    def messages(self, records):
+        return [record["message"] for record in records]
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.folder) if name.startswith("chat_2"))
+
+    def test_rotates_by_day_and_size(self):
+        first = self.write(self.archive, self.day, "You", "good morning")
+        self.assertEqual(self.write(self.archive, self.day + timedelta(minutes=1), "Raven", "morning, Sir"), first)
+        second = self.write(self.archive, self.day + timedelta(days=1), "You", "next day")
+        self.assertNotEqual(second, first)
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz", "chat_20240311_090000.txt"])
+
+        self.archive.max_segment_bytes = 60
+        when = self.day + timedelta(days=1, hours=1)
+        third = self.write(self.archive, when, "You", "x" * 40)
+        self.assertNotEqual(third, second)
+        self.archive.close()
+        # Too big to merge into the day's first segment, so it stays its own file
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz", "chat_20240311_090000.txt.gz",
+                                        "chat_20240311_100000.txt.gz"])
+        self.assertEqual(self.archive.stats()["lines"], 4)
+
+    def test_sessions_of_one_day_merge_into_one_file(self):
+        for hour in (9, 13, 20):
+            self.write(self.archive, self.day.replace(hour=hour), "You", f"session at {hour}")
+            self.archive.close()
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz"])
+        self.assertEqual(self.messages(self.archive.read_day("2024-03-10")),
+                         ["session at 9", "session at 13", "session at 20"])
+
+    def test_read_day(self):
+        self.write(self.archive, self.day.replace(hour=23, minute=59), "You", "late night")
+        self.write(self.archive, self.day + timedelta(days=1), "You", "morning after")
+        self.write(self.archive, self.day + timedelta(days=1, minutes=5), "Raven", "line one\nline two")
+        self.assertEqual(self.messages(self.archive.read_day(self.day.date())), ["late night"])
+        # The active, uncompressed segment is read as well
+        records = self.archive.read_day(self.day + timedelta(days=1))
+        self.assertEqual(self.messages(records), ["morning after", "line one\nline two"])
+        self.assertEqual(records[1]["sender"], "Raven")
+        self.assertEqual(records[1]["created"], (self.day + timedelta(days=1, minutes=5)).timestamp())
+        self.assertEqual(self.archive.read_day("2024-03-12"), [])
+
+    def test_search(self):
+        self.write(self.archive, self.day, "You", "my sister lives in Dhaka")
+        self.write(self.archive, self.day + timedelta(days=1), "Raven", "Dhaka is busy today")
+        self.write(self.archive, self.day + timedelta(days=2), "You", "what about Sylhet")
+        self.assertEqual(self.messages(self.archive.search("dhaka")),
+                         ["Dhaka is busy today", "my sister lives in Dhaka"])  # Newest first
+        self.assertEqual(self.messages(self.archive.search("Sister DHAKA")), ["my sister lives in Dhaka"])
+        self.assertEqual(self.messages(self.archive.search("raven dhaka")), ["Dhaka is busy today"])
+        self.assertEqual(len(self.archive.search("dhaka", limit=1)), 1)
+        self.assertEqual(self.messages(self.archive.search("dhaka", end=(self.day + timedelta(hours=1)).timestamp())),
+                         ["my sister lives in Dhaka"])
+        self.assertEqual(self.archive.search("?"), [])
+
+    def test_prune(self):
+        old = datetime.now() - timedelta(days=40)
+        self.write(self.archive, old, "You", "long ago")
+        self.write(self.archive, datetime.now() - timedelta(days=1), "You", "yesterday")
+        self.archive.close()
+        self.archive.retention_days = 30
+        self.assertEqual(self.archive.prune(), 1)
+        self.assertEqual(len(self.files()), 1)
+        self.assertEqual(self.messages(self.archive.search("long ago")), [])
+        self.assertEqual(self.archive.prune(), 0)
+
+    def test_recover_finishes_segments_left_open(self):
+        self.write(self.archive, self.day, "You", "before the crash")
+        # No close(): the app died with the segment open
+        archive = ChatLogArchive(self.folder)
+        self.assertEqual(archive.recover(), 1)
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz"])
+        self.assertEqual(self.messages(archive.read_day(self.day)), ["before the crash"])
+
+    def crash_before_remove(self, archive):
+        """Close the active segment, dying right after it was appended to the archive"""
+        with mock.patch("raven_chatlog.os.remove", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                archive.close()
+
+    def test_crash_after_merge_does_not_duplicate_the_day(self):
+        self.write(self.archive, self.day, "You", "first session")
+        self.archive.close()
+        self.write(self.archive, self.day.replace(hour=12), "You", "second session")
+        self.crash_before_remove(self.archive)
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz", "chat_20240310_120000.txt"])
+
+        archive = ChatLogArchive(self.folder)
+        archive.recover()
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz"])
+        self.assertEqual(self.messages(archive.read_day(self.day)), ["first session", "second session"])
+        self.assertEqual(archive.stats()["segments"], 1)
+        # Recovering again changes nothing
+        ChatLogArchive(self.folder).recover()
+        self.assertEqual(self.messages(ChatLogArchive(self.folder).read_day(self.day)),
+                         ["first session", "second session"])
+
+    def test_crash_mid_append_is_cut_and_retried(self):
+        self.write(self.archive, self.day, "You", "first session")
+        self.archive.close()
+        self.write(self.archive, self.day.replace(hour=12), "You", "second session")
+        self.crash_before_remove(self.archive)
+        with open(os.path.join(self.folder, "chat_20240310_090000.txt.gz"), "ab") as f:
+            f.write(b"\x1f\x8b\x08 half a gzip member")
+
+        archive = ChatLogArchive(self.folder)
+        archive.recover()
+        self.assertEqual(self.messages(archive.read_day(self.day)), ["first session", "second session"])
+
+    def test_crash_after_remove_only_updates_the_index(self):
+        self.write(self.archive, self.day, "You", "only session")
+        with mock.patch.object(ChatLogArchive, "_archived", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.archive.close()
+        with open(self.archive.index_path, encoding="utf-8") as f:
+            self.assertIn("archiving", json.load(f)[0])
+
+        archive = ChatLogArchive(self.folder)
+        self.assertEqual(archive.recover(), 1)
+        self.assertEqual(self.files(), ["chat_20240310_090000.txt.gz"])
+        self.assertEqual(self.messages(archive.read_day(self.day)), ["only session"])
+        entries = archive.segments_between(0)
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0]["closed"])
+        self.assertNotIn("archiving", entries[0])
+
+
+class ChatLogWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_chatlog_writer_")
+        self.path = os.path.join(self.folder, "log.txt")
+        # A long flush interval so only batch_size, flush() and close() write anything out
+        self.writer = ChatLogWriter(flush_interval=60, batch_size=3, fsync="never")
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_lines_are_written_in_batches(self):
+        for index in range(5):
+            self.writer.write(self.path, f"line {index}\n")
+        seen = []
+        self.writer.call(lambda: seen.append(self.read()), after_write=False)
+        self.assertTrue(self.writer.flush(2))
+        # The first full batch went out on its own; the last two waited for flush()
+        self.assertEqual(seen, ["line 0\nline 1\nline 2\n"])
+        self.assertEqual(self.read(), "".join(f"line {index}\n" for index in range(5)))
+        self.assertEqual(self.writer.stats()["batches"], 2)
+        self.assertEqual(self.writer.lines_written, 5)
+
+    def test_flush_interval_writes_a_partial_batch(self):
+        writer = ChatLogWriter(flush_interval=0.05, batch_size=100, fsync="never")
+        self.addCleanup(writer.close)
+        writer.write(self.path, "alone\n")
+        deadline = time.monotonic() + 2
+        while not self.read() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.read(), "alone\n")
+
+    def test_calls_run_in_queue_order(self):
+        seen = []
+        self.writer.write(self.path, "before\n")
+        self.writer.call(lambda: seen.append(("after_write", self.read())))
+        self.writer.write(self.path, "later\n")
+        self.writer.call(lambda: seen.append(("batching", self.read())), after_write=False)
+        self.assertTrue(self.writer.flush(2))
+        self.assertEqual(seen, [("after_write", "before\n"), ("batching", "before\n")])
+        self.assertEqual(self.read(), "before\nlater\n")
+
+    def test_close_drains_the_queue(self):
+        for index in range(4):
+            self.writer.write(self.path, f"line {index}\n")
+        self.writer.close()
+        self.assertEqual(self.read(), "".join(f"line {index}\n" for index in range(4)))
+        self.assertFalse(self.writer._thread.is_alive())
+        self.writer.write(self.path, "too late\n")  # Dropped, not raised
+        self.assertFalse(self.writer.flush(0.1))
+        self.assertNotIn("too late", self.read())
+
+    def test_failing_call_does_not_kill_the_writer(self):
+        def broken():
+            raise OSError("disk full")
+
+        self.writer.call(broken)
+        self.writer.call(broken, after_write=False)
+        self.writer.write(self.path, "still here\n")
+        self.assertTrue(self.writer.flush(2))
+        self.assertTrue(self.writer._thread.is_alive())
+        self.assertEqual(self.writer.errors, 2)
+        self.assertEqual(self.read(), "still here\n")
+
+    def test_write_error_is_counted(self):
+        self.writer.write(os.path.join(self.folder, "missing", "log.txt"), "lost\n")
+        self.writer.write(self.path, "kept\n")
+        self.assertTrue(self.writer.flush(2))
+        self.assertEqual(self.writer.errors, 1)
+        self.assertEqual(self.read(), "kept\n")
+
+    def test_bad_fsync_policy(self):
+        with self.assertRaises(ValueError):
+            ChatLogWriter(fsync="sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
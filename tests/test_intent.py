@@ -0,0 +1,66 @@
+"""Tests for the intent classifier and RavenCore's fallback to it"""
+
+import unittest
+
+from raven_intent import IntentClassifier
+from tests.core_case import CoreTestCase
+
+
+class IntentClassifierTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = IntentClassifier(threshold=0.75)
+
+    def test_command_phrasings(self):
+        self.assertEqual(self.classifier.classify("could you pull up chrome")[0], "open_app")
+        self.assertEqual(self.classifier.classify("ping mom on wa")[0], "whatsapp")
+        self.assertEqual(self.classifier.classify("got the hour?")[0], "time")
+
+    def test_chat_is_not_a_command(self):
+        for text in ("how are you today", "yes", "tell me a joke"):
+            self.assertIsNone(self.classifier.classify(text)[0], text)
+
+
+class ClassifierFallbackTest(CoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+
+    def test_read_only_guess_runs_at_once(self):
+        response, _ = self.core.process_message("got the hour?")
+        self.assertEqual(self.core.last_intent, "time")
+        self.assertIn("time", response.lower())
+        self.assertEqual(self.generate_payloads(), [])
+
+    def test_side_effect_guess_asks_then_runs_on_yes(self):
+        response, _ = self.core.process_message("could you pull up chrome")
+        self.assertEqual(self.core.last_intent, "confirm")
+        self.assertIn("open chrome", response)
+        self.assertEqual(self.generate_payloads(), [])
+
+        response, _ = self.core.process_message("yes")
+        self.assertEqual(self.core.last_intent, "open_app")
+        self.assertIn("chrome", response)
+        self.assertIsNone(self.core.pending_command)
+
+    def test_anything_but_yes_drops_the_guess(self):
+        self.core.process_message("ping mom on wa")
+        self.assertEqual(self.core.last_intent, "confirm")
+        self.core.process_message("no, never mind")
+        self.assertEqual(self.core.last_intent, "chat")
+        self.assertEqual(len(self.generate_payloads()), 1)
+        # A later "yes" is plain chat again
+        self.core.process_message("yes")
+        self.assertEqual(self.core.last_intent, "chat")
+
+    def test_search_is_confirmed_too(self):
+        self.core.process_message("look up the weather in dhaka")
+        self.assertEqual(self.core.last_intent, "confirm")
+        self.core.process_message("sure")
+        self.assertEqual(self.core.last_intent, "search")
+
+
+if __name__ == "__main__":
+    unittest.main()
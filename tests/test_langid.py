@@ -0,0 +1,75 @@
+"""Tests for Bengali / Banglish / English identification in raven_langid"""
+
+import unittest
+
+from raven_langid import LanguageID, LANGUAGES
+from raven_nlp import Message
+from tests.core_case import CoreTestCase
+
+# None of these sentences is in raven_data/langid_train.tsv
+BENGALI = ["কেমন আছো তুমি", "আমি ভালো আছি", "আজকে অনেক গরম পড়ছে"]
+BANGLISH = ["tumi ki korcho ekhon", "amar mon bhalo nei", "ajke khub gorom porche",
+            "ami kal office e jabo na", "ei file ta kothay rakhsi mone nai"]
+ENGLISH = ["please open chrome for me", "what is the weather like", "can you remind me about the meeting",
+           "my laptop battery is almost dead", "I think this movie is really boring"]
+
+
+class LanguageIDTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.language_id = LanguageID()
+
+    def test_labels(self):
+        for language, texts in (("bengali", BENGALI), ("banglish", BANGLISH), ("english", ENGLISH)):
+            for text in texts:
+                self.assertEqual(self.language_id.detect(text), language, text)
+                self.assertEqual(self.language_id.detect(Message(text)), language, text)
+
+    def test_probabilities(self):
+        for text in BENGALI + BANGLISH + ENGLISH:
+            scores = self.language_id.score(text)
+            self.assertEqual(set(scores), set(LANGUAGES))
+            self.assertAlmostEqual(sum(scores.values()), 1.0, places=5)
+        self.assertGreater(self.language_id.score("amar mon bhalo nei")["banglish"], 0.9)
+        self.assertLess(self.language_id.score("what is the weather like")["banglish"], 0.1)
+
+    def test_mixed_script_and_no_letters(self):
+        scores = self.language_id.score("ঠিক আছে, let's go")
+        self.assertAlmostEqual(scores["bengali"], 5 / 10)  # Five Bengali letters, five Latin ones
+        self.assertEqual(self.language_id.detect("12345 !!"), "unknown")
+        self.assertEqual(self.language_id.score(""), dict.fromkeys(LANGUAGES, 0.0))
+
+    def test_batch_agrees_with_single_texts(self):
+        texts = BENGALI + BANGLISH + ENGLISH + ["ঠিক আছে, let's go", "", "ok"]
+        self.assertEqual(self.language_id.detect_batch(texts), [self.language_id.detect(text) for text in texts])
+        for row, text in zip(self.language_id.score_batch(texts), texts):
+            single = self.language_id.score(text)
+            for column, language in enumerate(LANGUAGES):
+                self.assertAlmostEqual(float(row[column]), single[language], places=3)
+
+    def test_missing_model_counts_latin_as_english(self):
+        language_id = LanguageID(model_path="/nonexistent/langid_model.npz")
+        self.assertEqual(language_id.detect("amar mon bhalo nei"), "english")
+        self.assertEqual(language_id.detect("আমি ভালো আছি"), "bengali")
+
+
+class CoreLanguageSwitchTest(CoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+
+    def test_banglish_switches_mode_and_is_still_answered(self):
+        self.core.process_message("ami kal office e jabo na")
+        self.assertEqual(self.core.language_mode, "banglish")
+        self.assertEqual(len(self.generate_payloads()), 1)
+
+    def test_english_and_short_messages_do_not_switch(self):
+        for text in ("my laptop battery is almost dead", "ok"):
+            self.core.process_message(text)
+            self.assertEqual(self.core.language_mode, "english", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
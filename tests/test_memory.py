@@ -0,0 +1,300 @@
+"""Tests for the memory journal and the conversation store"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from raven_memory import ConversationSummarizer, MemoryJournal, ConversationStore
+from tests.core_case import CoreTestCase
+
+STATE = {"language_mode": "english", "mood_history": [], "conversation_summary": "", "summarized_through": 0}
+
+
+class ConversationSummarizerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.prompts = []
+        self.reply = "The user asked about rivers."
+        self.summarizer = ConversationSummarizer(self.generate, min_batch=3, max_batch=4)
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        return self.reply
+
+    @staticmethod
+    def history(count):
+        return [{"sender": "You", "message": f"message {index}"} for index in range(count)]
+
+    def test_pending_skips_the_window_and_summarized_turns(self):
+        history = self.history(6)
+        history[0]["summarized"] = True
+        self.assertEqual(ConversationSummarizer.pending(history, 4), history[1:4])
+
+    def test_folds_a_batch_into_the_summary(self):
+        history = self.history(6)
+        self.assertEqual(self.summarizer.summarize("The user said hi.", history), self.reply)
+        self.assertEqual([bool(msg.get("summarized")) for msg in history], [True] * 4 + [False] * 2)
+        prompt = self.prompts[0]
+        self.assertIn("The user said hi.", prompt)
+        self.assertIn("You: message 3", prompt)
+        self.assertNotIn("message 4", prompt)
+
+    def test_too_few_turns_or_empty_reply(self):
+        history = self.history(2)
+        self.assertIsNone(self.summarizer.summarize("", history))
+        self.assertEqual(self.prompts, [])
+        self.reply = "  "
+        history = self.history(3)
+        self.assertIsNone(self.summarizer.summarize("", history))
+        self.assertFalse(any(msg.get("summarized") for msg in history))
+
+
+class CoreSummaryTest(CoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+        self.core.reuse_context = False
+        self.core.history_token_budget = 60
+        for index in range(12):
+            self.core.log_chat("You" if index % 2 == 0 else "Raven", f"old turn {index} about the river trip")
+        self.core.last_activity_time = 0  # Idle long enough
+
+    def summary_prompts(self):
+        return [payload["prompt"] for payload in self.generate_payloads() if "running summary" in payload["prompt"]]
+
+    def test_evicted_turns_are_folded_into_the_summary(self):
+        window = self.core._select_history("")
+        self.assertTrue(self.core.summarize_if_idle())
+        self.assertEqual(self.core.conversation_summary, "Hello Sir")  # The fake's reply
+        evicted = self.core.chat_history[:len(self.core.chat_history) - len(window)]
+        self.assertTrue(evicted)
+        self.assertTrue(all(msg.get("summarized") for msg in evicted))
+        self.assertFalse(any(msg.get("summarized") for msg in window))
+        prompt = self.summary_prompts()[0]
+        self.assertIn("old turn 0 ", prompt)
+        self.assertNotIn("old turn 11 ", prompt)
+
+        # The summary goes right after the persona of the next prompt
+        self.core.process_message("tell me about rivers")
+        prompt = self.generate_payloads()[-1]["prompt"]
+        self.assertTrue(prompt.startswith(self.core.prompt_builder.persona("english")
+                                          + "\n\nSummary of earlier conversation:\nHello Sir\n"))
+        # Nothing new was evicted, so there is nothing to summarize
+        self.core.last_activity_time = 0
+        self.assertFalse(self.core.summarize_if_idle())
+        self.assertEqual(len(self.summary_prompts()), 1)
+
+    def test_waits_for_idle_time(self):
+        self.core.last_activity_time = time.time()
+        self.assertFalse(self.core.summarize_if_idle())
+        self.assertEqual(self.summary_prompts(), [])
+
+    def test_backlog_is_summarized_and_cleared(self):
+        self.core.summary_backlog = [{"sender": "You", "message": f"from the backlog {index}", "seq": 0}
+                                     for index in range(3)]
+        self.assertTrue(self.core.summarize_if_idle())
+        self.assertIn("from the backlog 0", self.summary_prompts()[0])
+        self.assertEqual(self.core.summary_backlog, [])
+
+    def test_summary_survives_a_restart(self):
+        self.assertTrue(self.core.summarize_if_idle())
+        flags = [bool(msg.get("summarized")) for msg in self.core.chat_history]
+        self.core.shutdown()
+        core = self.make_core()
+        self.assertEqual(core.conversation_summary, "Hello Sir")
+        self.assertEqual([bool(msg.get("summarized")) for msg in core.chat_history], flags)
+
+
+class MemoryJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_memory_")
+        self.journal_path = os.path.join(self.folder, "history.jsonl")
+        self.snapshot_path = os.path.join(self.folder, "history_snapshot.json")
+        self.journals = []
+
+    def tearDown(self):
+        for journal in self.journals:
+            journal.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def journal(self):
+        """A fresh journal on the same files, as after a restart"""
+        journal = MemoryJournal(self.journal_path, self.snapshot_path)
+        self.journals.append(journal)
+        return journal
+
+    def append(self, journal, *texts):
+        return [journal.append_message({"sender": "You", "message": text}) for text in texts]
+
+    @staticmethod
+    def texts(data):
+        return [msg["message"] for msg in data["messages"]]
+
+    def test_replay_after_restart(self):
+        journal = self.journal()
+        self.append(journal, "one", "two")
+        journal.append_state(STATE)
+        self.assertFalse(journal.append_state(dict(STATE)))  # Unchanged state is not written again
+        journal.close()
+
+        data = self.journal().load()
+        self.assertEqual(self.texts(data), ["one", "two"])
+        self.assertEqual([msg["seq"] for msg in data["messages"]], [1, 2])
+        self.assertEqual(data["language_mode"], "english")
+
+    def test_torn_last_line_is_skipped_and_cut(self):
+        journal = self.journal()
+        self.append(journal, "one", "two")
+        journal.close()
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"type": "message", "seq": 3, "mess')  # Crash mid-append
+
+        journal = self.journal()
+        self.assertEqual(self.texts(journal.load()), ["one", "two"])
+        # The next append must not be glued onto the torn fragment
+        self.append(journal, "three")
+        journal.close()
+        data = self.journal().load()
+        self.assertEqual(self.texts(data), ["one", "two", "three"])
+        self.assertEqual(data["messages"][-1]["seq"], 3)
+
+    def test_snapshot_offset_replays_only_the_tail(self):
+        journal = self.journal()
+        messages = self.append(journal, "one", "two", "three")
+        # The snapshot keeps only the live window; the journal head it covers is not replayed
+        journal.snapshot(messages[1:], STATE)
+        self.append(journal, "four")
+        journal.close()
+
+        journal = self.journal()
+        data = journal.load()
+        self.assertEqual(self.texts(data), ["two", "three", "four"])
+        self.assertEqual(journal.last_seq, 4)
+
+    def test_summary_watermark_marks_messages(self):
+        journal = self.journal()
+        self.append(journal, "one", "two", "three")
+        journal.append_state(dict(STATE, summarized_through=2))
+        journal.close()
+        data = self.journal().load()
+        self.assertEqual([bool(msg.get("summarized")) for msg in data["messages"]], [True, True, False])
+
+    def test_compact_keeps_live_memory(self):
+        journal = self.journal()
+        messages = self.append(journal, *[f"message {index}" for index in range(50)])
+        journal.append_state(STATE)
+        before = os.path.getsize(self.journal_path)
+        journal.compact(messages[-5:], dict(STATE, conversation_summary="old stuff"))
+        self.assertLess(os.path.getsize(self.journal_path), before)
+        self.append(journal, "after compaction")
+        journal.close()
+
+        data = self.journal().load()
+        self.assertEqual(self.texts(data), [f"message {index}" for index in range(45, 50)] + ["after compaction"])
+        self.assertEqual(data["messages"][-1]["seq"], 51)
+        self.assertEqual(data["conversation_summary"], "old stuff")
+
+    def test_compact_survives_a_stale_snapshot(self):
+        # A crash between rewriting the journal and the final snapshot leaves offset 0 behind
+        journal = self.journal()
+        messages = self.append(journal, *[f"message {index}" for index in range(10)])
+        journal.snapshot(messages[-3:], STATE, offset=0)
+        journal.close()
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            for msg in messages[-3:]:
+                f.write(json.dumps(dict(msg, type="message")) + "\n")
+        self.assertEqual(self.texts(self.journal().load()), ["message 7", "message 8", "message 9"])
+
+    def test_migrate_legacy_history_file(self):
+        legacy = os.path.join(self.folder, "history.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump({
+                "chat_history": [
+                    {"timestamp": "10:00:00", "sender": "You", "message": "hello", "summarized": True},
+                    {"timestamp": "10:00:01", "sender": "Raven", "message": "hi Sir", "summarized": True},
+                    {"timestamp": "10:00:05", "sender": "You", "message": "ami bhalo achi"},
+                ],
+                "language_mode": "banglish",
+                "mood_history": [{"mood": "happy", "message": "ami bhalo achi"}],
+                "conversation_summary": "The user said hello.",
+            }, f)
+
+        journal = self.journal()
+        self.assertEqual(journal.migrate(legacy), 3)
+        journal.close()
+        self.assertFalse(os.path.exists(legacy))
+        self.assertTrue(os.path.exists(f"{legacy}.migrated"))
+
+        data = self.journal().load()
+        self.assertEqual(self.texts(data), ["hello", "hi Sir", "ami bhalo achi"])
+        self.assertEqual([msg["timestamp"] for msg in data["messages"]], ["10:00:00", "10:00:01", "10:00:05"])
+        self.assertEqual([bool(msg.get("summarized")) for msg in data["messages"]], [True, True, False])
+        self.assertEqual(data["conversation_summary"], "The user said hello.")
+        self.assertEqual(data["mood_history"][0]["mood"], "happy")
+
+
+class ConversationStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_store_")
+        self.store = ConversationStore(os.path.join(self.folder, "conversations.db"))
+        self.store.add_turns([
+            {"sender": "You", "message": "my sister lives in Dhaka", "created": 100.0},
+            {"sender": "Raven", "message": "Dhaka is a busy city, Sir", "created": 110.0},
+            {"sender": "You", "message": "remind me to call my sister", "created": 200.0},
+            {"sender": "Raven", "message": "I will remind you", "created": 210.0},
+            {"sender": "You", "message": "what about the weather in Dhaka today", "created": 300.0},
+        ])
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def search(self, query, **kwargs):
+        return [turn["message"] for turn in self.store.search(query, **kwargs)]
+
+    def check_search(self):
+        self.assertEqual(sorted(self.search("Dhaka")), sorted([
+            "my sister lives in Dhaka", "Dhaka is a busy city, Sir", "what about the weather in Dhaka today"]))
+        # Every word must match
+        self.assertEqual(self.search("sister dhaka"), ["my sister lives in Dhaka"])
+        self.assertEqual(self.search("Dhaka", start=150, end=400), ["what about the weather in Dhaka today"])
+        self.assertEqual(len(self.search("Dhaka", limit=2)), 2)
+        self.assertEqual(self.search("Chittagong"), [])
+        self.assertEqual(self.search("?!"), [])
+        # Quotes and FTS operators are searched as plain words
+        self.assertEqual(self.search('"sister" OR'), [])
+
+    def test_search_fts(self):
+        if not self.store.has_fts:
+            self.skipTest("SQLite here has no FTS5")
+        self.check_search()
+        # Best match first, not newest first
+        self.store.add_turn("You", "sister, sister, where is my sister", created=50.0)
+        self.assertEqual(self.search("sister")[0], "sister, sister, where is my sister")
+
+    def test_search_like_fallback(self):
+        self.store.has_fts = False
+        self.check_search()
+        # Without FTS5 the newest match comes first
+        self.assertEqual(self.search("Dhaka")[0], "what about the weather in Dhaka today")
+
+    def test_turns_between(self):
+        turns = self.store.turns_between(100, 210)
+        self.assertEqual([turn["created"] for turn in turns], [100.0, 110.0, 200.0])  # End is exclusive
+        self.assertEqual(len(self.store.turns_between(200)), 3)
+        self.assertEqual(len(self.store.turns_between(0, limit=2)), 2)
+        self.assertEqual(self.store.turns_between(400), [])
+        # Turns stored in the same second keep their insert order
+        self.store.add_turn("You", "first", created=500.0)
+        self.store.add_turn("Raven", "second", created=500.0)
+        self.assertEqual([turn["message"] for turn in self.store.turns_between(500, 501)], ["first", "second"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+"""Tests for the lexicon mood engine"""
+
+import unittest
+
+from raven_mood import MoodEngine
+
+
+class MoodEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = MoodEngine()
+
+    def mood(self, text):
+        return self.engine.detect_batch([text])[0]
+
+    def test_down_alone_is_sad(self):
+        self.assertEqual(self.mood("I feel down"), "sad")
+        self.assertEqual(self.mood("feeling so down today"), "sad")
+
+    def test_set_phrases_with_down_are_neutral(self):
+        for text in ("I'm down to help", "I'm down for pizza tonight", "calm down please",
+                     "let me write down the address", "scroll down the page"):
+            self.assertEqual(self.mood(text), "neutral", text)
+
+    def test_negation(self):
+        self.assertEqual(self.mood("I am happy"), "happy")
+        self.assertEqual(self.mood("I am not happy"), "neutral")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""Tests for keyword routing in raven_nlp"""
+
+import unittest
+
+from raven_nlp import IntentRouter, Message
+
+
+class IntentRouterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.router = IntentRouter()
+
+    def intent(self, text):
+        return self.router.route(Message(text)).intent
+
+    def test_base_forms(self):
+        self.assertEqual(self.intent("open chrome"), "open_app")
+        self.assertEqual(self.intent("send message to mom"), "whatsapp")
+        self.assertEqual(self.intent("search for python"), "search")
+        self.assertEqual(self.intent("minimize everything"), "minimize")
+
+    def test_inflected_verbs(self):
+        self.assertEqual(self.intent("opening chrome now"), "open_app")
+        self.assertEqual(self.intent("I'm sending a message to dad"), "whatsapp")
+        self.assertEqual(self.intent("she sends messages every day"), "whatsapp")
+        self.assertEqual(self.intent("minimizing everything"), "minimize")
+
+    def test_words_containing_keywords_do_not_match(self):
+        self.assertIsNone(self.intent("the opener was great"))
+        self.assertIsNone(self.intent("that is a godsend"))
+
+    def test_opening_app_is_picked(self):
+        match = self.router.route(Message("opening chrome now"))
+        self.assertEqual(self.router.first_keyword(match, "app"), "chrome")
+
+
+if __name__ == "__main__":
+    unittest.main()
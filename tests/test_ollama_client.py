@@ -0,0 +1,203 @@
+"""Tests for OllamaClient against a local fake Ollama server"""
+
+import socket
+import threading
+import time
+import unittest
+
+import requests
+
+from raven_ollama import OllamaClient, OllamaError, CancelToken, CircuitBreaker
+from tests.fake_ollama import FakeOllama
+
+
+def unanswered_port():
+    """A port that accepts no connections: its listen backlog is already full
+
+    Returns (listening socket, filler sockets, port); keep the sockets open while testing.
+    """
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(0)
+    port = server.getsockname()[1]
+    fillers = []
+    for _ in range(5):
+        filler = socket.socket()
+        filler.setblocking(False)
+        try:
+            filler.connect(("127.0.0.1", port))
+        except BlockingIOError:
+            pass
+        fillers.append(filler)
+    return server, fillers, port
+
+
+def free_port():
+    """A port nothing listens on (connections are refused)"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class OllamaClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeOllama()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.fake.stop()
+
+    def client(self, url=None, **kwargs):
+        kwargs.setdefault("retry_backoff", 0.01)
+        client = OllamaClient(url or self.fake.url, **kwargs)
+        self.clients.append(client)
+        return client
+
+    def test_requests_reuse_pooled_connection(self):
+        client = self.client()
+        for _ in range(5):
+            client.generate({"model": "Raven", "prompt": "hi"})
+        self.assertEqual(len(self.fake.requests), 5)
+        self.assertEqual(len(self.fake.client_ports), 1)
+
+    def test_semaphore_limits_concurrency(self):
+        self.fake.delay = 0.2
+        client = self.client(max_concurrency=2, pool_size=4)
+        threads = [threading.Thread(target=client.generate, args=({"model": "Raven", "prompt": "hi"},))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.fake.requests), 5)
+        self.assertEqual(self.fake.max_in_flight, 2)
+
+    def test_connect_timeout(self):
+        server, fillers, port = unanswered_port()
+        try:
+            client = self.client(f"http://127.0.0.1:{port}", connect_timeout=0.2, max_retries=0)
+            started = time.perf_counter()
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                client.generate({"model": "Raven", "prompt": "hi"})
+            self.assertLess(time.perf_counter() - started, 2.0)
+        finally:
+            for sock in fillers + [server]:
+                sock.close()
+
+    def test_read_timeout_is_not_retried(self):
+        self.fake.delay = 1.0
+        client = self.client(read_timeout=0.2, max_retries=2)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            client.generate({"model": "Raven", "prompt": "hi"})
+        self.assertEqual(len(self.fake.requests), 1)
+
+    def test_cancel_closes_stream_midway(self):
+        self.fake.chunks = 50
+        self.fake.chunk_delay = 0.05
+        client = self.client()
+        cancel = CancelToken()
+        received = []
+        for chunk in client.stream_generate({"model": "Raven", "prompt": "hi"}, cancel):
+            received.append(chunk)
+            if len(received) == 2:
+                threading.Timer(0.1, cancel.cancel).start()
+        self.assertTrue(cancel.cancelled)
+        self.assertLess(len(received), 50)
+        self.assertFalse(any(chunk.get("done") for chunk in received))
+        # The server stops writing once the connection is gone
+        time.sleep(0.5)
+        self.assertLess(self.fake.chunks_sent, 50)
+
+    def test_busy_statuses_are_retried(self):
+        self.fake.statuses.extend([502, 503, 504])
+        client = self.client(max_retries=3)
+        self.assertEqual(client.generate({"model": "Raven", "prompt": "hi"})["response"], "Hello Sir")
+        self.assertEqual(len(self.fake.requests), 4)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(client.breaker.failures, 0)
+
+    def test_one_failed_request_counts_once(self):
+        # Three attempts with the default failure_threshold (3) must not open the circuit
+        self.fake.statuses.extend([503, 503, 503])
+        client = self.client(max_retries=2)
+        with self.assertRaises(OllamaError):
+            client.generate({"model": "Raven", "prompt": "hi"})
+        self.assertEqual(len(self.fake.requests), 3)
+        self.assertEqual(client.breaker.failures, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(client.generate({"model": "Raven", "prompt": "hi"})["response"], "Hello Sir")
+
+    def test_busy_status_raises_after_last_retry(self):
+        self.fake.statuses.extend([503, 503, 503])
+        client = self.client(max_retries=2)
+        with self.assertRaises(OllamaError) as raised:
+            client.generate({"model": "Raven", "prompt": "hi"})
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(len(self.fake.requests), 3)
+
+    def test_connect_errors_are_retried(self):
+        attempts = []
+        client = self.client(f"http://127.0.0.1:{free_port()}", max_retries=2)
+        client._backoff = lambda attempt: attempts.append(attempt) or 0.01
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.generate({"model": "Raven", "prompt": "hi"})
+        self.assertEqual(attempts, [0, 1])
+        self.assertEqual(client.breaker.failures, 1)
+
+    def test_other_errors_are_raised_without_retry(self):
+        for status in (400, 404, 500):
+            self.fake.requests.clear()
+            self.fake.statuses.append(status)
+            client = self.client(max_retries=2)
+            with self.assertRaises(OllamaError) as raised:
+                client.generate({"model": "Raven", "prompt": "hi"})
+            self.assertEqual(raised.exception.status_code, status)
+            self.assertEqual(len(self.fake.requests), 1)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def open_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.15)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        return breaker
+
+    def test_half_open_allows_one_trial(self):
+        breaker = self.open_breaker()
+        self.assertTrue(breaker.available)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.available)
+        self.assertEqual([breaker.allow_request() for _ in range(5)], [False] * 5)
+
+    def test_trial_success_closes(self):
+        breaker = self.open_breaker()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(all(breaker.allow_request() for _ in range(5)))
+
+    def test_trial_failure_reopens(self):
+        breaker = self.open_breaker()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_lost_trial_is_replaced_after_reset_timeout(self):
+        breaker = self.open_breaker()
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.15)
+        self.assertTrue(breaker.allow_request())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Tests for prompt construction in raven_prompt and how RavenCore uses it"""
+
+import unittest
+from datetime import datetime
+
+from raven_prompt import PromptBuilder, estimate_tokens, message_tokens, select_history
+from tests.core_case import CoreTestCase
+
+HISTORY = [
+    {"sender": "You", "message": "hello"},
+    {"sender": "Raven", "message": "Hello Sir"},
+]
+
+
+class PromptBuilderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = PromptBuilder("Sir")
+
+    def test_persona_is_the_same_string_every_time(self):
+        for mode in ("english", "banglish"):
+            self.assertIs(self.builder.persona(mode), self.builder.persona(mode))
+            self.assertEqual(self.builder.persona(mode), PromptBuilder("Sir").persona(mode))
+        self.assertNotEqual(self.builder.persona("english"), self.builder.persona("banglish"))
+
+    def test_volatile_context_goes_after_the_history(self):
+        morning = self.builder.build_prompt("english", HISTORY, "what time is it",
+                                            mood_context="Current mood: happy",
+                                            now=datetime(2024, 3, 10, 9, 15))
+        evening = self.builder.build_prompt("english", HISTORY, "what time is it",
+                                            mood_guidance="The user seems sad, be gentle.",
+                                            mood_context="Current mood: sad",
+                                            now=datetime(2024, 3, 11, 21, 40))
+        prefix = self.builder.persona("english") + "\n\nRecent conversation:\nYou: hello\nRaven: Hello Sir\n"
+        for prompt in (morning, evening):
+            self.assertTrue(prompt.startswith(prefix))
+            self.assertGreater(prompt.index("Current time:"), len(prefix))
+        self.assertIn("09:15 AM", morning)
+        self.assertIn("Monday, March 11, 2024", evening)
+
+    def test_message_being_answered_is_not_repeated(self):
+        history = HISTORY + [{"sender": "You", "message": "how are you"}]
+        prompt = self.builder.build_prompt("english", history, "how are you")
+        self.assertEqual(prompt.count("how are you"), 1)
+
+    def test_chat_messages_keep_the_persona_as_system_message(self):
+        first = self.builder.build_messages("banglish", HISTORY, "kemon acho", now=datetime(2024, 3, 10, 9, 0))
+        second = self.builder.build_messages("banglish", HISTORY, "ki korcho", now=datetime(2024, 3, 10, 9, 1),
+                                             summary="The user likes tea.")
+        self.assertEqual(first[0], {"role": "system", "content": self.builder.persona("banglish")})
+        self.assertEqual(first[0], second[0])
+        self.assertEqual([msg["role"] for msg in first], ["system", "user", "assistant", "user"])
+        self.assertIn("Current time: 09:00 AM", first[-1]["content"])
+        self.assertTrue(first[-1]["content"].endswith("kemon acho"))
+
+
+class SelectHistoryTest(unittest.TestCase):
+
+    def history(self, *texts):
+        return [{"sender": "You", "message": text} for text in texts]
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 1)
+        self.assertEqual(estimate_tokens("a" * 40), 11)
+        # Bengali costs far more tokens per character than ASCII
+        self.assertGreater(estimate_tokens("আমি ভালো আছি"), estimate_tokens("ami bhalo achi"))
+
+    def test_token_count_is_cached_on_the_entry(self):
+        msg = {"sender": "You", "message": "a" * 40}
+        self.assertEqual(message_tokens(msg), 15)
+        msg["message"] = "changed"
+        self.assertEqual(message_tokens(msg), 15)
+
+    def test_newest_messages_fill_the_budget(self):
+        history = self.history(*[f"message number {index}" for index in range(20)])
+        cost = message_tokens(history[0])
+        selected = select_history(history, cost * 5 + cost - 1)
+        self.assertEqual(selected, history[-5:])  # Oldest first
+        self.assertLessEqual(sum(msg["tokens"] for msg in selected), cost * 6 - 1)
+        self.assertEqual(select_history(history, 10 ** 6), history)
+        self.assertEqual(select_history(history, 0), [])
+        self.assertEqual(select_history([], 100), [])
+
+    def test_long_message_ends_the_window(self):
+        history = self.history("old and short", "x" * 4000, "new and short")
+        # An older short message is not pulled in past the one that did not fit
+        self.assertEqual(select_history(history, 100), history[-1:])
+
+
+class CoreHistoryBudgetTest(CoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+        self.core.reuse_context = False
+
+    def test_fixed_budget_bounds_the_prompt(self):
+        for index in range(30):
+            self.core.log_chat("You", f"old message {index} " + "blah " * 20)
+        self.core.history_token_budget = 100
+        self.core.log_chat("You", "tell me about rivers")
+        self.core.process_message("tell me about rivers")
+        prompt = self.generate_payloads()[-1]["prompt"]
+        history = prompt[prompt.index("Recent conversation:"):prompt.index("Current time:")]
+        kept = [line for line in history.splitlines() if line.startswith("You: old message")]
+        self.assertTrue(kept)
+        self.assertLessEqual(sum(estimate_tokens(line[len("You: "):]) + 4 for line in kept), 100)
+        self.assertIn("old message 29", history)
+        self.assertNotIn("old message 0 ", history)
+
+    def test_budget_follows_num_ctx(self):
+        budget = self.core._history_budget("hello")
+        options = self.core._generation_options("chat")
+        self.assertLess(budget, options["num_ctx"] - options["num_predict"])
+        self.core.conversation_summary = "summary " * 200
+        self.assertLess(self.core._history_budget("hello"), budget)
+        self.core.generation_profiles["chat"]["options"]["num_ctx"] = 8192
+        self.assertGreater(self.core._history_budget("hello"), budget)
+
+        self.core.process_message("tell me about rivers")
+        self.assertEqual(self.generate_payloads()[-1]["options"]["num_ctx"], 8192)
+
+
+class CorePromptPrefixTest(CoreTestCase):
+
+    def turn(self, text):
+        self.core.log_chat("You", text)
+        response, _ = self.core.process_message(text)
+        self.core.log_chat("Raven", response)
+
+    def test_persona_prefix_is_byte_identical_across_turns(self):
+        self.core.reuse_context = False  # Rebuild every prompt from text
+        self.core.language_mode = "english"
+        for text in ("tell me about rivers", "I feel so sad and lonely", "and what about lakes"):
+            self.turn(text)
+        prompts = [payload["prompt"].encode("utf-8") for payload in self.generate_payloads()]
+        self.assertEqual(len(prompts), 3)
+        prefix = (self.core.prompt_builder.persona("english") + "\n\nRecent conversation:\n").encode("utf-8")
+        for prompt in prompts:
+            self.assertTrue(prompt.startswith(prefix))
+        # History only grows at the end, so each prompt's history is a prefix of the next one's
+        first_history = prompts[1][:prompts[1].index(b"Current time:")].rstrip()
+        self.assertTrue(prompts[2].startswith(first_history))
+        self.assertIn(b"Current mood: sad", prompts[2][len(first_history):])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for the prioritized turn scheduler"""
+
+import threading
+import unittest
+
+from raven_scheduler import (TurnScheduler, PRIORITY_VOICE, PRIORITY_TYPED,
+                             PRIORITY_SCREENSHOT, PRIORITY_PROACTIVE)
+
+
+class TurnSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = TurnScheduler(workers=1, max_queue=3)
+        self.ran = []
+        self.release = threading.Event()
+        self.scheduler.start()
+        # Hold the only worker so the next turns wait in the queue
+        self.blocker = self.scheduler.submit(PRIORITY_TYPED, self.release.wait)
+        while not self.scheduler.in_flight:
+            threading.Event().wait(0.01)
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.stop()
+
+    def record(self, name):
+        self.ran.append(name)
+
+    def test_turns_run_by_priority_then_arrival(self):
+        turns = [self.scheduler.submit(PRIORITY_PROACTIVE, self.record, "proactive"),
+                 self.scheduler.submit(PRIORITY_TYPED, self.record, "typed 1"),
+                 self.scheduler.submit(PRIORITY_VOICE, self.record, "voice")]
+        self.release.set()
+        for turn in turns:
+            self.assertTrue(turn.done.wait(2))
+        self.assertEqual(self.ran, ["voice", "typed 1", "proactive"])
+
+        self.scheduler.submit(PRIORITY_SCREENSHOT, self.record, "screenshot").done.wait(2)
+        self.assertEqual(self.scheduler.stats()["completed"], 5)
+
+    def test_full_queue_rejects_user_turns(self):
+        turns = [self.scheduler.submit(PRIORITY_TYPED, self.record, index) for index in range(3)]
+        self.assertTrue(all(turns))
+        self.assertIsNone(self.scheduler.submit(PRIORITY_SCREENSHOT, self.record, "screenshot"))
+        self.assertIsNone(self.scheduler.submit(PRIORITY_VOICE, self.record, "voice"))
+        self.assertEqual(self.scheduler.rejected, 2)
+        self.assertEqual(self.scheduler.depth, 3)
+        self.release.set()
+        self.assertTrue(turns[-1].done.wait(2))
+        self.assertEqual(self.ran, [0, 1, 2])
+
+    def test_full_queue_drops_newest_proactive_turn_first(self):
+        old = self.scheduler.submit(PRIORITY_PROACTIVE, self.record, "old proactive")
+        new = self.scheduler.submit(PRIORITY_PROACTIVE, self.record, "new proactive")
+        self.scheduler.submit(PRIORITY_TYPED, self.record, "typed 1")
+
+        typed = self.scheduler.submit(PRIORITY_TYPED, self.record, "typed 2")
+        self.assertIsNotNone(typed)
+        self.assertTrue(new.dropped)
+        self.assertTrue(new.done.is_set())
+        self.assertEqual(self.scheduler.dropped, 1)
+
+        # A proactive turn never pushes out another one
+        self.assertIsNone(self.scheduler.submit(PRIORITY_PROACTIVE, self.record, "late proactive"))
+
+        self.release.set()
+        self.assertTrue(old.done.wait(2))
+        self.assertEqual(self.ran, ["typed 1", "typed 2", "old proactive"])
+
+    def test_stop_drops_waiting_turns(self):
+        waiting = self.scheduler.submit(PRIORITY_TYPED, self.record, "never")
+        self.scheduler.stop(timeout=0.1)  # The running turn is still blocked
+        self.assertTrue(waiting.dropped)
+        self.assertTrue(waiting.done.is_set())
+        self.release.set()
+        self.assertTrue(self.blocker.done.wait(2))
+        self.assertEqual(self.ran, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Tests for continuing turns from Ollama's returned context tokens"""
+
+import unittest
+
+from tests.core_case import CoreTestCase
+
+
+class SessionContextTest(CoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.core.language_mode = "english"
+
+    def turn(self, text):
+        self.core.log_chat("You", text)
+        response, _ = self.core.process_message(text)
+        self.core.log_chat("Raven", response)
+        return response
+
+    def asked(self, text):
+        """A turn that must reach the model; returns its payload"""
+        before = len(self.generate_payloads())
+        self.turn(text)
+        payloads = self.generate_payloads()
+        self.assertEqual(len(payloads), before + 1, text)
+        return payloads[-1]
+
+    def assert_rebuilt(self, payload):
+        self.assertNotIn("context", payload)
+        self.assertTrue(payload["prompt"].startswith(self.core.prompt_builder.persona(self.core.language_mode)))
+
+    def test_second_turn_sends_only_the_new_turn(self):
+        self.assert_rebuilt(self.asked("tell me about rivers"))
+        payload = self.asked("and what about lakes")
+        self.assertEqual(payload["context"], [1] * 4)  # What the fake returned for the first turn
+        self.assertNotIn("rivers", payload["prompt"])
+        self.assertNotIn(self.core.prompt_builder.persona("english"), payload["prompt"])
+        summary = self.core.get_prompt_eval_summary()
+        self.assertEqual(summary, {"rebuild": 10, "context": 10})
+
+    def test_language_change_rebuilds_the_prompt(self):
+        self.turn("tell me about rivers")
+        self.turn("আমি ভালো আছি")  # Bengali script switches to Banglish without calling the model
+        self.assertEqual(self.core.language_mode, "banglish")
+        self.assertIsNone(self.core._session_context)
+        self.assert_rebuilt(self.asked("nodir kotha bolo"))
+
+        self.assertIn("context", self.asked("ar kichu bolo"))
+        self.turn("english")
+        self.assert_rebuilt(self.asked("tell me more"))
+
+    def test_language_mode_set_directly_is_noticed(self):
+        self.turn("tell me about rivers")
+        self.core.language_mode = "banglish"
+        self.assert_rebuilt(self.asked("nodir kotha bolo"))
+
+    def test_model_change_rebuilds_the_prompt(self):
+        self.turn("tell me about rivers")
+        payload = self.core._build_payload("and lakes", model="llama3.2-vision:latest")
+        self.assert_rebuilt(payload)
+        self.assertIsNone(self.core._session_context)
+
+    def test_long_context_is_dropped(self):
+        self.core.max_context_tokens = 3
+        self.turn("tell me about rivers")
+        self.assert_rebuilt(self.asked("and what about lakes"))
+
+    def test_missing_context_and_invalidate(self):
+        self.turn("tell me about rivers")
+        self.core._record_generation({"model": "Raven:latest", "prompt": "x"}, {"response": "ok"})
+        self.assertIsNone(self.core._session_context)
+
+        self.turn("and what about lakes")
+        self.assertIsNotNone(self.core._session_context)
+        self.core.invalidate_context("test")
+        self.assert_rebuilt(self.asked("and mountains"))
+
+    def test_reuse_context_off(self):
+        self.core.reuse_context = False
+        self.turn("tell me about rivers")
+        self.assert_rebuilt(self.asked("and what about lakes"))
+        self.assertIsNone(self.core._session_context)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Tests for the vector index and the background embedder"""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from raven_ollama import OllamaError
+from raven_vectors import VectorIndex, VectorMemory
+from tests.core_case import CoreTestCase
+
+
+class VectorIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_vectors_")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_nearest_row_survives_ties_at_the_cutoff(self):
+        rng = np.random.default_rng(3)
+        query = rng.normal(size=32)
+        far = rng.normal(size=32)
+        index = VectorIndex(self.folder, candidates=4)
+        # 100 identical far rows come first, the exact match is the last row
+        index.add(list(range(100)), [far.tolist()] * 100)
+        index.add([100], [query.tolist()])
+        self.assertEqual(index.search(query.tolist(), k=1)[0][0], 100)
+
+
+class VectorMemoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix="raven_vectors_")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def run_with(self, error):
+        """Embed one turn with an embedder that always raises error"""
+        calls = []
+
+        def embed(texts):
+            calls.append(texts)
+            raise error
+
+        memory = VectorMemory(VectorIndex(self.folder), embed, retry_seconds=10)
+        memory.add(1, "hello")
+        memory.start()
+        time.sleep(0.2)
+        return memory, calls
+
+    def test_permanent_errors_drop_the_batch(self):
+        for error in (ValueError("Embedding has 3 dims, index has 4"), OllamaError("bad request", 400)):
+            memory, calls = self.run_with(error)
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(memory.pending, 0)
+            self.assertTrue(memory.available)
+            memory.add(2, "next turn")  # The worker is not stuck on the dropped batch
+            time.sleep(0.2)
+            self.assertEqual(len(calls), 2)
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        for error in (ConnectionError("refused"), OllamaError("busy", 503)):
+            memory, calls = self.run_with(error)
+            self.assertEqual(len(calls), 1)
+            self.assertFalse(memory.available)
+            self.assertAlmostEqual(memory.unavailable_until - time.time(), 10, delta=1)
+            memory.unavailable_until = 0  # Skip the wait: the same batch is tried again
+            time.sleep(1.3)
+            self.assertEqual(calls[1], ["hello"])
+            self.assertAlmostEqual(memory.unavailable_until - time.time(), 20, delta=2)
+
+
+class CoreRecallTest(CoreTestCase):
+
+    models = ["Raven:latest", "nomic-embed-text:latest"]
+
+    def setUp(self):
+        super().setUp()
+        self.core.recall_enabled = True  # Headless cores start with recall off
+
+    def embed_requests(self):
+        return [path for path in self.fake.requests if path.startswith("/api/embed")]
+
+    def test_missing_embedding_model_turns_recall_off(self):
+        self.fake.models = ["Raven:latest"]
+        self.core._index_backlog(0)
+        self.assertFalse(self.core.recall_enabled)
+        self.assertIsNone(self.core._start_recall("anything"))
+        started = time.perf_counter()
+        self.assertEqual(self.core._recall("anything", []), [])
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+    def test_backlog_waits_for_idle_time(self):
+        for index in range(40):
+            self.core.store.add_turn("You", f"stored message number {index}")
+        self.core.embed_backlog_idle_seconds = 0.5
+        self.core.last_activity_time = time.time()
+        worker = threading.Thread(target=self.core._index_backlog, args=(40,), daemon=True)
+        worker.start()
+        time.sleep(0.3)
+        self.assertEqual(self.embed_requests(), ["/api/embed"])  # Only the model check so far
+        worker.join(10)
+        self.assertFalse(worker.is_alive())
+        deadline = time.time() + 5
+        while self.core.vector_memory.index.count < 40 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.core.vector_memory.index.count, 40)
+        self.assertTrue(self.core.recall_enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Raven Assistant - Intent Classifier Trainer
+Trains the linear softmax model used by raven_intent from a labeled command file and
+writes it as a compact .npz (float16 weights over a hashed feature table).
+
+Usage: python train_intent.py [--data raven_data/intent_commands.tsv] [--output raven_data/intent_model.npz]
+                              [--bits 14] [--epochs 600] [--l2 1e-5] [--holdout 0.2]
+"""
+
+import os
+import sys
+import random
+import argparse
+import numpy as np
+
+from raven_intent import IntentClassifier, CHAT_LABEL, hashed_features
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raven_data")
+
+
+def read_samples(path: str):
+    """(intent, text) pairs from an intent<TAB>text file; '#' lines are comments"""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            intent, _, text = line.partition("\t")
+            if not intent or not text.strip():
+                print(f"Line {line_number} skipped: {line!r}")
+                continue
+            samples.append((intent.strip(), text.strip()))
+    return samples
+
+
+def train(samples, labels, bits: int, epochs: int, l2: float, learning_rate: float = 0.5):
+    """Full-batch softmax regression with momentum; returns (weights, bias)"""
+    features = np.zeros((len(samples), 1 << bits), dtype=np.float32)
+    for row, (_, text) in enumerate(samples):
+        slots, weights = hashed_features(text, bits)
+        features[row, slots] = weights
+    targets = np.zeros((len(samples), len(labels)), dtype=np.float32)
+    targets[np.arange(len(samples)), [labels.index(intent) for intent, _ in samples]] = 1.0
+
+    weights = np.zeros((len(labels), 1 << bits), dtype=np.float32)
+    bias = np.zeros(len(labels), dtype=np.float32)
+    weights_step, bias_step = np.zeros_like(weights), np.zeros_like(bias)
+    for _ in range(epochs):
+        logits = features @ weights.T + bias
+        logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+        error = logits / logits.sum(axis=1, keepdims=True) - targets
+        weights_step = 0.9 * weights_step - learning_rate * (error.T @ features / len(samples) + l2 * weights)
+        bias_step = 0.9 * bias_step - learning_rate * error.mean(axis=0)
+        weights += weights_step
+        bias += bias_step
+    return weights, bias
+
+
+def save(path: str, labels, weights, bias, bits: int) -> None:
+    np.savez_compressed(path, labels=np.array(labels), weights=weights.astype(np.float16),
+                        bias=bias.astype(np.float32), bits=np.array(bits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent classifier")
+    parser.add_argument("--data", default=os.path.join(DATA_DIR, "intent_commands.tsv"))
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "intent_model.npz"))
+    parser.add_argument("--bits", type=int, default=14, help="Feature table has 2**bits slots")
+    parser.add_argument("--epochs", type=int, default=600)
+    parser.add_argument("--l2", type=float, default=1e-5, help="Weight decay")
+    parser.add_argument("--threshold", type=float, default=0.6, help="Confidence gate used for the held-out report")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of commands held out for the accuracy check")
+    args = parser.parse_args()
+
+    samples = read_samples(args.data)
+    labels = sorted({intent for intent, _ in samples})
+    if CHAT_LABEL not in labels or len(labels) < 2:
+        print(f"{args.data} needs '{CHAT_LABEL}' examples and at least one command intent")
+        return 1
+
+    if args.holdout > 0:
+        shuffled = list(samples)
+        random.Random(7).shuffle(shuffled)
+        cut = int(len(shuffled) * (1 - args.holdout))
+        save(args.output, labels, *train(shuffled[:cut], labels, args.bits, args.epochs, args.l2), args.bits)
+        classifier = IntentClassifier(args.output, threshold=args.threshold)
+        held_out = shuffled[cut:]
+        right = misfired = 0
+        for intent, text in held_out:
+            guess, confidence = classifier.classify(text)
+            guess = guess or CHAT_LABEL
+            if guess == intent:
+                right += 1
+            else:
+                # A command guessed for chat (or the wrong command) acts on the user's machine
+                misfired += guess != CHAT_LABEL
+                print(f"  expected {intent}, got {guess} ({confidence:.2f}): {text}")
+        print(f"Held-out accuracy at threshold {args.threshold}: {right / len(held_out):.1%} "
+              f"on {len(held_out)} commands, {misfired} wrong commands")
+
+    # The shipped model uses every command
+    save(args.output, labels, *train(samples, labels, args.bits, args.epochs, args.l2), args.bits)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) // 1024} KB), intents: {', '.join(labels)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
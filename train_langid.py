@@ -0,0 +1,89 @@
+"""
+Raven Assistant - Language Model Trainer
+Trains the Banglish/English character n-gram table used by raven_langid from a
+labeled sentence file and writes it as a compact .npz (float16 log-probabilities).
+
+Usage: python train_langid.py [--data raven_data/langid_train.tsv] [--output raven_data/langid_model.npz]
+                              [--bits 14] [--alpha 0.5] [--holdout 0.2]
+"""
+
+import os
+import sys
+import random
+import argparse
+import numpy as np
+
+from raven_langid import LanguageID, MODEL_LANGUAGES, ORDERS, latin_text, ngram_ids, bucket_of
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raven_data")
+
+
+def read_samples(path: str):
+    """(label, text) pairs from a label<TAB>text file; '#' lines are comments"""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            label, _, text = line.partition("\t")
+            if label not in MODEL_LANGUAGES or not text.strip():
+                print(f"Line {line_number} skipped: {line!r}")
+                continue
+            samples.append((label, text.strip()))
+    return samples
+
+
+def train(samples, bits: int, alpha: float):
+    """Naive Bayes log-probabilities per hashed gram slot, plus log class priors"""
+    labels = np.array([MODEL_LANGUAGES.index(label) for label, _ in samples])
+    ids, owners = ngram_ids([latin_text(text) for _, text in samples])
+    buckets = bucket_of(ids, bits)
+    counts = np.zeros((len(MODEL_LANGUAGES), 2 ** bits), dtype=np.float64)
+    np.add.at(counts, (labels[owners], buckets), 1.0)
+    log_prob = np.log((counts + alpha) / (counts.sum(axis=1, keepdims=True) + alpha * 2 ** bits))
+    prior = np.log(np.bincount(labels, minlength=len(MODEL_LANGUAGES)) / len(labels))
+    return log_prob, prior
+
+
+def save(path: str, log_prob, prior, bits: int) -> None:
+    np.savez_compressed(path, log_prob=log_prob.astype(np.float16), prior=prior.astype(np.float32),
+                        labels=np.array(MODEL_LANGUAGES), orders=np.array(ORDERS), bits=np.array(bits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the Banglish/English n-gram table")
+    parser.add_argument("--data", default=os.path.join(DATA_DIR, "langid_train.tsv"))
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "langid_model.npz"))
+    parser.add_argument("--bits", type=int, default=14, help="Table has 2**bits slots per language")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Additive smoothing")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of sentences held out for the accuracy check")
+    args = parser.parse_args()
+
+    samples = read_samples(args.data)
+    if len(samples) < 2:
+        print(f"Not enough training sentences in {args.data}")
+        return 1
+
+    if args.holdout > 0:
+        shuffled = list(samples)
+        random.Random(7).shuffle(shuffled)
+        cut = int(len(shuffled) * (1 - args.holdout))
+        log_prob, prior = train(shuffled[:cut], args.bits, args.alpha)
+        save(args.output, log_prob, prior, args.bits)
+        held_out = shuffled[cut:]
+        predicted = LanguageID(args.output).detect_batch([text for _, text in held_out])
+        wrong = [(label, text) for (label, text), guess in zip(held_out, predicted) if guess != label]
+        print(f"Held-out accuracy: {1 - len(wrong) / len(held_out):.1%} on {len(held_out)} sentences")
+        for label, text in wrong:
+            print(f"  expected {label}: {text}")
+
+    # The shipped table uses every sentence
+    log_prob, prior = train(samples, args.bits, args.alpha)
+    save(args.output, log_prob, prior, args.bits)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) // 1024} KB) from {len(samples)} sentences")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -58,6 +58,18 @@ def main():
     files_ok = True
     files_ok &= check_file_exists(os.path.join(base_path, "raven_core.py"))
     files_ok &= check_file_exists(os.path.join(base_path, "raven_gui.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_ollama.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_prompt.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_memory.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_cache.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_scheduler.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_batch.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_vectors.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_chatlog.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_nlp.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_mood.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_langid.py"))
+    files_ok &= check_file_exists(os.path.join(base_path, "raven_intent.py"))
     files_ok &= check_file_exists(os.path.join(base_path, "raven_assistant.py"))
     files_ok &= check_file_exists(os.path.join(base_path, "raven_requirements.txt"))
     
@@ -66,6 +78,18 @@ def main():
     syntax_ok = True
     syntax_ok &= check_syntax(os.path.join(base_path, "raven_core.py"))
     syntax_ok &= check_syntax(os.path.join(base_path, "raven_gui.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_ollama.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_prompt.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_memory.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_cache.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_scheduler.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_batch.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_vectors.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_chatlog.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_nlp.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_mood.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_langid.py"))
+    syntax_ok &= check_syntax(os.path.join(base_path, "raven_intent.py"))
     syntax_ok &= check_syntax(os.path.join(base_path, "raven_assistant.py"))
     
     # Check classes
@@ -74,6 +98,18 @@ def main():
     classes_ok &= check_class_defined(os.path.join(base_path, "raven_core.py"), "RavenCore")
     classes_ok &= check_class_defined(os.path.join(base_path, "raven_core.py"), "CommandsHandler")
     classes_ok &= check_class_defined(os.path.join(base_path, "raven_gui.py"), "RavenGUI")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_ollama.py"), "OllamaClient")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_prompt.py"), "PromptBuilder")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_memory.py"), "ConversationSummarizer")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_cache.py"), "ResponseCache")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_scheduler.py"), "TurnScheduler")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_batch.py"), "BatchRunner")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_vectors.py"), "VectorIndex")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_chatlog.py"), "ChatLogWriter")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_nlp.py"), "IntentRouter")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_mood.py"), "MoodEngine")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_langid.py"), "LanguageID")
+    classes_ok &= check_class_defined(os.path.join(base_path, "raven_intent.py"), "IntentClassifier")
     
     # Check assets folder
     print("\n4. Checking assets folder...")